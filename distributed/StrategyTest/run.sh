@@ -1,3 +1,5 @@
 #!/bin/bash
 
-python -m pytest --reruns 3 --reruns-delay 5 -sv . --alluredir=./report
+# STRATEGY_WORKERS 个 pytest 进程并行, 各 case 从设备池(STRATEGY_DEVICES)申请互不相交的卡
+# STRATEGY_DRY_RUN=True 时在 CPU/gloo 上空跑, 只校验策略组合
+python -m pytest -n ${STRATEGY_WORKERS:-4} --reruns 3 --reruns-delay 5 -sv . --alluredir=./report
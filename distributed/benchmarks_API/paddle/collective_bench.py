@@ -0,0 +1,321 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+"""
+collective benchmark harness
+
+payload 由 paddle.full/paddle.empty 直接分配, 消息大小按倍数扫描, warmup/计时/重复均在进程内完成,
+每个大小输出 time/algbw/busbw(同 nccl-tests), 每个 rank 的结果写入 --result_dir 下的 json 记录,
+由 run.py 汇总. --backend gloo 在 CPU 上运行.
+"""
+import os
+import re
+import json
+import time
+import argparse
+
+import yaml
+
+import paddle
+import paddle.distributed as dist
+
+# busbw = algbw * factor(world), 与 nccl-tests 一致
+BUS_FACTOR = {
+    "all_reduce": lambda n: 2.0 * (n - 1) / n,
+    "all_gather": lambda n: (n - 1.0) / n,
+    "reduce_scatter": lambda n: (n - 1.0) / n,
+    "alltoall": lambda n: (n - 1.0) / n,
+    "alltoall_single": lambda n: (n - 1.0) / n,
+    "scatter": lambda n: (n - 1.0) / n,
+    "broadcast": lambda n: 1.0,
+    "reduce": lambda n: 1.0,
+    "send_recv": lambda n: 1.0,
+}
+
+# gloo 不支持的 api
+GLOO_UNSUPPORTED = ["alltoall", "alltoall_single", "reduce_scatter"]
+
+UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(size):
+    """parse_size, e.g. 1K 128M 134217728"""
+    m = re.match(r"^(\d+)([KMG]?)B?$", str(size).strip().upper())
+    if m is None:
+        raise ValueError("invalid size: {}".format(size))
+    return int(m.group(1)) * UNITS[m.group(2)]
+
+
+def size_list(begin, end, factor):
+    """log scale sizes from begin to end"""
+    sizes = []
+    b = begin
+    while b <= end:
+        sizes.append(b)
+        b *= factor
+    return sizes
+
+
+def size_name(b):
+    """size label, same as base_value.json"""
+    if b < 1048576:  # 1MB
+        return str(b // 1024) + "KB"
+    return str(b // 1024 // 1024) + "MB"
+
+
+def stream_kwargs(config):
+    """kwargs of dist.stream api"""
+    return {"sync_op": config["sync_op"], "use_calc_stream": config["use_calc_stream"]}
+
+
+def all_reduce_case(config, n_ele, world, rank):
+    """all_reduce"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        return lambda: dist.all_reduce(data)
+    return lambda: dist.stream.all_reduce(data, **stream_kwargs(config))
+
+
+def broadcast_case(config, n_ele, world, rank):
+    """broadcast"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        return lambda: dist.broadcast(data, src=1)
+    return lambda: dist.stream.broadcast(data, src=1, **stream_kwargs(config))
+
+
+def reduce_case(config, n_ele, world, rank):
+    """reduce"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        return lambda: dist.reduce(data, dst=0)
+    return lambda: dist.stream.reduce(data, dst=0, **stream_kwargs(config))
+
+
+def all_gather_case(config, n_ele, world, rank):
+    """all_gather"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        tensor_list = [paddle.empty([n_ele], dtype="float32") for i in range(world)]
+        return lambda: dist.all_gather(tensor_list, data, sync_op=config["sync_op"])
+    if config["is_tensor"] is True:
+        tensor = paddle.empty([n_ele * world], dtype="float32")
+        return lambda: dist.stream.all_gather(tensor, data, **stream_kwargs(config))
+    tensor_list = [paddle.empty([n_ele], dtype="float32") for i in range(world)]
+    return lambda: dist.stream.all_gather(tensor_list, data, **stream_kwargs(config))
+
+
+def reduce_scatter_case(config, n_ele, world, rank):
+    """reduce_scatter"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+        return lambda: dist.reduce_scatter(data, tensor_list, sync_op=config["sync_op"])
+    if config["is_tensor"] is True:
+        tensor = paddle.zeros([n_ele * world], dtype="float32")
+        return lambda: dist.stream.reduce_scatter(data, tensor, **stream_kwargs(config))
+    tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+    return lambda: dist.stream.reduce_scatter(data, tensor_list, **stream_kwargs(config))
+
+
+def scatter_case(config, n_ele, world, rank):
+    """scatter"""
+    data = paddle.full([n_ele], 0 if rank == 0 else 1, dtype="float32")
+    if config["is_legacy"] is True:
+        tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+        return lambda: dist.scatter(data, tensor_list, src=1)
+    if config["is_tensor"] is True:
+        tensor = paddle.zeros([n_ele * world], dtype="float32")
+        return lambda: dist.stream.scatter(data, tensor, src=1, **stream_kwargs(config))
+    tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+    return lambda: dist.stream.scatter(data, tensor_list, src=1, **stream_kwargs(config))
+
+
+def alltoall_case(config, n_ele, world, rank):
+    """alltoall"""
+    if config["is_legacy"] is True:
+        tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+        out_tensor_list = []
+        return lambda: dist.alltoall(tensor_list, out_tensor_list, sync_op=config["sync_op"])
+    if config["is_tensor"] is True:
+        tensor = paddle.zeros([n_ele * world], dtype="float32")
+        out_tensor = paddle.empty([n_ele * world], dtype="float32")
+        return lambda: dist.stream.alltoall(out_tensor, tensor, **stream_kwargs(config))
+    tensor_list = [paddle.zeros([n_ele], dtype="float32") for i in range(world)]
+    out_tensor_list = []
+    return lambda: dist.stream.alltoall(out_tensor_list, tensor_list, **stream_kwargs(config))
+
+
+def alltoall_single_case(config, n_ele, world, rank):
+    """alltoall_single"""
+    if config["is_split"] is False:
+        data = paddle.zeros([n_ele * world], dtype="float32")
+        output = paddle.empty([n_ele * world], dtype="float32")
+        if config["is_legacy"] is True:
+            return lambda: dist.alltoall_single(data, output, sync_op=config["sync_op"])
+        return lambda: dist.stream.alltoall_single(output, data, **stream_kwargs(config))
+
+    in_split_sizes = [i + 1 for i in range(world)]
+    out_split_sizes = [rank + 1 for i in range(world)]
+    data = paddle.full([sum(in_split_sizes), n_ele], rank, dtype="float32")
+    output = paddle.empty([(rank + 1) * world, n_ele], dtype="float32")
+    if config["is_legacy"] is True:
+        return lambda: dist.alltoall_single(data, output, in_split_sizes, out_split_sizes, sync_op=config["sync_op"])
+    return lambda: dist.stream.alltoall_single(output, data, out_split_sizes, in_split_sizes, **stream_kwargs(config))
+
+
+def send_recv_case(config, n_ele, world, rank):
+    """send_recv, 偶数 rank 发送给下一个 rank"""
+    data = paddle.full([n_ele], rank % 2, dtype="float32")
+    api = dist if config["is_legacy"] is True else dist.stream
+    kwargs = {"sync_op": config["sync_op"]} if config["is_legacy"] is True else stream_kwargs(config)
+    if rank % 2 == 0 and rank + 1 >= world:
+        # world_size 为奇数时最后一个 rank 无对端
+        return lambda: None
+    if rank % 2 == 0:
+        return lambda: api.send(data, dst=rank + 1, **kwargs)
+    return lambda: api.recv(data, src=rank - 1, **kwargs)
+
+
+CASES = {
+    "all_reduce": all_reduce_case,
+    "broadcast": broadcast_case,
+    "reduce": reduce_case,
+    "all_gather": all_gather_case,
+    "reduce_scatter": reduce_scatter_case,
+    "scatter": scatter_case,
+    "alltoall": alltoall_case,
+    "alltoall_single": alltoall_single_case,
+    "send_recv": send_recv_case,
+}
+
+
+def synchronize():
+    """等待设备上的计算完成, CPU 上为同步执行"""
+    if paddle.get_device().startswith("gpu"):
+        paddle.device.cuda.synchronize()
+
+
+def bench(fn, warms, epochs, repeats):
+    """
+    进程内重复计时
+    Returns:
+        list of average seconds per call, one for each repeat
+    """
+    for i in range(warms):
+        fn()
+    synchronize()
+    costs = []
+    for r in range(repeats):
+        dist.barrier()
+        start = time.perf_counter()
+        for i in range(epochs):
+            fn()
+        synchronize()
+        costs.append((time.perf_counter() - start) / epochs)
+    return costs
+
+
+def init_env(backend):
+    """init parallel env, gloo 时使用 CPU"""
+    if backend == "gloo":
+        paddle.set_device("cpu")
+        os.environ["PADDLE_DISTRI_BACKEND"] = "gloo"
+    dist.init_parallel_env()
+
+
+def get_res(api, case_name, config, args):
+    """
+    Returns:
+        {case_name: {size: {"bytes", "costs", "time", "time_min", "algbw", "busbw"}}}, time 为各次重复的均值
+    """
+    world = dist.get_world_size()
+    rank = dist.get_rank()
+    factor = BUS_FACTOR[api](world)
+    sizes = size_list(parse_size(args.begin), parse_size(args.end), args.factor)
+
+    time_list = {case_name: {}}
+    if rank == 0:
+        print("# {} world_size: {} backend: {}".format(case_name, world, args.backend))
+        print(
+            "# {:>12} {:>12} {:>8} {:>12} {:>12} {:>10} {:>10}".format(
+                "size(B)", "count", "type", "time(us)", "min(us)", "algbw", "busbw"
+            )
+        )
+    for b in sizes:
+        # 与 base_value.json 一致: 每个 rank 的 payload 为 b / world
+        n_ele = max(b // 4 // world, 1)
+        fn = CASES[api](config, n_ele, world, rank)
+        costs = bench(fn, args.warms, args.epochs, args.repeats)
+        cost = sum(costs) / len(costs)
+        algbw = b / 1_000_000_000 / cost
+        time_list[case_name][size_name(b)] = {
+            "bytes": b,
+            "costs": costs,
+            "time": cost,
+            "time_min": min(costs),
+            "algbw": algbw,
+            "busbw": algbw * factor,
+        }
+        if rank == 0:
+            print(
+                "  {:>12} {:>12} {:>8} {:>12.2f} {:>12.2f} {:>10.2f} {:>10.2f}".format(
+                    b, n_ele, "float32", cost * 1e6, min(costs) * 1e6, algbw, algbw * factor
+                )
+            )
+        del fn
+    return time_list
+
+
+def write_record(result_dir, api, case_name, res, backend):
+    """
+    每个 rank 写一个 json 记录: {result_dir}/{case_name}.rank{rank}.json
+    """
+    os.makedirs(result_dir, exist_ok=True)
+    rank = dist.get_rank()
+    record = {
+        "api": api,
+        "case": case_name,
+        "rank": rank,
+        "world_size": dist.get_world_size(),
+        "backend": backend,
+        "bus_factor": BUS_FACTOR[api](dist.get_world_size()),
+        "sizes": res[case_name],
+    }
+    path = os.path.join(result_dir, "{}.rank{}.json".format(case_name, rank))
+    with open(path + ".tmp", "w") as f:
+        json.dump(record, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def parse_args():
+    """parse_args"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--case_name", default=None, help="case in config.yaml, default the first case of api")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--backend", default=os.environ.get("BENCH_BACKEND", "nccl"), choices=["nccl", "gloo"])
+    parser.add_argument("--begin", default=os.environ.get("BENCH_BEGIN", "1K"), help="min message size, e.g. 1K")
+    parser.add_argument("--end", default=os.environ.get("BENCH_END", "128M"), help="max message size, e.g. 128M")
+    parser.add_argument("--factor", type=int, default=2, help="size multiplication factor")
+    parser.add_argument("--warms", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=20, help="calls per timed repeat")
+    parser.add_argument("--repeats", type=int, default=int(os.environ.get("BENCH_REPEATS", "10")))
+    parser.add_argument("--result_dir", default=os.environ.get("BENCH_RESULT_DIR", "results"), help="per-rank json")
+    return parser.parse_args()
+
+
+def main(api):
+    """main"""
+    args = parse_args()
+    with open(args.config, "rb") as f:
+        yaml_config = yaml.load(f, Loader=yaml.FullLoader)[api]
+    case_name = args.case_name or list(yaml_config.keys())[0]
+    if args.backend == "gloo" and api in GLOO_UNSUPPORTED:
+        print("{} is not supported by gloo, skip {}".format(api, case_name))
+        return None
+
+    print(yaml_config[case_name])
+    init_env(args.backend)
+    res = get_res(api, case_name, yaml_config[case_name], args)
+    write_record(args.result_dir, api, case_name, res, args.backend)
+    return res
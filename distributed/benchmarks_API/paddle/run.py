@@ -2,9 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 run.py
+
+每个 case 启动一次 paddle.distributed.launch, 各 rank 将结果写入 results/{case}.rank{rank}.json,
+汇总各 size 的均值/标准差/跨 rank 偏差, 与 base_value.json 中 backend 与 world_size 一致的 base 对比, 最终写一份报告.
+没有一致的 base 时记为 no_base, 不与其他配置(如 8 卡 nccl)的 base 对比.
 """
-import subprocess
 import os
+import sys
+import glob
+import json
+import math
+import shutil
+import subprocess
 
 import yaml
 
@@ -19,149 +28,247 @@ api_list = [
     "reduce_scatter",
     "scatter",
 ]
-loops = 10
-
-
-def get_average(file_loops, case):
-    """average"""
-    counters = {}
-    averages = {}
-
-    f = open(file_loops, encoding="utf-8")
-    lines = f.readlines()
-    for line in lines:
-        if "'" + case + "'" in line:
-            for key, value in eval(line).items():
-                for num, item in value.items():
-                    if num not in counters:
-                        counters[num] = {"time": 1, "algbw": 1}
-                        averages[num] = {"time": item["time"], "algbw": item["algbw"]}
-                    else:
-                        counters[num]["time"] += 1
-                        counters[num]["algbw"] += 1
-                        averages[num]["time"] += item["time"]
-                        averages[num]["algbw"] += item["algbw"]
-
-    # 计算每个数字对应的平均值
-    for key, value in counters.items():
-        averages[key]["time"] /= counters[key]["time"]
-        averages[key]["algbw"] /= counters[key]["algbw"]
-
-    # 关闭文件
-    f.close()
-    avg_res = {case: averages}
-
-    # 写入文件，存档
-    with open("mylog/log_avg", "a", encoding="utf8") as f:
-        f.write(str(avg_res) + "\n")
-        f.flush()
-
-    os.system("rm -rf ./log")
-    return avg_res
-
-
-def compare(case, res_dict):
-    """compare"""
-    f = open("./base_value", encoding="utf-8")
-    lines = f.readlines()
-    for line in lines:
-        if line.find("'" + case + "'") != -1:
-            base_dict = eval(line.strip("\n"))
-
-    diff_dict = {}
-    diff_exp = {}
-    for key, value in res_dict.items():
-        for num, item in value.items():
-            time_diff = round((item["time"] - base_dict[key][num]["time"]) / base_dict[key][num]["time"] * 100, 2)
-            algbw_diff = round((item["algbw"] - base_dict[key][num]["algbw"]) / base_dict[key][num]["algbw"] * 100, 2)
-            diff_dict[num] = {"time": str(time_diff) + "%", "algbw": str(algbw_diff) + "%"}
-            if time_diff > 5 or algbw_diff < -5:
-                diff_exp[num] = {"time": str(time_diff) + "%", "algbw": str(algbw_diff) + "%"}
-
-    diff_res = {case: diff_dict}
-    if len(diff_exp) != 0:
-        diff_exp_res = {case: diff_exp}
-        with open("mylog/log_exp", "a", encoding="utf8") as f:
-            f.write(str(diff_exp_res) + "\n")
-            f.flush()
-        os.system("echo ============================= log_exp ================================")
-        os.system("cat mylog/log_exp")
-        os.system("echo ============================= log end ================================")
-        exit(-1)
-
-    # 写入文件，存档
-    with open("mylog/log_diff", "a", encoding="utf8") as f:
-        f.write(str(diff_res) + "\n")
-        f.flush()
-
-    return diff_res
-
-
-def gather_dict(case):
-    """gather_dict"""
-    all_dict = {}
-    f_dict = {"base": "./base_value", "avg": "./mylog/log_avg", "diff": "./mylog/log_diff"}
-
-    for key, value in f_dict.items():
-        f = open(value, encoding="utf-8")
-        lines = f.readlines()
-        for line in lines:
-            if line.find("'" + case + "'") != -1:
-                all_dict[key] = eval(line.strip("\n"))[case]
-                for num, item in all_dict[key].items():
-                    all_dict[key][num]["time_" + key] = all_dict[key][num].pop("time")
-                    all_dict[key][num]["algbw_" + key] = all_dict[key][num].pop("algbw")
-    f.close()
-    # print(all_dict)
-
-    res_dict = {}
-    for key, value in all_dict.items():
-        for num, item in value.items():
-            if num not in res_dict.keys():
-                res_dict[num] = {
-                    "time_avg": 0,
-                    "time_base": 0,
-                    "time_diff": 0,
-                    "algbw_avg": 0,
-                    "algbw_base": 0,
-                    "algbw_diff": 0,
-                }
-            for key_item, value_item in item.items():
-                res_dict[num][key_item] = value_item
-    result = {case: res_dict}
-
-    # 写入文件，存档
-    with open("mylog/log_result", "a", encoding="utf8") as f:
-        f.write(str(result) + "\n")
-        f.flush()
-
-    return result
+# 重复在各 api 进程内完成(collective_bench --repeats), 每个 case 只启动一次
+repeats = int(os.environ.get("BENCH_REPEATS", "10"))
+backend = os.environ.get("BENCH_BACKEND", "nccl")
+# gloo 在 CPU 上按进程数启动
+launch_args = (
+    "--devices=0,1,2,3,4,5,6,7" if backend == "nccl" else "--nproc_per_node=" + os.environ.get("BENCH_NPROC", "2")
+)
+result_dir = os.environ.get("BENCH_RESULT_DIR", "results")
+baseline_file = os.environ.get("BENCH_BASELINE", "base_value.json")
+baseline_version = os.environ.get("BENCH_BASELINE_VERSION", None)
+report_dir = "mylog"
+
+
+def run_case(api, case):
+    """启动一个 case, 返回 launch 的退出码"""
+    cmd = "python -m paddle.distributed.launch --log_dir={}/{} {} {}.py".format(report_dir, case, launch_args, api)
+    cmd += " --case_name {} --backend {} --repeats {} --result_dir {}".format(case, backend, repeats, result_dir)
+    print(cmd)
+    pro = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    out, _ = pro.communicate()
+    print(out)
+    return pro.returncode
+
+
+def load_records(case):
+    """读取 case 的所有 rank 记录"""
+    records = []
+    for path in sorted(glob.glob(os.path.join(result_dir, "{}.rank*.json".format(case)))):
+        with open(path, encoding="utf-8") as f:
+            records.append(json.load(f))
+    return records
+
+
+def mean_std(values):
+    """mean, stddev"""
+    mean = sum(values) / len(values)
+    std = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+    return mean, std
+
+
+def aggregate(records):
+    """
+    汇总各 rank 的记录
+    Returns:
+        {size: {"time", "time_std", "time_min", "skew", "algbw", "busbw", "ranks"}}
+        time 为所有 rank 所有重复的均值, skew 为 (最慢 rank 均值 - 最快 rank 均值) / time
+    """
+    res = {}
+    if not records:
+        return res
+    bus_factor = records[0]["bus_factor"]
+    for num in records[0]["sizes"]:
+        rank_means = []
+        costs = []
+        for record in records:
+            item = record["sizes"].get(num)
+            if item is None:
+                continue
+            costs.extend(item["costs"])
+            rank_means.append(sum(item["costs"]) / len(item["costs"]))
+        cost, std = mean_std(costs)
+        algbw = records[0]["sizes"][num]["bytes"] / 1_000_000_000 / cost
+        res[num] = {
+            "time": cost,
+            "time_std": std,
+            "time_min": min(costs),
+            "skew": (max(rank_means) - min(rank_means)) / cost,
+            "algbw": algbw,
+            "busbw": algbw * bus_factor,
+            "ranks": len(rank_means),
+        }
+    return res
+
+
+def load_baseline(path):
+    """
+    读取 base_value.json
+    Returns:
+        {"latest": version, "versions": {version: {"backend", "world_size", "threshold", "cases"}}}
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def select_baseline(base, backend, world_size, version=None):
+    """
+    选择 backend 与 world_size 一致的 base 版本, 未指定 version 时优先 latest, 其次最后一个一致的版本
+    Returns:
+        version, {"threshold": {...}, "cases": {case: {size: {"time", "algbw"}}}}; 没有一致的版本时为 None, None
+    """
+    versions = base["versions"]
+    if version is not None:
+        candidates = [version] if version in versions else []
+    else:
+        candidates = [base["latest"]] + list(reversed(list(versions)))
+    for name in candidates:
+        item = versions.get(name)
+        if item is not None and item.get("backend") == backend and item.get("world_size") == world_size:
+            return name, item
+    return None, None
+
+
+def get_threshold(baseline):
+    """阈值, 环境变量 BENCH_TH_TIME/BENCH_TH_ALGBW/BENCH_TH_SKEW 优先"""
+    threshold = dict(baseline.get("threshold", {}))
+    for key, default in (("time", 0.05), ("algbw", 0.05), ("skew", 0.2)):
+        env = os.environ.get("BENCH_TH_" + key.upper())
+        threshold[key] = float(env) if env is not None else threshold.get(key, default)
+    return threshold
+
+
+def compare(case, agg, base_case, threshold):
+    """
+    与 base 对比, diff 为相对变化
+    Returns:
+        {size: {"time_diff", "algbw_diff", "status"}}, status: pass/regression/no_base
+    """
+    diff = {}
+    for num, item in agg.items():
+        base = base_case.get(num)
+        if base is None:
+            diff[num] = {"status": "no_base"}
+            continue
+        time_diff = (item["time"] - base["time"]) / base["time"]
+        algbw_diff = (item["algbw"] - base["algbw"]) / base["algbw"]
+        reasons = []
+        if time_diff > threshold["time"]:
+            reasons.append("time")
+        if algbw_diff < -threshold["algbw"]:
+            reasons.append("algbw")
+        if item["skew"] > threshold["skew"]:
+            reasons.append("skew")
+        diff[num] = {
+            "time_base": base["time"],
+            "algbw_base": base["algbw"],
+            "time_diff": time_diff,
+            "algbw_diff": algbw_diff,
+            "status": "regression" if reasons else "pass",
+            "reasons": reasons,
+        }
+    return diff
+
+
+def write_report(report):
+    """写 mylog/report.json 与 mylog/report.txt"""
+    with open(os.path.join(report_dir, "report.json"), "w", encoding="utf8") as f:
+        json.dump(report, f, indent=2)
+
+    lines = [
+        "backend: {}  baseline version: {}  threshold: {}".format(
+            report["backend"], report["baseline_version"], report["threshold"]
+        )
+    ]
+    lines.append(
+        "{:<45} {:>6} {:>12} {:>10} {:>8} {:>10} {:>10} {:>9} {:>9}  {}".format(
+            "case", "size", "time(us)", "std(us)", "skew", "algbw", "busbw", "time%", "algbw%", "status"
+        )
+    )
+    for case, info in report["cases"].items():
+        if info["status"] in ("failed", "skipped"):
+            lines.append("{:<45} {}".format(case, info["status"]))
+            continue
+        if info["baseline_version"] is None:
+            lines.append("{:<45} no baseline for world_size {}".format(case, info["world_size"]))
+        for num, item in info["sizes"].items():
+            d = info["diff"][num]
+            lines.append(
+                "{:<45} {:>6} {:>12.2f} {:>10.2f} {:>8.3f} {:>10.2f} {:>10.2f} {:>9} {:>9}  {}".format(
+                    case,
+                    num,
+                    item["time"] * 1e6,
+                    item["time_std"] * 1e6,
+                    item["skew"],
+                    item["algbw"],
+                    item["busbw"],
+                    "{:.2f}".format(d["time_diff"] * 100) if "time_diff" in d else "-",
+                    "{:.2f}".format(d["algbw_diff"] * 100) if "algbw_diff" in d else "-",
+                    d["status"] + ("({})".format(",".join(d["reasons"])) if d.get("reasons") else ""),
+                )
+            )
+    lines.append("regression: {}  failed: {}".format(len(report["regression"]), len(report["failed"])))
+    text = "\n".join(lines) + "\n"
+    with open(os.path.join(report_dir, "report.txt"), "w", encoding="utf8") as f:
+        f.write(text)
+    print(text)
 
 
 def main():
     """main"""
-    f = open("config.yaml", "rb")
-    yaml_config = yaml.load(f, Loader=yaml.FullLoader)
+    with open("config.yaml", "rb") as f:
+        yaml_config = yaml.load(f, Loader=yaml.FullLoader)
+    base = load_baseline(baseline_file)
 
+    report = {
+        "backend": backend,
+        "baseline_version": baseline_version or "latest",
+        "threshold": get_threshold({}),
+        "cases": {},
+        "regression": [],
+        "failed": [],
+    }
     for key, value in yaml_config.items():
-        if key in api_list:
-            for case in value.keys():
-                cmd = "python -m paddle.distributed.launch --devices=0,1,2,3,4,5,6,7 " + key + ".py --case_name " + case
-                print(cmd)
-                for i in range(loops):
-                    pro = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    out, err = pro.communicate()
-                    print(out)
-                    pro.wait()
-                    pro.returncode == 0
-                # 求均值，写入文件mylog/log_avg
-                avg_res = get_average("./log/workerlog.0", case)
-                # 求diff，写入文件mylog/log_diff
-                compare(case, avg_res)
-                # 得出汇总结果，写入mylog/log_result
-                gather_dict(case)
+        if key not in api_list:
+            continue
+        for case in value.keys():
+            returncode = run_case(key, case)
+            records = load_records(case)
+            if not records:
+                # gloo 不支持的 api 正常退出且无记录
+                status = "failed" if returncode != 0 else "skipped"
+                report["cases"][case] = {"api": key, "status": status}
+                if status == "failed":
+                    report["failed"].append(case)
+                continue
+            agg = aggregate(records)
+            world_size = records[0]["world_size"]
+            version, baseline = select_baseline(base, backend, world_size, baseline_version)
+            if baseline is None:
+                print("no baseline for {} with backend {} world_size {}".format(case, backend, world_size))
+                baseline = {"cases": {}}
+            diff = compare(case, agg, baseline["cases"].get(case, {}), get_threshold(baseline))
+            regression = [num for num, d in diff.items() if d["status"] == "regression"]
+            report["cases"][case] = {
+                "api": key,
+                "status": "regression" if regression else "pass",
+                "world_size": world_size,
+                "baseline_version": version,
+                "sizes": agg,
+                "diff": diff,
+            }
+            if regression:
+                report["regression"].append(case)
+            if returncode != 0 or len(records) != records[0]["world_size"]:
+                report["failed"].append(case)
+
+    write_report(report)
+    return 1 if report["regression"] or report["failed"] else 0
 
 
 if __name__ == "__main__":
-    os.system("rm -rf mylog && mkdir -p mylog")
-    main()
+    shutil.rmtree(report_dir, ignore_errors=True)
+    shutil.rmtree(result_dir, ignore_errors=True)
+    os.makedirs(report_dir)
+    sys.exit(main())
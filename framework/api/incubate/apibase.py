@@ -4,6 +4,8 @@
 """
   nn test base class
 """
+import os
+import sys
 from inspect import isfunction
 import copy
 import logging
@@ -12,6 +14,9 @@ import numpy as np
 import paddle
 from paddle import to_tensor
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools"))
+from log_summary import LogSummary  # noqa: E402
+
 
 class APIBase(object):
     """
@@ -143,14 +148,14 @@ class APIBase(object):
                     logging.info("dygraph forward result is :")
                     if isinstance(dygraph_forward_res, (list, tuple)):
                         compare(dygraph_forward_res, res, self.delta, self.rtol)
-                        logging.info(dygraph_forward_res)
+                        logging.info("%s", LogSummary(dygraph_forward_res))
                     else:
                         compare(dygraph_forward_res.numpy(), res, self.delta, self.rtol)
-                        logging.info(dygraph_forward_res.numpy())
+                        logging.info("%s", LogSummary(dygraph_forward_res.numpy()))
                     if self.enable_backward:
                         dygraph_backward_res = self._dygraph_backward(dygraph_forward_res)
                         logging.info("[dygraph grad]")
-                        logging.info(dygraph_backward_res)
+                        logging.info("%s", LogSummary(dygraph_backward_res))
                     paddle.enable_static()
                 if self.static:
                     # start run paddle static
@@ -158,19 +163,19 @@ class APIBase(object):
                     if self.enable_backward:
                         static_forward_res, static_backward_res = self._static_forward(res, data, **kwargs)
                         logging.info("static forward result is :")
-                        logging.info(static_forward_res)
+                        logging.info("%s", LogSummary(static_forward_res))
                         logging.info("[static grad]")
-                        logging.info(static_backward_res)
+                        logging.info("%s", LogSummary(static_backward_res))
                     else:
                         static_forward_res = self._static_forward(res, data, **kwargs)
                         logging.info("static forward result is :")
-                        logging.info(static_forward_res)
+                        logging.info("%s", LogSummary(static_forward_res))
                     compare(static_forward_res, res, self.delta, self.rtol)
                     # start run torch
                 if self.enable_backward:
                     grad = self.compute_grad(res, data, **kwargs)
                     logging.info("[numeric grad]")
-                    logging.info(grad)
+                    logging.info("%s", LogSummary(grad))
                     if self.static and self.dygraph:
                         compare_grad(
                             static_backward_res, dygraph_backward_res, mode="both", no_grad_var=self.no_grad_var
@@ -286,14 +291,14 @@ class APIBase(object):
                 logging.info("dygraph forward result is :")
                 if isinstance(dygraph_forward_res, (list, tuple)):
                     compare(dygraph_forward_res, res, self.delta, self.rtol)
-                    logging.info(dygraph_forward_res)
+                    logging.info("%s", LogSummary(dygraph_forward_res))
                 else:
                     compare(dygraph_forward_res.numpy(), res, self.delta, self.rtol)
-                    logging.info(dygraph_forward_res.numpy())
+                    logging.info("%s", LogSummary(dygraph_forward_res.numpy()))
                 if self.enable_backward:
                     dygraph_backward_res = self._dygraph_backward(dygraph_forward_res)
                     logging.info("[dygraph grad]")
-                    logging.info(dygraph_backward_res)
+                    logging.info("%s", LogSummary(dygraph_backward_res))
                 paddle.enable_static()
             if self.static:
                 # start run paddle static
@@ -301,19 +306,19 @@ class APIBase(object):
                 if self.enable_backward:
                     static_forward_res, static_backward_res = self._static_forward(res, data, **kwargs)
                     logging.info("static forward result is :")
-                    logging.info(static_forward_res)
+                    logging.info("%s", LogSummary(static_forward_res))
                     logging.info("[static grad]")
-                    logging.info(static_backward_res)
+                    logging.info("%s", LogSummary(static_backward_res))
                 else:
                     static_forward_res = self._static_forward(res, data, **kwargs)
                     logging.info("static forward result is :")
-                    logging.info(static_forward_res)
+                    logging.info("%s", LogSummary(static_forward_res))
                 compare(static_forward_res, res, self.delta, self.rtol)
                 # start run torch
             if self.enable_backward:
                 grad = self.compute_grad(res, data, **kwargs)
                 logging.info("[numeric grad]")
-                logging.info(grad)
+                logging.info("%s", LogSummary(grad))
                 if self.static and self.dygraph:
                     compare_grad(static_backward_res, dygraph_backward_res, mode="both", no_grad_var=self.no_grad_var)
                 if self.dygraph:
@@ -686,7 +691,7 @@ class APIBase(object):
                         loss = paddle.mean(output)
                         grad_var = {}
                         spec_var = {}
-                        logging.info(xyz)
+                        logging.info("%s", LogSummary(xyz))
                         for k in xyz:
                             if isinstance(params[k], (list, tuple)) and isinstance(
                                 params[k][0], (paddle.static.Variable, paddle.pir.Value)
@@ -13,19 +13,20 @@
 # limitations under the License.
 """
 parallel execute cases in paddle ci
+
+A fixed pool of worker processes imports paddle once and runs case files in-process with pytest.main,
+results of every test node are sent back over a pipe. Only failed node ids are rerun, each rerun in a
+fresh process with FLAGS_call_stack_level=2. The report is written once by the main process:
+result.txt (failed case files), result.json and result.xml (JUnit).
 """
-import re
-import time
-import queue
-import threading
 import os
-import json
 import sys
+import json
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+from xml.etree import ElementTree
 
-taskQueue = queue.Queue()
-lock = threading.RLock()
-
-failed_ce_case_list = []
 ignore_case_dir = {
     "device": [],
     "fft": [],
@@ -48,71 +49,244 @@ ignore_case_dir = {
     "saveload": [],
 }
 
+# worker processes, rerun times, cases run by one worker before it is replaced
+PROCESS_NUM = int(os.environ.get("API_CASE_PROCESS", "13"))
+RETRY_NUM = int(os.environ.get("API_CASE_RETRY", "3"))
+MAX_CASES_PER_WORKER = int(os.environ.get("API_CASE_PER_WORKER", "50"))
+
+
+class ResultCollector(object):
+    """pytest plugin, record outcome of every test node"""
+
+    def __init__(self):
+        self.results = {}
+
+    def pytest_runtest_logreport(self, report):
+        """setup/call/teardown report of a test node"""
+        res = self.results.setdefault(report.nodeid, {"outcome": "passed", "duration": 0.0, "message": ""})
+        res["duration"] += report.duration
+        if report.failed:
+            res["outcome"] = "failed"
+            res["message"] += "[{}] {}\n".format(report.when, report.longreprtext)
+        elif report.skipped and report.when == "setup":
+            res["outcome"] = "skipped"
+
+    def pytest_collectreport(self, report):
+        """collect error, e.g. case file import failed"""
+        if report.failed:
+            self.results[report.nodeid] = {"outcome": "failed", "duration": 0.0, "message": report.longreprtext}
+
+
+def run_pytest(args):
+    """
+    run pytest in current process
+    Args:
+        args (list): pytest args, case file or node ids
+    Returns:
+        dict of node id -> result
+    """
+    import pytest
+
+    collector = ResultCollector()
+    start = time.time()
+    exit_code = int(pytest.main(["-p", "no:cacheprovider"] + list(args), plugins=[collector]))
+    results = collector.results
+    # exit code without failed node, e.g. no test collected
+    if exit_code != 0 and not any(res["outcome"] == "failed" for res in results.values()):
+        results[args[0].split("::")[0]] = {
+            "outcome": "failed",
+            "duration": time.time() - start,
+            "message": "pytest exit code {}".format(exit_code),
+        }
+    return results
+
+
+def worker(path, env, conn):
+    """
+    persistent worker, receive pytest args from conn until None
+    """
+    os.chdir(path)
+    os.environ.update(env)
+    # preload paddle once for all cases of this worker
+    import paddle  # noqa: F401
 
-def worker(fun):
-    """worker"""
     while True:
-        temp = taskQueue.get()
-        fun(temp)
-        taskQueue.task_done()
-
-
-def threadPool(threadPoolNum):
-    """threadPool"""
-    threadPool = []
-    for i in range(threadPoolNum):
-        thread = threading.Thread(target=worker, args={doFun})
-        thread.daemon = True
-        threadPool.append(thread)
-    return threadPool
-
-
-def runCETest(params):
-    """runCETest"""
-    path = params[0]
-    case = params[1]
-    print("case: %s" % case)
-    val = os.system("export FLAGS_call_stack_level= && cd %s && python -m pytest %s" % (path, case))
-    retry_count = 0
-    final_result = ""
-    while val != 0:
-        val = os.system("export FLAGS_call_stack_level=2 && cd %s && python -m pytest %s" % (path, case))
-        retry_count = retry_count + 1
-        if retry_count > 2:
-            val = 0
-            final_result = "Failed"
-    if final_result == "Failed":
-        failed_ce_case_list.append(case)
-        os.system('echo "%s" >> %s/result.txt' % (case, path))
-
-
-def doFun(params):
-    """doFun"""
-    runCETest(params)
+        task = conn.recv()
+        if task is None:
+            break
+        conn.send(run_pytest(task))
+    conn.close()
+
+
+class CasePool(object):
+    """process pool of pytest workers, one pipe per worker"""
+
+    def __init__(self, path, process_num, env, max_cases):
+        """
+        Args:
+            path (str): case dir, cwd of workers
+            process_num (int): worker number
+            env (dict): extra environment of workers
+            max_cases (int): cases run by one worker before it is replaced
+        """
+        self.path = path
+        self.process_num = process_num
+        self.env = env
+        self.max_cases = max_cases
+        self.ctx = multiprocessing.get_context("spawn")
+
+    def _start_worker(self):
+        """start a worker, return [process, conn, case, done cases]"""
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=worker, args=(self.path, self.env, child_conn))
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        return [process, parent_conn, None, 0]
+
+    @staticmethod
+    def _stop_worker(item):
+        """stop a worker"""
+        process, conn = item[0], item[1]
+        try:
+            conn.send(None)
+        except (OSError, EOFError):
+            pass
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+
+    def run(self, tasks):
+        """
+        Args:
+            tasks (list): [(case file, pytest args)]
+        Returns:
+            dict of case file -> {node id -> result}
+        """
+        tasks = list(tasks)
+        results = {}
+        workers = [self._start_worker() for _ in range(min(self.process_num, len(tasks)))]
+        pending = list(reversed(tasks))
+        while workers:
+            for item in list(workers):
+                if item[2] is None:
+                    if pending and item[3] >= self.max_cases:
+                        self._stop_worker(item)
+                        workers[workers.index(item)] = item = self._start_worker()
+                    if not pending:
+                        self._stop_worker(item)
+                        workers.remove(item)
+                        continue
+                    item[2] = pending.pop()
+                    print("case: %s" % item[2][0])
+                    item[1].send(item[2][1])
+            if not workers:
+                break
+            ready = wait([item[1] for item in workers] + [item[0].sentinel for item in workers])
+            for item in list(workers):
+                if item[1] in ready:
+                    try:
+                        results[item[2][0]] = item[1].recv()
+                        item[2] = None
+                        item[3] += 1
+                        continue
+                    except (EOFError, OSError):
+                        pass
+                elif item[0].sentinel not in ready:
+                    continue
+                # worker exit while running a case, e.g. segmentation fault
+                item[0].join()
+                case = item[2][0]
+                results[case] = {
+                    case: {
+                        "outcome": "failed",
+                        "duration": 0.0,
+                        "message": "worker exit with code {} while running {}".format(item[0].exitcode, item[2][1]),
+                    }
+                }
+                item[1].close()
+                workers[workers.index(item)] = self._start_worker()
+        return results
+
+
+def failed_nodes(case_result):
+    """failed node ids of a case file"""
+    return [node for node, res in case_result.items() if res["outcome"] == "failed"]
+
+
+def write_report(path, results):
+    """
+    write result.txt, result.json and result.xml
+    Returns:
+        list of failed case files
+    """
+    failed_case_list = sorted(case for case, case_result in results.items() if failed_nodes(case_result))
+    with open(os.path.join(path, "result.txt"), "a") as f:
+        f.write("============ failed cases =============\n")
+        for case in failed_case_list:
+            f.write("%s\n" % case)
+        f.write("total bugs: %s\n" % len(failed_case_list))
+    with open(os.path.join(path, "result.json"), "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    suites = ElementTree.Element("testsuites")
+    for case in sorted(results):
+        case_result = results[case]
+        suite = ElementTree.SubElement(
+            suites,
+            "testsuite",
+            name=case,
+            tests=str(len(case_result)),
+            failures=str(len(failed_nodes(case_result))),
+            skipped=str(sum(res["outcome"] == "skipped" for res in case_result.values())),
+        )
+        for node, res in sorted(case_result.items()):
+            testcase = ElementTree.SubElement(
+                suite, "testcase", classname=case, name=node, time="{:.3f}".format(res["duration"])
+            )
+            if res["outcome"] == "failed":
+                ElementTree.SubElement(testcase, "failure", message="failed").text = res["message"]
+            elif res["outcome"] == "skipped":
+                ElementTree.SubElement(testcase, "skipped")
+    ElementTree.ElementTree(suites).write(os.path.join(path, "result.xml"), encoding="utf-8", xml_declaration=True)
+    return failed_case_list
 
 
 def main(path):
     """
     1. run case
+    2. rerun failed node ids
+    3. write report
     """
-    dirs = os.listdir(path)
     case_dir = path.split("/")[-1]
-    os.system('echo "============ failed cases =============" >> %s/result.txt' % path)
     ignore_case_list = ignore_case_dir[case_dir]
-    pool = threadPool(13)
-    for i in range(pool.__len__()):
-        pool[i].start()
-    for case in dirs:
-        if case.startswith("test") and case.endswith("py") and case not in ignore_case_list:
-            params = [path, case]
-            taskQueue.put(params)
-    taskQueue.join()
+    cases = sorted(
+        case
+        for case in os.listdir(path)
+        if case.startswith("test") and case.endswith("py") and case not in ignore_case_list
+    )
+    pool = CasePool(path, PROCESS_NUM, {"FLAGS_call_stack_level": ""}, MAX_CASES_PER_WORKER)
+    results = pool.run([(case, [case]) for case in cases])
+
+    # rerun only failed node ids, one fresh process per case file to rule out state left by other cases
+    rerun_pool = CasePool(path, PROCESS_NUM, {"FLAGS_call_stack_level": "2"}, 1)
+    for _ in range(RETRY_NUM):
+        rerun = {case: failed_nodes(case_result) for case, case_result in results.items()}
+        rerun = {case: nodes for case, nodes in rerun.items() if nodes}
+        if not rerun:
+            break
+        for case, rerun_result in rerun_pool.run(rerun.items()).items():
+            for node in rerun[case]:
+                results[case].pop(node, None)
+            results[case].update(rerun_result)
+    return write_report(path, results)
 
 
 if __name__ == "__main__":
     case_dir = sys.argv[1]
     pwd = os.getcwd()
     path = "%s/%s" % (pwd, case_dir)
-    main(path)
-    os.system('echo "total bugs: %s" >> %s/result.txt' % (len(failed_ce_case_list), path))
+    failed_ce_case_list = main(path)
     sys.exit(len(failed_ce_case_list))
@@ -4,6 +4,8 @@
 """
   nn test base class
 """
+import os
+import sys
 from inspect import isfunction
 import copy
 import logging
@@ -12,6 +14,9 @@ import numpy as np
 import paddle
 from paddle import to_tensor
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools"))
+from log_summary import LogSummary  # noqa: E402
+
 
 class APIBase(object):
     """
@@ -50,6 +55,16 @@ class APIBase(object):
         self.delta = 1e-6
         self.gap = 0.001
         self.rtol = 1e-7
+        # numeric grad: forward or central difference
+        self.grad_mode = os.environ.get("API_GRAD_MODE", "forward")
+        # stack perturbed inputs on a new axis 0 and compute them in one forward,
+        # only for apis whose output keeps axis 0 and computes each sample independently,
+        # the other inputs are not stacked and must broadcast against the new axis 0
+        self.grad_batch = False
+        self.grad_batch_size = int(os.environ.get("API_GRAD_BATCH_SIZE", "64"))
+        # inputs larger than grad_proj_size are checked by directional derivatives, 0 means never
+        self.grad_proj_size = int(os.environ.get("API_GRAD_PROJ_SIZE", "0"))
+        self.grad_proj_num = int(os.environ.get("API_GRAD_PROJ_NUM", "8"))
         # choose layertypes [functional or classional]
         self._layertypes(func)
         # run hook, use user define vars and initials
@@ -143,14 +158,14 @@ class APIBase(object):
                     logging.info("dygraph forward result is :")
                     if isinstance(dygraph_forward_res, (list, tuple)):
                         compare(dygraph_forward_res, res, self.delta, self.rtol)
-                        logging.info(dygraph_forward_res)
+                        logging.info("%s", LogSummary(dygraph_forward_res))
                     else:
                         compare(dygraph_forward_res.numpy(), res, self.delta, self.rtol)
-                        logging.info(dygraph_forward_res.numpy())
+                        logging.info("%s", LogSummary(dygraph_forward_res.numpy()))
                     if self.enable_backward:
                         dygraph_backward_res = self._dygraph_backward(dygraph_forward_res)
                         logging.info("[dygraph grad]")
-                        logging.info(dygraph_backward_res)
+                        logging.info("%s", LogSummary(dygraph_backward_res))
                     paddle.enable_static()
                 if self.static:
                     # start run paddle static
@@ -158,19 +173,19 @@ class APIBase(object):
                     if self.enable_backward:
                         static_forward_res, static_backward_res = self._static_forward(res, data, **kwargs)
                         logging.info("static forward result is :")
-                        logging.info(static_forward_res)
+                        logging.info("%s", LogSummary(static_forward_res))
                         logging.info("[static grad]")
-                        logging.info(static_backward_res)
+                        logging.info("%s", LogSummary(static_backward_res))
                     else:
                         static_forward_res = self._static_forward(res, data, **kwargs)
                         logging.info("static forward result is :")
-                        logging.info(static_forward_res)
+                        logging.info("%s", LogSummary(static_forward_res))
                     compare(static_forward_res, res, self.delta, self.rtol)
                     # start run torch
                 if self.enable_backward:
                     grad = self.compute_grad(res, data, **kwargs)
                     logging.info("[numeric grad]")
-                    logging.info(grad)
+                    logging.info("%s", LogSummary(grad))
                     if self.static and self.dygraph:
                         compare_grad(
                             static_backward_res, dygraph_backward_res, mode="both", no_grad_var=self.no_grad_var
@@ -286,14 +301,14 @@ class APIBase(object):
                 logging.info("dygraph forward result is :")
                 if isinstance(dygraph_forward_res, (list, tuple)):
                     compare(dygraph_forward_res, res, self.delta, self.rtol)
-                    logging.info(dygraph_forward_res)
+                    logging.info("%s", LogSummary(dygraph_forward_res))
                 else:
                     compare(dygraph_forward_res.numpy(), res, self.delta, self.rtol)
-                    logging.info(dygraph_forward_res.numpy())
+                    logging.info("%s", LogSummary(dygraph_forward_res.numpy()))
                 if self.enable_backward:
                     dygraph_backward_res = self._dygraph_backward(dygraph_forward_res)
                     logging.info("[dygraph grad]")
-                    logging.info(dygraph_backward_res)
+                    logging.info("%s", LogSummary(dygraph_backward_res))
                 paddle.enable_static()
             if self.static:
                 # start run paddle static
@@ -301,19 +316,19 @@ class APIBase(object):
                 if self.enable_backward:
                     static_forward_res, static_backward_res = self._static_forward(res, data, **kwargs)
                     logging.info("static forward result is :")
-                    logging.info(static_forward_res)
+                    logging.info("%s", LogSummary(static_forward_res))
                     logging.info("[static grad]")
-                    logging.info(static_backward_res)
+                    logging.info("%s", LogSummary(static_backward_res))
                 else:
                     static_forward_res = self._static_forward(res, data, **kwargs)
                     logging.info("static forward result is :")
-                    logging.info(static_forward_res)
+                    logging.info("%s", LogSummary(static_forward_res))
                 compare(static_forward_res, res, self.delta, self.rtol)
                 # start run torch
             if self.enable_backward:
                 grad = self.compute_grad(res, data, **kwargs)
                 logging.info("[numeric grad]")
-                logging.info(grad)
+                logging.info("%s", LogSummary(grad))
                 if self.static and self.dygraph:
                     compare_grad(static_backward_res, dygraph_backward_res, mode="both", no_grad_var=self.no_grad_var)
                 if self.dygraph:
@@ -474,6 +489,8 @@ class APIBase(object):
         self._check_params(res, data, **kwargs)
         loss = self._numeric_grad()
         self.kwargs = copy.deepcopy(kwargs)
+        # whether the batched forward of each input matches per-sample forwards
+        self._batch_valid = {}
         numeric_grad = {}
         for k, v in self.kwargs.items():
             if isinstance(v, (np.generic, np.ndarray)):
@@ -488,46 +505,153 @@ class APIBase(object):
         if data is None:
             for k, v in self.kwargs.items():
                 if isinstance(v, paddle.Tensor) and k not in self.no_grad_var:
-                    grad = []
-                    shape = v.numpy().shape
-                    for i in range(len(v.numpy().flatten())):
-                        tmp = v.numpy().flatten()
-                        tmp[i] = tmp[i] + self.gap
-                        tmp = tmp.reshape(shape)
-                        # print(tmp)
-                        self.kwargs[k] = to_tensor(tmp.astype(self.dtype))
-                        # enable compute gradient
-                        if self.enable_backward is True:
-                            self.kwargs[k].stop_gradient = False
-                        loss_delta = self._numeric_grad()
-                        g = (loss_delta - loss) / self.gap
-                        # print("-----> {}".format(g))
-                        grad.append(g.item())
-                        # recover v to self.kwargs
-                        self.kwargs[k] = v
-                    numeric_grad[k] = np.array(grad).reshape(shape)
+                    numeric_grad[k] = self._perturb_grad(k, v.numpy(), loss)
+                    # recover v to self.kwargs
+                    self.kwargs[k] = v
         else:
             # change data to correct dtype
             data = data.astype(self.dtype)
-            grad = []
-            shape = data.shape
-            for i in range(len(data.flatten())):
-                tmp = copy.deepcopy(data.flatten())
-                tmp[i] = tmp[i] + self.gap
-                tmp = tmp.reshape(shape)
-                self.data = to_tensor(tmp.astype(self.dtype))
-                # enable compute gradient
-                if self.enable_backward is True:
-                    self.data.stop_gradient = False
-                loss_delta = self._numeric_grad()
-                g = (loss_delta - loss) / self.gap
-                grad.append(g.item())
-                # recover v to self.kwargs
-                self.data = data
-            numeric_grad["data"] = np.array(grad).reshape(shape)
+            numeric_grad["data"] = self._perturb_grad(None, data, loss)
+            # recover v to self.kwargs
+            self.data = data
         paddle.enable_static()
         return numeric_grad
 
+    def _perturb_grad(self, k, base, loss):
+        """numeric grad of one input
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            base ([numpy]): input value
+            loss ([numpy]): loss of unperturbed inputs, used by forward difference
+
+        Returns:
+            numpy array with the shape of base, or ProjectedGrad when base has more than grad_proj_size elements
+        """
+        if 0 < self.grad_proj_size < base.size:
+            rng = np.random.RandomState(self.seed)
+            directions = (rng.randint(0, 2, size=(self.grad_proj_num, base.size)) * 2 - 1).astype(np.int8)
+            return ProjectedGrad(directions, self._directional_diff(k, base, directions, loss))
+        return self._directional_diff(k, base, None, loss).reshape(base.shape)
+
+    def _directional_diff(self, k, base, directions, loss):
+        """finite difference along each direction, perturbed inputs are written into one preallocated buffer
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            base ([numpy]): input value
+            directions ([numpy], optional): [num, base.size] ±1 directions, None means each element in turn
+            loss ([numpy]): loss of unperturbed inputs, used by forward difference
+
+        Returns:
+            float64 array of directional derivatives
+        """
+        flat = base.reshape(-1)
+        num = flat.size if directions is None else len(directions)
+        batch = max(self.grad_batch_size, 1) if self.grad_batch else 1
+        steps = [self.gap, -self.gap] if self.grad_mode == "central" else [self.gap]
+        buf = np.empty((min(batch, num), flat.size), dtype=base.dtype)
+        grad = np.empty(num, dtype=np.float64)
+        for start in range(0, num, batch):
+            end = min(start + batch, num)
+            rows = buf[: end - start]
+            losses = []
+            for step in steps:
+                rows[:] = flat
+                if directions is None:
+                    rows[np.arange(end - start), np.arange(start, end)] += step
+                else:
+                    rows += (directions[start:end] * step).astype(base.dtype)
+                losses.append(self._batch_loss(k, rows, base.shape))
+            if self.grad_mode == "central":
+                grad[start:end] = (losses[0] - losses[1]) / (2 * self.gap)
+            else:
+                grad[start:end] = (losses[0] - np.float64(loss)) / self.gap
+        return grad
+
+    def _batch_loss(self, k, rows, shape):
+        """loss of each perturbed input
+
+        The batched forward stacks only the perturbed input, so the other inputs must broadcast against axis 0.
+        The first batch of each input is checked against per-sample forwards, on mismatch the input falls back
+        to per-sample forwards.
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            rows ([numpy]): [n, size] perturbed inputs
+            shape (tuple): input shape
+
+        Returns:
+            float64 array of n losses
+        """
+        if self.grad_batch and self._batch_valid.get(k, True):
+            if k in self._batch_valid:
+                return self._stacked_loss(k, rows, shape)
+            index = [0, len(rows) - 1]
+            try:
+                losses = self._stacked_loss(k, rows, shape)
+                valid = losses.shape == (len(rows),) and np.allclose(
+                    losses[index], self._sample_loss(k, rows[index], shape), rtol=1e-5, atol=1e-6
+                )
+            except Exception as e:
+                logging.info("[grad] batched forward failed: {}".format(e))
+                valid = False
+            self._batch_valid[k] = valid
+            if valid:
+                return losses
+            logging.warning(
+                "[grad] batched forward of {} does not match per-sample forward, "
+                "fall back to per-sample".format("data" if k is None else k)
+            )
+        return self._sample_loss(k, rows, shape)
+
+    def _stacked_loss(self, k, rows, shape):
+        """loss of perturbed inputs stacked on a new axis 0, computed in one forward
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            rows ([numpy]): [n, size] perturbed inputs
+            shape (tuple): input shape
+
+        Returns:
+            float64 array of losses
+        """
+        self._set_grad_input(k, rows.reshape((len(rows),) + tuple(shape)))
+        return self._numeric_grad_batch().astype(np.float64)
+
+    def _sample_loss(self, k, rows, shape):
+        """loss of each perturbed input, one forward per input
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            rows ([numpy]): [n, size] perturbed inputs
+            shape (tuple): input shape
+
+        Returns:
+            float64 array of n losses
+        """
+        losses = []
+        for row in rows:
+            self._set_grad_input(k, row.reshape(shape))
+            losses.append(self._numeric_grad())
+        return np.array(losses, dtype=np.float64).reshape(-1)
+
+    def _set_grad_input(self, k, value):
+        """set perturbed input
+
+        Args:
+            k (str): input name in self.kwargs, None means self.data
+            value ([numpy]): input value
+        """
+        value = to_tensor(value)
+        # enable compute gradient
+        if self.enable_backward is True:
+            value.stop_gradient = False
+        if k is None:
+            self.data = value
+        else:
+            self.kwargs[k] = value
+
     def _numeric_grad(self):
         """
         _numeric_grad
@@ -550,6 +674,21 @@ class APIBase(object):
                 loss = paddle.mean(res).numpy()
             return loss
 
+    def _numeric_grad_batch(self):
+        """
+        _numeric_grad with perturbed inputs stacked on axis 0
+        Returns:
+            loss of each sample
+        """
+        if self.__layertype == "func":
+            res = self.func(**self.kwargs)
+        else:
+            obj = self.func(**self.kwargs)
+            res = obj(self.data)
+        if isinstance(res, (list, tuple)):
+            res = res[0]
+        return paddle.mean(paddle.reshape(res, [res.shape[0], -1]), axis=1).numpy()
+
     def _dygraph_forward(self):
         """
         _dygraph_forward
@@ -696,6 +835,25 @@ class APIBase(object):
                         return res[0]
 
 
+class ProjectedGrad(object):
+    """
+    numeric grad of a large input, stored as directional derivatives along random ±1 directions
+    """
+
+    def __init__(self, directions, values):
+        self.directions = directions
+        self.values = values
+
+    def project(self, grad):
+        """
+        directional derivatives of a full grad
+        """
+        return self.directions.dot(np.asarray(grad, dtype=np.float64).reshape(-1))
+
+    def __repr__(self):
+        return "ProjectedGrad(directions={}, values={})".format(list(self.directions.shape), self.values.tolist())
+
+
 def compare_grad(result, expect, delta=1e-6, rtol=0.001, mode=None, no_grad_var=None):
     """compare grad
 
@@ -721,7 +879,10 @@ def compare_grad(result, expect, delta=1e-6, rtol=0.001, mode=None, no_grad_var=
         assert False, "grad KeyError"
     for k in result.keys():
         logging.info("check " + k + " grad ... ")
-        compare(result[k], expect[k], delta, rtol)
+        if isinstance(expect[k], ProjectedGrad):
+            compare(expect[k].project(result[k]), expect[k].values, delta, rtol)
+        else:
+            compare(result[k], expect[k], delta, rtol)
         logging.info("check " + k + " grad ... ok")
 
 
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+
+"""
+test numeric grad modes of APIBase.compute_grad
+"""
+
+from apibase import APIBase
+from apibase import ProjectedGrad
+from apibase import compare_grad
+from apibase import randtool
+import paddle
+import pytest
+import numpy as np
+
+
+class TestNumericGrad(APIBase):
+    """
+    test numeric grad
+    """
+
+    def hook(self):
+        """
+        implement
+        """
+        self.types = [np.float64]
+        self.places = [paddle.CPUPlace()]
+
+
+def numeric_grad(func, mode="forward", batch=False, proj_size=0, **kwargs):
+    """
+    compute numeric grad of func with the given grad mode
+    """
+    obj = TestNumericGrad(func)
+    obj.dtype = np.float64
+    obj.place = paddle.CPUPlace()
+    obj.grad_mode = mode
+    obj.grad_batch = batch
+    obj.grad_batch_size = 5
+    obj.grad_proj_size = proj_size
+    obj.grad_proj_num = 8
+    grad = obj.compute_grad(np.zeros([1]), **kwargs)
+    return obj, grad
+
+
+x = randtool("float", -2, 2, (3, 4))
+y = randtool("float", -2, 2, (3, 4))
+
+
+@pytest.mark.api_nn_numeric_grad
+def test_numeric_grad_central():
+    """
+    central difference == element-wise forward difference
+    """
+    _, expect = numeric_grad(paddle.tanh, x=x)
+    _, grad = numeric_grad(paddle.tanh, mode="central", x=x)
+    compare_grad(grad, expect, mode="central")
+
+
+@pytest.mark.api_nn_numeric_grad
+def test_numeric_grad_batch():
+    """
+    batched forward and central difference == element-wise forward difference, y broadcasts against axis 0
+    """
+    _, expect = numeric_grad(paddle.multiply, x=x, y=y)
+    obj, grad = numeric_grad(paddle.multiply, batch=True, x=x, y=y)
+    assert obj._batch_valid == {"x": True, "y": True}
+    compare_grad(grad, expect, mode="batch")
+    _, grad = numeric_grad(paddle.multiply, mode="central", batch=True, x=x, y=y)
+    compare_grad(grad, expect, mode="batch central")
+
+
+@pytest.mark.api_nn_numeric_grad
+def test_numeric_grad_batch_fallback():
+    """
+    output does not keep axis 0, batched forward falls back to element-wise
+    """
+    _, expect = numeric_grad(paddle.sum, x=x, axis=0)
+    obj, grad = numeric_grad(paddle.sum, batch=True, x=x, axis=0)
+    assert obj._batch_valid == {"x": False}
+    compare_grad(grad, expect, mode="batch fallback")
+
+
+@pytest.mark.api_nn_numeric_grad
+def test_numeric_grad_projected():
+    """
+    projected grad == projection of element-wise forward difference
+    """
+    _, expect = numeric_grad(paddle.tanh, x=x)
+    _, grad = numeric_grad(paddle.tanh, proj_size=4, x=x)
+    assert isinstance(grad["x"], ProjectedGrad)
+    assert grad["x"].values.shape == (8,)
+    compare_grad(expect, grad, mode="projected")
+    _, grad = numeric_grad(paddle.tanh, mode="central", batch=True, proj_size=4, x=x)
+    compare_grad(expect, grad, mode="projected batch central")
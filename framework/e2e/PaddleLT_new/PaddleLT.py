@@ -8,6 +8,7 @@ import os
 import pytest
 import allure
 import layertest
+from pltools.allure_result import allure_description
 
 
 # @allure.feature
@@ -23,33 +24,7 @@ def test_module_layer(title, layerfile, testing, device_place_id):
     # allure.dynamic.feature(case)
     allure.dynamic.feature("case")
 
-    flags_str = ""
-    flags_str += f"pts_id={os.environ.get('pts_id', 'None')};"
-    flags_str += "\n"
-    flags_str += (
-        f"case_url=https://github.com/PaddlePaddle/PaddleTest/blob/develop/framework/e2e/PaddleLT_new/{layerfile}"
-    )
-    flags_str += "\n"
-    flags_str += f"paddle_commit={os.environ.get('paddle_commit', 'None')};"
-    flags_str += "\n"
-    # flags_str += f"wheel_url={os.environ.get('wheel_url', 'None')};"
-    flags_str += (
-        f"wheel_url={os.environ.get('wheel_url', 'None').replace('latest', os.environ.get('paddle_commit', 'None'))};"
-    )
-    flags_str += "\n"
-    for key, value in os.environ.items():
-        if key.startswith("FLAGS_"):
-            flags_str = flags_str + key + "=" + value + ";"
-            flags_str += "\n"
-    flags_str += f"TESTING={os.environ.get('TESTING', 'None')};"
-    flags_str += f"CUDA_VISIBLE_DEVICES={os.environ.get('CUDA_VISIBLE_DEVICES', 'None')};"
-    flags_str += f"FRAMEWORK={os.environ.get('FRAMEWORK', 'None')};"
-    flags_str += f"USE_PADDLE_MODEL={os.environ.get('USE_PADDLE_MODEL', 'None')};"
-    flags_str += f"docker_image={os.environ.get('docker_image', 'None')};"
-    flags_str += "\n"
-    for key, value in os.environ.items():
-        if key.startswith("PLT_"):
-            flags_str = flags_str + key + "=" + value + ";"
+    flags_str = allure_description(layerfile)
 
     allure.dynamic.description(flags_str)
     single_test = layertest.LayerTest(
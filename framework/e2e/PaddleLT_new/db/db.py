@@ -6,24 +6,57 @@
 db object
 """
 
+import os
+import sys
 import json
+import sqlite3
 import traceback
 from datetime import datetime
 import yaml
-import pymysql
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "tools"))
+from bulk_writer import BulkWriter  # noqa: E402
 
 # from utils.logger import logger
 
 ACCURACY = "%.6g"
 
+# sqlite本地替身的建表语句, 仅包含本模块读写的字段
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS `layer_job` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT, `comment` TEXT, `status` TEXT, `result` TEXT, `env_info` TEXT,
+        `framework` TEXT, `agile_pipeline_build_id` INTEGER, `testing_mode` TEXT, `testing` TEXT,
+        `plt_perf_content` TEXT, `layer_type` TEXT, `commit` TEXT, `version` TEXT, `hostname` TEXT, `hardware` TEXT,
+        `system` TEXT, `md5_id` TEXT, `base` INTEGER, `ci` INTEGER, `create_time` TEXT, `update_time` TEXT)""",
+    """CREATE TABLE IF NOT EXISTS `layer_case` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT, `jid` INTEGER, `case_name` TEXT, `result` TEXT, `create_time` TEXT)""",
+]
+
 
 class DB(object):
     """DB class"""
 
-    def __init__(self, storage="storage.yaml"):
+    def __init__(self, storage="storage.yaml", backend=None):
+        """
+        :param storage: 信息配置文件
+        :param backend: mysql或sqlite, 默认读取环境变量PLT_DB_BACKEND. sqlite为本地替身, 路径读取PLT_DB_SQLITE
+        """
         self.storage = storage
-        host, port, user, password, database = self.load_storge()
-        self.db = pymysql.connect(host=host, port=port, user=user, password=password, database=database, charset="utf8")
+        self.backend = backend or os.environ.get("PLT_DB_BACKEND", "mysql")
+        if self.backend == "sqlite":
+            self.db = sqlite3.connect(os.environ.get("PLT_DB_SQLITE", "plt_benchmark.db"), check_same_thread=False)
+            for sql in SQLITE_SCHEMA:
+                self.db.execute(sql)
+            self.db.commit()
+            self.placeholder = "?"
+        else:
+            import pymysql
+
+            host, port, user, password, database = self.load_storge()
+            self.db = pymysql.connect(
+                host=host, port=port, user=user, password=password, database=database, charset="utf8"
+            )
+            self.placeholder = "%s"
         self.cursor = self.db.cursor()
         # self.now_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -54,18 +87,38 @@ class DB(object):
         sql_table = "`" + table + "`"
         ls = [(k, data[k]) for k in data if data[k] is not None]
         keys = ",".join(("`" + i[0] + "`") for i in ls)
-        values = ",".join("%r" % i[1] for i in ls)
+        values = ",".join([self.placeholder] * len(ls))
 
         sql = "INSERT INTO {table}({keys}) VALUES ({values})".format(table=sql_table, keys=keys, values=values)
         try:
-            self.cursor.execute(sql)
-            id = self.db.insert_id()
+            self.cursor.execute(sql, tuple(i[1] for i in ls))
+            id = self.cursor.lastrowid
             self.db.commit()
         except Exception as e:
             # print(traceback.format_exc())
             print(e)
         return id
 
+    def insert_many(self, table, rows):
+        """
+        批量插入数据, 单次executemany, 调用方负责commit
+        :param rows: 字段相同的dict list
+        """
+        if not rows:
+            return
+        keys = list(rows[0].keys())
+        sql = "INSERT INTO `{table}`({keys}) VALUES ({values})".format(
+            table=table, keys=",".join("`" + k + "`" for k in keys), values=",".join([self.placeholder] * len(keys))
+        )
+        self.cursor.executemany(sql, [tuple(row[k] for k in keys) for row in rows])
+
+    def ping(self):
+        """
+        连接断开时重连, sqlite无需重连
+        """
+        if self.backend != "sqlite":
+            self.db.ping(True)
+
     def update(self, table, data, data_condition):
         """按照data_condition 更新数据"""
         sql_table = "`" + table + "`"
@@ -144,7 +197,7 @@ class DB(object):
             params.append(value)
 
         # 构建完整的SQL查询语句
-        sql = "SELECT * FROM {} WHERE {}".format(table, " AND ".join(conditions))
+        sql = "SELECT * FROM {} WHERE {}".format(table, " AND ".join(conditions)).replace("%s", self.placeholder)
         try:
             self.cursor.execute(sql, tuple(params))
             res = self.cursor.fetchall()
@@ -244,7 +297,7 @@ class DB(object):
                 case_id = self.insert(table="layer_case", data=data)
                 if case_id == -1:
                     print("db ping again~~~")
-                    self.db.ping(True)
+                    self.ping()
                     continue
                 else:
                     break
@@ -253,6 +306,19 @@ class DB(object):
             print(traceback.format_exc())
             print(e)
 
+    def insert_cases(self, jid, case_dict, create_time):
+        """
+        批量向case表中录入数据, 整个job的case在同一个事务中提交
+        :param case_dict: {case_name: result}
+        """
+        writer = BulkWriter(db=self)
+        for case_name, result in case_dict.items():
+            writer.add(
+                table="layer_case",
+                row={"jid": jid, "case_name": case_name, "result": result, "create_time": create_time},
+            )
+        writer.close()
+
     def update_job(self, id, status, update_time):
         """数据录入完成后更新job表中的部分字段"""
         data = {"status": status, "update_time": update_time}
@@ -280,6 +346,10 @@ class DB(object):
         sql_table = "`" + table + "`"
         sql = "SHOW COLUMNS from {}".format(sql_table)
         try:
+            if self.backend == "sqlite":
+                self.cursor.execute("PRAGMA table_info({})".format(sql_table))
+                results = [column[1] for column in self.cursor.fetchall()]
+                return results
             self.cursor.execute(sql)
             results = [column[0] for column in self.cursor.fetchall()]
         except Exception as e:
@@ -6,15 +6,12 @@
 eval 方法
 """
 import os
-import timeit
-import time
 import numpy as np
 import paddle
-from engine.paddle_xtools import reset
+from engine.paddle_xtools import reset, set_bm_device, device_synchronize, set_cpu_threads
 from generator.builder_layer import BuildLayer
 from generator.builder_data import BuildData
-from pltools.res_save import save_pickle
-from pltools.statistics import trimmean, mean, best, best_top_k, perf_by_step
+from pltools.perf_timer import measure_perf
 from pltools.logger import Logger
 
 
@@ -33,8 +30,10 @@ class LayerEvalBM(object):
 
         self.device = os.environ.get("PLT_SET_DEVICE")
         # paddle.set_device(str(self.device))
-        paddle.set_device(f"{self.device}:{device_place_id}")
+        set_bm_device(self.device, device_place_id)
         # paddle.set_device("{}:{}".format(str(self.device), str(device_id)))
+        self.sync = device_synchronize(self.device)
+        self.cpu_threads = set_cpu_threads() if self.device == "cpu" else None
 
         self.perf_repeat = int(os.environ.get("PLT_BM_REPEAT", "100"))
         self.perf_statis = os.environ.get("PLT_BM_STATIS", "trimmean")
@@ -51,6 +50,18 @@ class LayerEvalBM(object):
         self.layerfile = layerfile
         self.data = BuildData(layerfile=self.layerfile).get_single_tensor()
         self.logger = Logger("LayerEvalBM")
+        # 各*_perf共用的计时设置, 见pltools.perf_timer.measure_perf
+        self.timing_kwargs = {
+            "layerfile": self.layerfile,
+            "sync": self.sync,
+            "timeit_num": self.timeit_num,
+            "max_repeat": self.perf_repeat,
+            "statis": self.perf_statis,
+            "scale": self.statis_times,
+            "ndigits": self.statis_round,
+            "cpu_threads": self.cpu_threads,
+            "logger": self.logger,
+        }
 
     def _net_instant(self):
         """get net and data"""
@@ -85,32 +96,7 @@ class LayerEvalBM(object):
             logit = net(*input_data)
             return logit
 
-        total_time_list = []
-        # 预热
-        timeit.timeit(lambda: _perf(self.data), number=10)
-        # timeit.timeit(lambda: _perf(self.data), number=int(self.perf_repeat * self.timeit_num * 0.2))
-        for i in range(self.perf_repeat):
-            start_time = time.time()
-            for _ in range(self.timeit_num):
-                _perf(self.data)
-            paddle.core._cuda_synchronize(paddle.CUDAPlace(0))
-            end_time = time.time()
-            total_time = end_time - start_time
-            total_time_list.append(total_time)
-
-        if os.environ.get("PLT_BM_PLOT") == "True":
-            save_pickle(data=total_time_list, filename="dy_eval_perf_" + self.layerfile)
-            # 画图
-            perf_by_step(
-                data_list=total_time_list,
-                step_scale=[0.1, 0.5, 1],
-                filename="dy_eval_perf_" + self.layerfile + "_by_step",
-            )
-
-        time_res = eval(self.perf_statis)(data_list=total_time_list)
-        time_res = round(time_res * self.statis_times, self.statis_round)
-
-        return time_res
+        return measure_perf(lambda: _perf(self.data), perf_name="dy_eval_perf", **self.timing_kwargs)
 
     def dy2st_eval_perf(self):
         """dygraph eval"""
@@ -122,34 +108,9 @@ class LayerEvalBM(object):
             logit = st_net(*input_data)
             return logit
 
-        total_time_list = []
-        # 预热
-        timeit.timeit(lambda: _perf(self.data), number=10)
-        # timeit.timeit(lambda: _perf(self.data), number=int(self.perf_repeat * self.timeit_num * 0.2))
-        for i in range(self.perf_repeat):
-            start_time = time.time()
-            for _ in range(self.timeit_num):
-                _perf(self.data)
-            paddle.core._cuda_synchronize(paddle.CUDAPlace(0))
-            end_time = time.time()
-            total_time = end_time - start_time
-            total_time_list.append(total_time)
-
-        if os.environ.get("PLT_BM_PLOT") == "True":
-            save_pickle(data=total_time_list, filename="dy_eval_perf_" + self.layerfile)
-            # 画图
-            perf_by_step(
-                data_list=total_time_list,
-                step_scale=[0.1, 0.5, 1],
-                filename="dy_eval_perf_" + self.layerfile + "_by_step",
-            )
-
-        time_res = eval(self.perf_statis)(data_list=total_time_list)
-        time_res = round(time_res * self.statis_times, self.statis_round)
-
-        return time_res
-
-    def _dy2st_eval_cinn_perf(self, perf_repeat=10):
+        return measure_perf(lambda: _perf(self.data), perf_name="dy2st_eval_perf", **self.timing_kwargs)
+
+    def _dy2st_eval_cinn_perf(self, perf_repeat=None):
         net = self._net_instant()
 
         build_strategy = paddle.static.BuildStrategy()
@@ -162,37 +123,14 @@ class LayerEvalBM(object):
             logit = cinn_net(*input_data)
             return logit
 
-        total_time_list = []
-        # 预热
-        timeit.timeit(lambda: _perf(self.data), number=10)
-        # timeit.timeit(lambda: _perf(self.data), number=int(self.perf_repeat * self.timeit_num * 0.2))
-        for i in range(perf_repeat):
-            start_time = time.time()
-            for _ in range(self.timeit_num):
-                _perf(self.data)
-            paddle.core._cuda_synchronize(paddle.CUDAPlace(0))
-            end_time = time.time()
-            total_time = end_time - start_time
-            total_time_list.append(total_time)
-
-        if os.environ.get("PLT_BM_PLOT") == "True":
-            save_pickle(data=total_time_list, filename="dy_eval_perf_" + self.layerfile)
-            # 画图
-            perf_by_step(
-                data_list=total_time_list,
-                step_scale=[0.1, 0.5, 1],
-                filename="dy_eval_perf_" + self.layerfile + "_by_step",
-            )
-
-        time_res = eval(self.perf_statis)(data_list=total_time_list)
-        time_res = round(time_res * self.statis_times, self.statis_round)
-
-        return time_res
+        return measure_perf(
+            lambda: _perf(self.data), perf_name="dy2st_eval_cinn_perf", perf_repeat=perf_repeat, **self.timing_kwargs
+        )
 
     def dy2st_eval_cinn_perf(self):
         """dy2st eval"""
         with paddle.decomposition.decomp.prim_guard():
-            result = self._dy2st_eval_cinn_perf(perf_repeat=self.perf_repeat)
+            result = self._dy2st_eval_cinn_perf()
         return result
 
     def dy2st_eval_cinn_perf_pre(self):
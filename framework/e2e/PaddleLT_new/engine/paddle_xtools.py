@@ -5,6 +5,7 @@
 """
 常用tools
 """
+import os
 import numpy as np
 import paddle
 
@@ -20,3 +21,50 @@ def reset(seed):
     paddle.seed(seed)
     np.random.seed(seed)
     np.set_printoptions(threshold=5, edgeitems=3)
+
+
+def set_bm_device(device, device_place_id):
+    """
+    设定性能测试设备, cpu不带设备编号
+    :param device: PLT_SET_DEVICE, 例如cpu, gpu, xpu
+    :param device_place_id: 设备编号
+    :return: 实际设定的设备字符串
+    """
+    if device == "cpu":
+        place = "cpu"
+    else:
+        place = f"{device}:{device_place_id}"
+    paddle.set_device(place)
+    return place
+
+
+def device_synchronize(device):
+    """
+    获取设备同步函数, 性能计时样本结束前调用以等待设备上的异步任务完成
+    :param device: PLT_SET_DEVICE, 例如cpu, gpu, xpu
+    :return: 无参可调用对象, cpu上算子同步执行, 返回None
+    """
+    if device == "cpu":
+        return None
+    if hasattr(paddle.device, "synchronize"):
+        return paddle.device.synchronize
+    return lambda: paddle.core._cuda_synchronize(paddle.CUDAPlace(0))
+
+
+def set_cpu_threads(num_threads=None):
+    """
+    固定CPU计算线程数(OMP/MKL), 保证CPU性能数据可复现
+    :param num_threads: 线程数, 默认读取PLT_BM_CPU_THREADS, 未设定时不做修改
+    :return: 实际设定的线程数, 未设定时返回None
+    """
+    num_threads = num_threads or os.environ.get("PLT_BM_CPU_THREADS")
+    if not num_threads:
+        return None
+    num_threads = int(num_threads)
+    # OMP/MKL在进程启动时读取, 此处同步设定供子进程继承, 当前进程通过paddle接口生效
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    paddle_base = getattr(paddle, "base", None) or getattr(paddle, "fluid", None)
+    if paddle_base is not None and hasattr(paddle_base.core, "set_num_threads"):
+        paddle_base.core.set_num_threads(num_threads)
+    return num_threads
@@ -13,7 +13,7 @@ from engine.torch_xtools import reset
 from generator.builder_layer import BuildLayer
 from generator.builder_data import BuildData
 from pltools.res_save import save_pickle
-from pltools.statistics import trimmean, mean, best, best_top_k, perf_by_step
+from pltools.statistics import STATIS_MAP, perf_by_step
 
 
 class TorchLayerEvalBM(object):
@@ -73,7 +73,7 @@ class TorchLayerEvalBM(object):
             filename="dy2st_eval_cinn_perf_" + self.layerfile + "_by_step",
         )
 
-        time_res = eval(self.perf_statis)(data_list=total_time_list)
+        time_res = STATIS_MAP[self.perf_statis](data_list=total_time_list)
         time_res = round(time_res * self.statis_times, self.statis_round)
         return time_res
 
@@ -8,3 +8,4 @@ import generator.builder_data
 import generator.builder_layer
 import generator.builder_loss
 import generator.builder_optimizer
+import generator.case_loader
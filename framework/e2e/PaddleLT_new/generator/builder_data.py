@@ -11,19 +11,19 @@ import numpy as np
 
 if os.environ.get("FRAMEWORK") == "paddle":
     import paddle
-    import diy
-    import layerApicase
-    import layercase
 
     if os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleOCR":
-        import layerOCRcase
         import PaddleOCR
     elif os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleNLP":
-        import layerNLPcase
         import paddlenlp
 elif os.environ.get("FRAMEWORK") == "torch":
     import torch
-    import layerTorchcase
+
+from generator.case_loader import load_case_module, lazy_import_enabled, eager_import_case_repos
+
+# PLT_CASE_LAZY_IMPORT=False 时回退为整体导入所有子图
+if not lazy_import_enabled():
+    eager_import_case_repos()
 
 import pltools.np_tool as tool
 
@@ -34,7 +34,7 @@ class BuildData(object):
     def __init__(self, layerfile):
         """init"""
         self.layerfile = layerfile
-        self.layer_module = eval(self.layerfile)
+        self.layer_module = load_case_module(self.layerfile)
 
     def get_single_data(self):
         """get data"""
@@ -127,8 +127,8 @@ class BuildData(object):
         """get single inputspec"""
         spec_list = []
         data = self.get_single_data()
-        if hasattr(eval(self.layerfile), "create_inputspec"):  # 如果子图case中包含inputspec, 则直接使用接口获取
-            spec_list = eval(self.layerfile + ".create_inputspec()")
+        if hasattr(self.layer_module, "create_inputspec"):  # 如果子图case中包含inputspec, 则直接使用接口获取
+            spec_list = getattr(self.layer_module, "create_inputspec")()
         else:
             for v in data:
                 if isinstance(v, paddle.Tensor):
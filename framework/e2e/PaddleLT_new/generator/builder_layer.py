@@ -9,19 +9,19 @@ import os
 
 if os.environ.get("FRAMEWORK") == "paddle":
     import paddle
-    import diy
-    import layerApicase
-    import layercase
 
     if os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleOCR":
-        import layerOCRcase
         import PaddleOCR
     elif os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleNLP":
-        import layerNLPcase
         import paddlenlp
 elif os.environ.get("FRAMEWORK") == "torch":
     import torch
-    import layerTorchcase
+
+from generator.case_loader import load_case_module, lazy_import_enabled, eager_import_case_repos
+
+# PLT_CASE_LAZY_IMPORT=False 时回退为整体导入所有子图
+if not lazy_import_enabled():
+    eager_import_case_repos()
 
 
 class BuildLayer(object):
@@ -29,9 +29,10 @@ class BuildLayer(object):
 
     def __init__(self, layerfile):
         """init"""
+        self.layerfile = layerfile
         self.layername = layerfile + ".LayerCase"
 
     def get_layer(self):
         """get_layer"""
-        layer = eval(self.layername)()
+        layer = getattr(load_case_module(self.layerfile), "LayerCase")()
         return layer
@@ -0,0 +1,125 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+子图case按需加载器
+"""
+
+import os
+import sys
+import types
+import importlib
+import importlib.util
+
+# 已加载的case模块缓存, key为点分路径, 例如 layercase.sublayer1000.Clas_cases.DLA_DLA102.SIR_12
+_CASE_MODULE_CACHE = {}
+
+# 整体导入模式下需要预先导入的子图仓库
+EAGER_CASE_REPOS = {
+    "paddle": ["diy", "layerApicase", "layercase"],
+    "torch": ["layerTorchcase"],
+}
+
+
+def lazy_import_enabled():
+    """
+    是否开启按需加载, 设置 PLT_CASE_LAZY_IMPORT=False 可回退为整体导入
+    """
+    return os.environ.get("PLT_CASE_LAZY_IMPORT", "True") != "False"
+
+
+def eager_import_case_repos():
+    """
+    整体导入所有子图仓库(旧行为), 会执行各级 __init__.py 导入全部子图
+    """
+    repos = list(EAGER_CASE_REPOS.get(os.environ.get("FRAMEWORK"), []))
+    if os.environ.get("FRAMEWORK") == "paddle":
+        if os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleOCR":
+            repos.append("layerOCRcase")
+        elif os.environ.get("USE_PADDLE_MODEL", "None") == "PaddleNLP":
+            repos.append("layerNLPcase")
+    for repo in repos:
+        importlib.import_module(repo)
+
+
+def layerfile_to_module_path(layerfile):
+    """
+    子图路径转换为点分模块路径
+    :param layerfile: layercase/sublayer1000/Clas_cases/DLA_DLA102/SIR_12.py 或 layercase.sublayer1000...SIR_12
+    :return: layercase.sublayer1000.Clas_cases.DLA_DLA102.SIR_12
+    """
+    if layerfile.endswith(".py"):
+        layerfile = layerfile[: -len(".py")]
+    return layerfile.replace("/", ".").lstrip(".")
+
+
+def _find_case_file(module_path):
+    """
+    根据点分模块路径在sys.path中查找子图文件
+    """
+    rel_path = module_path.replace(".", os.sep)
+    for base in sys.path:
+        base = base or os.getcwd()
+        py_file = os.path.join(base, rel_path + ".py")
+        if os.path.isfile(py_file):
+            return base, py_file
+        init_file = os.path.join(base, rel_path, "__init__.py")
+        if os.path.isfile(init_file):
+            return base, init_file
+    raise ModuleNotFoundError("case module {} not found in sys.path".format(module_path))
+
+
+def _register_parent_packages(module_path, base):
+    """
+    为子图的各级父包注册不执行 __init__.py 的占位包, 避免触发整级目录的导入
+    """
+    parts = module_path.split(".")[:-1]
+    for i in range(1, len(parts) + 1):
+        pkg_name = ".".join(parts[:i])
+        if pkg_name in sys.modules:
+            continue
+        pkg = types.ModuleType(pkg_name)
+        pkg.__path__ = [os.path.join(base, *parts[:i])]
+        pkg.__package__ = pkg_name
+        sys.modules[pkg_name] = pkg
+        if i > 1:
+            setattr(sys.modules[".".join(parts[: i - 1])], parts[i - 1], pkg)
+
+
+def load_case_module(layerfile):
+    """
+    按需加载单个子图模块, 仅导入该子图文件本身
+    :param layerfile: 子图路径或点分模块路径
+    :return: 子图module
+    """
+    module_path = layerfile_to_module_path(layerfile)
+    if module_path in _CASE_MODULE_CACHE:
+        return _CASE_MODULE_CACHE[module_path]
+
+    if not lazy_import_enabled():
+        eager_import_case_repos()
+        module = importlib.import_module(module_path)
+    elif module_path in sys.modules:
+        module = sys.modules[module_path]
+    else:
+        base, py_file = _find_case_file(module_path)
+        _register_parent_packages(module_path, base)
+        if py_file.endswith("__init__.py"):
+            spec = importlib.util.spec_from_file_location(
+                module_path, py_file, submodule_search_locations=[os.path.dirname(py_file)]
+            )
+        else:
+            spec = importlib.util.spec_from_file_location(module_path, py_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_path] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            sys.modules.pop(module_path, None)
+            raise
+        if "." in module_path:
+            parent_name, _, child_name = module_path.rpartition(".")
+            setattr(sys.modules[parent_name], child_name, module)
+
+    _CASE_MODULE_CACHE[module_path] = module
+    return module
@@ -13,7 +13,8 @@ import traceback
 from strategy.compare import base_compare, infer_compare
 from pltools.yaml_loader import YamlLoader
 from pltools.logger import Logger
-from pltools.res_save import save_tensor, load_tensor, save_pickle
+from pltools.res_save import load_tensor, save_pickle
+from pltools.gt_store import GroundTruthStore, load_gt
 
 
 class LayerTest(object):
@@ -26,6 +27,7 @@ class LayerTest(object):
         self.title = title
 
         self.device_place_id = int(device_place_id)
+        self.case_file = layerfile
         self.layerfile = layerfile.replace(".py", "").replace("/", ".").lstrip(".")
 
         # 解析testing.yml
@@ -36,6 +38,7 @@ class LayerTest(object):
         self.compare_list = self.test_config.yml.get("compare")
 
         self.logger = Logger("PaddleLT")
+        self.gt_store = GroundTruthStore()
         self.report_dir = os.path.join(os.getcwd(), "report")
 
         self.logger.get_log().info(f"LayerTest.__init__ 中 device_place_id is: {self.device_place_id}")
@@ -112,10 +115,12 @@ class LayerTest(object):
                     res_dict[testing] = res
                     net = None
                 if os.environ.get("PLT_SAVE_GT") == "True":  # 开启gt保存
-                    gt_path = os.path.join("plt_gt", os.environ.get("PLT_SET_DEVICE"), testing)
-                    if not os.path.exists(gt_path):
-                        os.makedirs(gt_path)
-                    save_tensor(res, os.path.join(gt_path, self.title))
+                    self.gt_store.save(
+                        res_dict[testing],
+                        layerfile=self.case_file,
+                        testing=testing,
+                        device=os.environ.get("PLT_SET_DEVICE"),
+                    )
             except Exception:
                 bug_trace = traceback.format_exc()
                 exc_func += 1
@@ -143,7 +148,14 @@ class LayerTest(object):
                 gt_device = baseline_info.get("device")
                 baseline = baseline_info.get("testing")
                 gt_path = os.path.join(gt_dir, gt_device, baseline, self.title)
-                expect = load_tensor(gt_path)
+                if os.path.exists(gt_path + ".tensor"):  # 兼容旧版按子图名称保存的paddle.save真值
+                    expect = load_tensor(gt_path)
+                else:  # 对象存储中没有.pltgt时, locate会回退下载旧版<case_name>.tensor
+                    gt_file = self.gt_store.locate(layerfile=self.case_file, testing=baseline, device=gt_device)
+                    if gt_file.endswith(".tensor"):
+                        expect = load_tensor(gt_file[: -len(".tensor")])
+                    else:
+                        expect = load_gt(gt_file)
             else:  # 使用res_dict中的测试结果作为基线
                 baseline = comparing.get("baseline")
                 expect = res_dict[baseline]
@@ -0,0 +1,86 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+allure结果生成, 用于不经过pytest执行的子图产出兼容allure报告的result json
+"""
+
+import os
+import json
+import uuid
+import hashlib
+
+
+def allure_description(layerfile):
+    """
+    生成用例描述: 环境信息以及FLAGS_/PLT_开头的环境变量
+    """
+    flags_str = ""
+    flags_str += f"pts_id={os.environ.get('pts_id', 'None')};"
+    flags_str += "\n"
+    flags_str += (
+        f"case_url=https://github.com/PaddlePaddle/PaddleTest/blob/develop/framework/e2e/PaddleLT_new/{layerfile}"
+    )
+    flags_str += "\n"
+    flags_str += f"paddle_commit={os.environ.get('paddle_commit', 'None')};"
+    flags_str += "\n"
+    flags_str += (
+        f"wheel_url={os.environ.get('wheel_url', 'None').replace('latest', os.environ.get('paddle_commit', 'None'))};"
+    )
+    flags_str += "\n"
+    for key, value in os.environ.items():
+        if key.startswith("FLAGS_"):
+            flags_str = flags_str + key + "=" + value + ";"
+            flags_str += "\n"
+    flags_str += f"TESTING={os.environ.get('TESTING', 'None')};"
+    flags_str += f"CUDA_VISIBLE_DEVICES={os.environ.get('CUDA_VISIBLE_DEVICES', 'None')};"
+    flags_str += f"FRAMEWORK={os.environ.get('FRAMEWORK', 'None')};"
+    flags_str += f"USE_PADDLE_MODEL={os.environ.get('USE_PADDLE_MODEL', 'None')};"
+    flags_str += f"docker_image={os.environ.get('docker_image', 'None')};"
+    flags_str += "\n"
+    for key, value in os.environ.items():
+        if key.startswith("PLT_"):
+            flags_str = flags_str + key + "=" + value + ";"
+    return flags_str
+
+
+def write_allure_result(report_dir, title, layerfile, status, start, stop, trace=""):
+    """
+    写入单个用例的allure result json, 字段与allure-pytest产出保持一致
+    :param report_dir: allure报告路径
+    :param title: 用例名称, 例如 layercase^sublayer1000^Clas_cases^DLA_DLA102^SIR_12
+    :param layerfile: 子图py文件路径
+    :param status: passed, failed, broken, skipped
+    :param start: 开始时间戳(ms)
+    :param stop: 结束时间戳(ms)
+    :param trace: 报错信息
+    :return: result json路径
+    """
+    if not os.path.exists(report_dir):
+        os.makedirs(report_dir, exist_ok=True)
+
+    case_uuid = str(uuid.uuid4())
+    message = trace.strip().splitlines()[-1] if trace.strip() else ""
+    result = {
+        "name": title,
+        "status": status,
+        "statusDetails": {"message": message, "trace": trace},
+        "description": allure_description(layerfile),
+        "start": int(start),
+        "stop": int(stop),
+        "uuid": case_uuid,
+        "historyId": hashlib.md5(title.encode("utf-8")).hexdigest(),
+        "testCaseId": hashlib.md5(title.encode("utf-8")).hexdigest(),
+        "fullName": f"{title}#test_module_layer",
+        "labels": [
+            {"name": "feature", "value": "case"},
+            {"name": "framework", "value": "pytest"},
+            {"name": "language", "value": "python"},
+            {"name": "suite", "value": title},
+        ],
+    }
+    result_file = os.path.join(report_dir, f"{case_uuid}-result.json")
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    return result_file
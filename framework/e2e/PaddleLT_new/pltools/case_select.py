@@ -7,6 +7,9 @@ nn.Layer配置相关
 """
 
 import os
+import json
+import fnmatch
+import hashlib
 
 # import platform
 # import time
@@ -27,45 +30,167 @@ class CaseSelect(object):
         self.dirpath = dirpath
         self.ignore_list = ignore_list
 
-    def get_yaml_list(self, base_path, yaml_list=[]):
+    def get_yaml_list(self, base_path, yaml_list=None):
         """递归寻找文件夹内所有的yml文件路径"""
-        file_list = os.listdir(base_path)
+        if yaml_list is None:
+            yaml_list = []
+        for entry in os.scandir(base_path):
+            yaml_path = os.path.join(base_path, entry.name)
 
-        for file in file_list:
-            yaml_path = os.path.join(base_path, file)
-
-            if os.path.isdir(yaml_path):
+            if entry.is_dir():
                 self.get_yaml_list(yaml_path, yaml_list)
             else:
-                if not file.endswith(".yml"):
+                if not entry.name.endswith(".yml"):
                     continue
                 else:
                     yaml_list.append(yaml_path)
         return yaml_list
 
-    def get_py_list(self, base_path, py_list=[]):
+    def get_py_list(self, base_path, py_list=None):
         """递归寻找文件夹内所有的子图py文件路径"""
-        file_list = os.listdir(base_path)
+        if py_list is None:
+            py_list = []
+        ignore_set = set(self.ignore_list) if self.ignore_list else set()
+        self._walk_py(base_path, py_list, ignore_set)
+        return py_list
 
-        for file in file_list:
-            py_path = os.path.join(base_path, file)
+    def _walk_py(self, base_path, py_list, ignore_set):
+        """递归遍历, 使用scandir避免对每个文件额外stat"""
+        for entry in os.scandir(base_path):
+            py_path = os.path.join(base_path, entry.name)
 
-            if os.path.isdir(py_path):
-                self.get_py_list(py_path, py_list)
+            if entry.is_dir():
+                self._walk_py(py_path, py_list, ignore_set)
             else:
-                if self.ignore_list:
-                    if (
-                        not file.endswith(".py")
-                        or file.endswith("__init__.py")
-                        or file.endswith("utils.py")
-                        or py_path in self.ignore_list
-                    ):
-                        continue
-                    else:
-                        py_list.append(py_path)
+                file = entry.name
+                if (
+                    not file.endswith(".py")
+                    or file.endswith("__init__.py")
+                    or file.endswith("utils.py")
+                    or py_path in ignore_set
+                ):
+                    continue
                 else:
-                    if not file.endswith(".py") or file.endswith("__init__.py") or file.endswith("utils.py"):
-                        continue
-                    else:
-                        py_list.append(py_path)
-        return py_list
+                    py_list.append(py_path)
+
+
+def ordered_dedup(py_list):
+    """
+    保序去重, O(n)
+    """
+    return list(dict.fromkeys(py_list))
+
+
+def case_tags(py_file):
+    """
+    子图标签: 子图路径中的各级目录名, 例如 layercase/sublayer1000/Clas_cases/DLA_DLA102/SIR_12.py
+    的标签为 layercase, sublayer1000, Clas_cases, DLA_DLA102
+    """
+    return set(os.path.normpath(os.path.dirname(py_file)).split(os.sep))
+
+
+def filter_cases(py_list, globs=None, tags=None):
+    """
+    按glob或标签筛选子图
+    :param globs: glob list, 例如 ["layercase/sublayer1000/Clas_cases/*"], 满足任意一个即保留
+    :param tags: 标签list, 例如 ["Clas_cases", "Det_cases"], 满足任意一个即保留
+    :return: 筛选后的子图list
+    """
+    if globs:
+        py_list = [py_file for py_file in py_list if any(fnmatch.fnmatch(py_file, g) for g in globs)]
+    if tags:
+        tags = set(tags)
+        py_list = [py_file for py_file in py_list if case_tags(py_file) & tags]
+    return py_list
+
+
+class CaseIndex(object):
+    """
+    子图索引: 记录每个子图的内容hash, 以及在各测试配置yml下最近一次的结果与耗时,
+    用于只执行有改动或上次失败的子图
+    """
+
+    def __init__(self, testing, filename=None):
+        """
+        init
+        :param testing: 测试配置yml路径
+        :param filename: 索引json文件, 默认读取环境变量PLT_CASE_INDEX
+        """
+        self.testing = testing
+        self.filename = filename or os.environ.get("PLT_CASE_INDEX", "plt_case_index.json")
+        self.index = {}
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, "r") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        self.testing_hash = self.file_hash(testing) if testing and os.path.exists(testing) else None
+        self._hash_cache = {}
+
+    @staticmethod
+    def file_hash(filename):
+        """
+        文件内容hash
+        """
+        sha = hashlib.sha1()
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def case_hash(self, py_file):
+        """
+        子图内容hash, 单次执行内缓存
+        """
+        if py_file not in self._hash_cache:
+            self._hash_cache[py_file] = self.file_hash(py_file)
+        return self._hash_cache[py_file]
+
+    def is_impacted(self, py_file):
+        """
+        子图是否需要执行: 无记录、子图或测试配置有改动、上次未通过
+        """
+        record = self.index.get(py_file)
+        if record is None or record.get("hash") != self.case_hash(py_file):
+            return True
+        result = record.get("results", {}).get(self.testing)
+        if result is None or result.get("testing_hash") != self.testing_hash:
+            return True
+        return result.get("status") != "pass"
+
+    def impacted(self, py_list):
+        """
+        筛选出需要执行的子图
+        """
+        return [py_file for py_file in py_list if self.is_impacted(py_file)]
+
+    def update(self, py_list, error_list, durations=None):
+        """
+        记录本次执行结果
+        :param py_list: 本次执行的子图list
+        :param error_list: 未通过的子图list
+        :param durations: {py_file: 耗时(s)}
+        """
+        error_set = set(error_list)
+        durations = durations or {}
+        for py_file in py_list:
+            if not os.path.exists(py_file):
+                continue
+            record = self.index.setdefault(py_file, {"results": {}})
+            record["hash"] = self.case_hash(py_file)
+            result = {
+                "status": "fail" if py_file in error_set else "pass",
+                "testing_hash": self.testing_hash,
+                "duration": durations.get(py_file, record["results"].get(self.testing, {}).get("duration")),
+            }
+            record["results"][self.testing] = result
+
+    def save(self):
+        """
+        保存索引
+        """
+        tmp_file = self.filename + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(tmp_file, self.filename)
@@ -0,0 +1,353 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+fork-server执行器: 每个子图从zygote进程fork一个子进程执行(copy-on-write),
+子进程崩溃(core dump)、超时以及输出均直接记录到结构化结果中
+
+导入paddle即会初始化CUDA driver, 此后fork出的子进程无法使用GPU, CUDA_VISIBLE_DEVICES也不再生效.
+因此fork一律在全新启动的zygote进程(python -m pltools.fork_server)中进行, 见run_in_zygote:
+zygote在未导入paddle时启动, 仅在GPU不可见(CPU执行)时预导入paddle, GPU执行时由子进程设置设备后自行导入
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import selectors
+import tempfile
+import traceback
+import subprocess
+
+from pltools.logger import Logger
+from pltools.worker_pool import execute_case
+
+# 子进程退出码与用例状态的对应关系
+EXIT_CODE_STATUS = {0: "passed", 1: "failed", 2: "broken"}
+STATUS_EXIT_CODE = {value: key for key, value in EXIT_CODE_STATUS.items()}
+# 子进程内部异常(执行器之外)的退出码
+CHILD_ERROR_CODE = 3
+
+
+class CaseResult(object):
+    """
+    单个子图的执行结果
+    """
+
+    def __init__(self, py_file, device_id=None, max_output=1024 * 1024):
+        """
+        init
+        :param py_file: 子图py文件路径
+        :param device_id: 执行设备编号
+        :param max_output: stdout/stderr各自保留的最大字节数(保留末尾)
+        """
+        self.py_file = py_file
+        self.title = py_file.replace(".py", "").replace("/", "^").replace(".", "^")
+        self.device_id = device_id
+        self.max_output = max_output
+        self.pid = None
+        self.status = None  # passed, failed, broken, crash, timeout
+        self.exit_code = None
+        self.signal = None
+        self.timed_out = False
+        self.start = None
+        self.duration = None
+        self.stdout = b""
+        self.stderr = b""
+
+    @classmethod
+    def from_dict(cls, info):
+        """
+        由to_dict的结果还原
+        """
+        result = cls(py_file=info["py_file"], device_id=info.get("device_id"))
+        for key in ("pid", "status", "exit_code", "signal", "timed_out", "duration"):
+            setattr(result, key, info.get(key))
+        result.stdout = info.get("stdout", "").encode("utf-8")
+        result.stderr = info.get("stderr", "").encode("utf-8")
+        return result
+
+    def append_output(self, stream, data):
+        """
+        追加子进程输出, 仅保留末尾max_output字节
+        """
+        buf = getattr(self, stream) + data
+        setattr(self, stream, buf[-self.max_output :])
+
+    def to_dict(self):
+        """
+        转换为可json化的dict
+        """
+        return {
+            "py_file": self.py_file,
+            "title": self.title,
+            "device_id": self.device_id,
+            "pid": self.pid,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "signal": self.signal,
+            "timed_out": self.timed_out,
+            "duration": self.duration,
+            "stdout": self.stdout.decode("utf-8", errors="replace"),
+            "stderr": self.stderr.decode("utf-8", errors="replace"),
+        }
+
+
+def gpu_visible():
+    """
+    当前进程是否可见GPU, CUDA_VISIBLE_DEVICES为空或-1时视为CPU执行
+    """
+    return os.environ.get("CUDA_VISIBLE_DEVICES", None) not in ("", "-1")
+
+
+def preload(device_list=None):
+    """
+    zygote预先导入公共模块, fork出的子进程直接复用
+    paddle/torch只在CPU执行且不绑定设备时预导入: 导入即初始化CUDA driver, fork后的子进程无法再使用GPU
+    """
+    import numpy
+    import yaml
+
+    if device_list or gpu_visible():
+        return
+    if os.environ.get("FRAMEWORK") == "paddle":
+        import paddle
+        from engine.paddle_engine_map import paddle_engine_map
+    elif os.environ.get("FRAMEWORK") == "torch":
+        import torch
+        from engine.torch_engine_map import torch_engine_map
+    import layertest
+
+
+class ForkServerExecutor(object):
+    """
+    fork-server执行器
+    """
+
+    def __init__(self, testing, max_parallel=1, device_list=None, timeout=None, report_dir="report"):
+        """
+        init
+        :param testing: 测试配置yml路径
+        :param max_parallel: 同时运行的子进程数
+        :param device_list: 设备编号list, 子进程按序轮流绑定, None表示不绑定
+        :param timeout: 单个子图超时时间(s), None表示不限时
+        :param report_dir: allure报告路径
+        """
+        self.testing = testing
+        self.max_parallel = max(int(max_parallel), 1)
+        self.device_list = device_list
+        self.timeout = timeout
+        self.report_dir = report_dir
+        self.logger = Logger("PLTForkServer")
+        self.records = []
+
+    def _child(self, result, out_w, err_w):
+        """
+        子进程: 重定向输出后执行子图, 以退出码回传状态
+        """
+        code = CHILD_ERROR_CODE
+        try:
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            if result.device_id is not None:
+                os.environ["CUDA_VISIBLE_DEVICES"] = str(result.device_id)
+            status, _ = execute_case(py_file=result.py_file, testing=self.testing, report_dir=self.report_dir)
+            code = STATUS_EXIT_CODE[status]
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _spawn(self, py_file, index, sel, running):
+        """
+        fork子进程执行单个子图
+        """
+        device_id = self.device_list[index % len(self.device_list)] if self.device_list else None
+        result = CaseResult(py_file=py_file, device_id=device_id)
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(out_r)
+            os.close(err_r)
+            self._child(result, out_w, err_w)
+        os.close(out_w)
+        os.close(err_w)
+        result.pid = pid
+        result.start = time.time()
+        sel.register(out_r, selectors.EVENT_READ, (pid, "stdout"))
+        sel.register(err_r, selectors.EVENT_READ, (pid, "stderr"))
+        running[pid] = {"result": result, "fds": {out_r, err_r}}
+        self.logger.get_log().info(f"开始测试子图 {result.title}, pid: {pid}, device: {device_id}")
+
+    def _reap(self, pid, status_code, running):
+        """
+        回收已退出的子进程, 解析退出状态
+        """
+        result = running.pop(pid)["result"]
+        result.duration = time.time() - result.start
+        if result.timed_out:
+            result.status = "timeout"
+            result.exit_code = -1
+        elif os.WIFSIGNALED(status_code):
+            sig = os.WTERMSIG(status_code)
+            result.signal = signal.Signals(sig).name
+            result.exit_code = -sig
+            result.status = "crash"
+        else:
+            result.exit_code = os.WEXITSTATUS(status_code)
+            result.status = EXIT_CODE_STATUS.get(result.exit_code, "crash")
+        self.records.append(result)
+        self.logger.get_log().info(
+            f"完成测试子图 {result.title}, 状态: {result.status}, exit_code: {result.exit_code}, signal: {result.signal}"
+        )
+
+    def run(self, py_list):
+        """
+        执行所有子图
+        :param py_list: 子图py文件路径list
+        :return: CaseResult list
+        """
+        if "paddle" in sys.modules or "torch" in sys.modules:
+            self.logger.get_log().warning("当前进程已导入paddle/torch, fork出的子进程无法使用GPU, 请通过run_in_zygote执行")
+        preload(self.device_list)
+        self.records = []
+        sel = selectors.DefaultSelector()
+        running = {}
+        pending = list(reversed(py_list))
+        index = 0
+
+        while pending or running:
+            while pending and len(running) < self.max_parallel:
+                self._spawn(pending.pop(), index, sel, running)
+                index += 1
+
+            for key, _ in sel.select(timeout=0.5):
+                pid, stream = key.data
+                data = os.read(key.fd, 65536)
+                if data:
+                    running[pid]["result"].append_output(stream, data)
+                else:
+                    sel.unregister(key.fd)
+                    os.close(key.fd)
+                    running[pid]["fds"].discard(key.fd)
+
+            for pid in list(running.keys()):
+                info = running[pid]
+                result = info["result"]
+                if self.timeout is not None and not result.timed_out and time.time() - result.start > self.timeout:
+                    self.logger.get_log().warning(f"{result.py_file} 执行超时 {self.timeout}s, 终止子进程")
+                    result.timed_out = True
+                    os.kill(pid, signal.SIGKILL)
+                # 子进程输出全部读完后再回收, 避免丢失末尾输出
+                if info["fds"] and not result.timed_out:
+                    continue
+                waited_pid, status_code = os.waitpid(pid, 0 if result.timed_out else os.WNOHANG)
+                if waited_pid == 0:
+                    continue
+                for fd in info["fds"]:
+                    sel.unregister(fd)
+                    os.close(fd)
+                self._reap(pid, status_code, running)
+
+        sel.close()
+        return self.records
+
+    def dump(self, filename):
+        """
+        保存结构化结果
+        """
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump([result.to_dict() for result in self.records], f, ensure_ascii=False, indent=2)
+
+
+def run_in_zygote(
+    py_list, testing, max_parallel=1, device_list=None, timeout=None, report_dir="report", result_file=None
+):
+    """
+    在全新启动、未导入paddle的zygote进程中执行ForkServerExecutor, 调用方可以已经导入paddle
+    :param result_file: 结构化结果保存路径, None时使用临时文件
+    :return: CaseResult list, 与py_list顺序一致; zygote异常退出时未完成的子图记为crash
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(py_list))
+        case_file = f.name
+    out_file = result_file or case_file + ".json"
+    cmd = [
+        sys.executable,
+        "-m",
+        "pltools.fork_server",
+        "--testing",
+        testing,
+        "--case_file",
+        case_file,
+        "--result_file",
+        out_file,
+        "--max_parallel",
+        str(max_parallel),
+        "--report_dir",
+        report_dir,
+    ]
+    if device_list:
+        cmd += ["--device_list", ",".join(str(device_id) for device_id in device_list)]
+    if timeout is not None:
+        cmd += ["--timeout", str(timeout)]
+    try:
+        exit_code = subprocess.call(cmd)
+        records = {}
+        if os.path.exists(out_file):
+            with open(out_file, encoding="utf-8") as f:
+                records = {info["py_file"]: CaseResult.from_dict(info) for info in json.load(f)}
+    finally:
+        os.remove(case_file)
+        if result_file is None and os.path.exists(out_file):
+            os.remove(out_file)
+
+    results = []
+    for py_file in py_list:
+        result = records.get(py_file)
+        if result is None:
+            result = CaseResult(py_file=py_file)
+            result.status = "crash"
+            result.exit_code = exit_code
+            result.duration = 0.0
+        results.append(result)
+    return results
+
+
+def main():
+    """
+    zygote入口
+    """
+    parser = argparse.ArgumentParser(description="PaddleLT fork-server zygote")
+    parser.add_argument("--testing", type=str, required=True, help="测试配置yml路径")
+    parser.add_argument("--case_file", type=str, required=True, help="子图列表文件, 每行一个py文件路径")
+    parser.add_argument("--result_file", type=str, required=True, help="结构化结果保存路径")
+    parser.add_argument("--max_parallel", type=int, default=1, help="同时运行的子进程数")
+    parser.add_argument("--device_list", type=str, default="", help="设备编号, 逗号分隔")
+    parser.add_argument("--timeout", type=float, default=None, help="单个子图超时时间(s)")
+    parser.add_argument("--report_dir", type=str, default="report", help="allure报告路径")
+    args = parser.parse_args()
+
+    with open(args.case_file, encoding="utf-8") as f:
+        py_list = [line.strip() for line in f if line.strip()]
+    executor = ForkServerExecutor(
+        testing=args.testing,
+        max_parallel=args.max_parallel,
+        device_list=[int(x) for x in args.device_list.split(",") if x.strip()],
+        timeout=args.timeout,
+        report_dir=args.report_dir,
+    )
+    executor.run(py_list=py_list)
+    executor.dump(filename=args.result_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+精度ground truth存储: 以子图内容hash + 测试执行器为key, 保存为可mmap的原始数组blob,
+后台并行预取到本地缓存, 缓存超出上限时按最近访问时间淘汰
+"""
+
+import os
+import json
+import struct
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pltools.logger import Logger
+from pltools.res_save import download_sth
+from pltools.case_select import CaseIndex
+
+GT_SUFFIX = ".pltgt"
+# 旧版按子图名称以paddle.save/torch.save保存的真值
+LEGACY_SUFFIX = ".tensor"
+GT_MAGIC = b"PLTGT01\n"
+# 每个数组在blob中按该字节数对齐, 便于mmap后直接view
+GT_ALIGN = 64
+
+
+def _is_framework_tensor(value):
+    """
+    判断是否为paddle/torch tensor, 不主动导入框架
+    """
+    module = type(value).__module__
+    return (module.startswith("paddle") or module.startswith("torch")) and hasattr(value, "numpy")
+
+
+def _to_numpy(value):
+    """
+    tensor转换为numpy数组
+    """
+    if isinstance(value, np.ndarray):
+        return value
+    if hasattr(value, "detach"):
+        value = value.detach()
+        if hasattr(value, "cpu"):
+            value = value.cpu()
+    return np.asarray(value.numpy())
+
+
+def _encode(data, arrays):
+    """
+    将嵌套结构编码为json, tensor替换为数组编号并收集到arrays
+    """
+    if isinstance(data, np.ndarray) or _is_framework_tensor(data):
+        arrays.append(np.ascontiguousarray(_to_numpy(data)))
+        return {"__array__": len(arrays) - 1}
+    if isinstance(data, np.generic):
+        return data.item()
+    if data is None or isinstance(data, (bool, int, float, str)):
+        return data
+    if isinstance(data, dict):
+        return {"__dict__": [[key, _encode(value, arrays)] for key, value in data.items()]}
+    if isinstance(data, tuple):
+        return {"__tuple__": [_encode(value, arrays) for value in data]}
+    if isinstance(data, list):
+        return {"__list__": [_encode(value, arrays) for value in data]}
+    raise TypeError(f"ground truth不支持保存的数据类型: {type(data)}")
+
+
+def _decode(node, arrays):
+    """
+    json解码为嵌套结构, 数组编号替换为mmap数组
+    """
+    if not isinstance(node, dict):
+        return node
+    if "__array__" in node:
+        return arrays[node["__array__"]]
+    if "__dict__" in node:
+        return {key: _decode(value, arrays) for key, value in node["__dict__"]}
+    if "__tuple__" in node:
+        return tuple(_decode(value, arrays) for value in node["__tuple__"])
+    return [_decode(value, arrays) for value in node["__list__"]]
+
+
+def save_gt(data, filename):
+    """
+    保存ground truth blob: magic + header长度 + json header + 按GT_ALIGN对齐的原始数组
+    """
+    arrays = []
+    tree = _encode(data, arrays)
+    leaves = []
+    offset = 0
+    for array in arrays:
+        offset = (offset + GT_ALIGN - 1) // GT_ALIGN * GT_ALIGN
+        leaves.append({"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset += array.nbytes
+    header = json.dumps({"tree": tree, "leaves": leaves}).encode("utf-8")
+    data_start = len(GT_MAGIC) + 8 + len(header)
+    data_start = (data_start + GT_ALIGN - 1) // GT_ALIGN * GT_ALIGN
+
+    tmp_file = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(GT_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for leaf, array in zip(leaves, arrays):
+            f.seek(data_start + leaf["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_file, filename)
+
+
+def load_gt(filename):
+    """
+    加载ground truth blob, 数组均为只读mmap, 对比时按需读取
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(GT_MAGIC)) != GT_MAGIC:
+            raise ValueError(f"{filename} 不是有效的ground truth文件")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = (len(GT_MAGIC) + 8 + header_len + GT_ALIGN - 1) // GT_ALIGN * GT_ALIGN
+
+    arrays = []
+    buffer = None
+    if os.path.getsize(filename) > data_start:
+        buffer = np.memmap(filename, dtype=np.uint8, mode="r", offset=data_start)
+    for leaf in header["leaves"]:
+        dtype = np.dtype(leaf["dtype"])
+        count = int(np.prod(leaf["shape"], dtype=np.int64))
+        nbytes = count * dtype.itemsize
+        if nbytes == 0:
+            arrays.append(np.empty(leaf["shape"], dtype=dtype))
+            continue
+        raw = buffer[leaf["offset"] : leaf["offset"] + nbytes]
+        arrays.append(raw.view(dtype).reshape(leaf["shape"]))
+    return _decode(header["tree"], arrays)
+
+
+class LocalObjectStore(object):
+    """
+    本地目录形式的对象存储, 目录结构与远端一致: <root>/<testing>/<case_hash>.pltgt
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def fetch(self, key, output_path):
+        """
+        拉取对象到本地路径, 对象不存在时抛出FileNotFoundError
+        """
+        src = os.path.join(self.root, key)
+        if not os.path.exists(src):
+            raise FileNotFoundError(src)
+        shutil.copyfile(src, output_path)
+
+
+class HttpObjectStore(object):
+    """
+    http(s)对象存储, 例如bos
+    """
+
+    def __init__(self, root):
+        self.root = root.rstrip("/")
+
+    def fetch(self, key, output_path):
+        """
+        拉取对象到本地路径
+        """
+        download_sth(gt_url=f"{self.root}/{key}", output_path=output_path)
+
+
+def open_object_store(url):
+    """
+    根据url选择对象存储: http(s)为远端, 否则视为本地目录
+    """
+    if url.startswith("http://") or url.startswith("https://"):
+        return HttpObjectStore(url)
+    return LocalObjectStore(url)
+
+
+class GroundTruthStore(object):
+    """
+    ground truth本地缓存 + 对象存储后台预取
+    本地缓存结构: <cache_dir>/<device>/<testing>/<case_hash>.pltgt
+    """
+
+    def __init__(self, cache_dir=None, download_url=None, max_cache_mb=None, workers=None):
+        """
+        init
+        :param cache_dir: 本地缓存路径, 默认读取PLT_GT_CACHE
+        :param download_url: 对象存储url或本地目录, 最后一级为设备名, 默认读取PLT_GT_DOWNLOAD_URL
+        :param max_cache_mb: 本地缓存上限(MB), 默认读取PLT_GT_CACHE_MAX_MB, 0表示不限
+        :param workers: 后台预取线程数, 默认读取PLT_GT_PREFETCH_WORKERS
+        """
+        self.cache_dir = cache_dir or os.environ.get("PLT_GT_CACHE", "plt_gt_baseline")
+        download_url = download_url or os.environ.get("PLT_GT_DOWNLOAD_URL", "None")
+        self.download_url = None if download_url == "None" else download_url.rstrip("/")
+        self.max_cache_bytes = int(float(max_cache_mb or os.environ.get("PLT_GT_CACHE_MAX_MB", "0")) * 1024 * 1024)
+        self.workers = int(workers or os.environ.get("PLT_GT_PREFETCH_WORKERS", "8"))
+        self.logger = Logger("PLTGroundTruth")
+        self.store = open_object_store(self.download_url) if self.download_url else None
+        self.store_device = self.download_url.split("/")[-1] if self.download_url else None
+        self._hash_cache = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = {}
+
+    def case_hash(self, layerfile):
+        """
+        子图内容hash, 子图有改动后自动对应新的ground truth
+        """
+        if layerfile not in self._hash_cache:
+            self._hash_cache[layerfile] = CaseIndex.file_hash(layerfile)
+        return self._hash_cache[layerfile]
+
+    def key(self, layerfile, testing):
+        """
+        对象存储中的相对路径
+        """
+        return f"{testing}/{self.case_hash(layerfile)}{GT_SUFFIX}"
+
+    def cache_path(self, layerfile, testing, device):
+        """
+        本地缓存路径
+        """
+        return os.path.join(self.cache_dir, device, self.key(layerfile, testing))
+
+    @staticmethod
+    def case_name(layerfile):
+        """
+        旧版真值使用的子图名称, 与LayerTest.title一致
+        """
+        return layerfile.replace(".py", "").replace("/", "^").replace(".", "^")
+
+    def legacy_key(self, layerfile, testing):
+        """
+        旧版真值在对象存储中的相对路径: <testing>/<case_name>.tensor
+        """
+        return f"{testing}/{self.case_name(layerfile)}{LEGACY_SUFFIX}"
+
+    def legacy_path(self, layerfile, testing, device):
+        """
+        旧版真值本地路径, 与原先run.py下载的位置一致
+        """
+        return os.path.join(self.cache_dir, device, self.legacy_key(layerfile, testing))
+
+    def _download(self, key, path):
+        """
+        从对象存储拉取单个对象到本地路径, 已存在时直接返回
+        """
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            self.store.fetch(key, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _fetch(self, layerfile, testing):
+        """
+        拉取单个ground truth到本地缓存, 对象存储中没有.pltgt时回退拉取旧版<case_name>.tensor
+        :return: 本地路径, .pltgt或.tensor
+        """
+        try:
+            return self._download(self.key(layerfile, testing), self.cache_path(layerfile, testing, self.store_device))
+        except Exception as e:
+            self.logger.get_log().info(f"{layerfile} 在 {testing} 下没有plt_gt({e}), 尝试旧版{LEGACY_SUFFIX}")
+        return self._download(
+            self.legacy_key(layerfile, testing), self.legacy_path(layerfile, testing, self.store_device)
+        )
+
+    def _prefetch_one(self, layerfile, testing):
+        """
+        后台预取任务, 失败仅记录日志, 真正使用时会再次尝试
+        """
+        try:
+            return self._fetch(layerfile, testing)
+        except Exception as e:
+            self.logger.get_log().warning(f"预取plt_gt失败: {layerfile} {testing}, {e}")
+            return None
+
+    def prefetch(self, py_list, testings):
+        """
+        按子图执行顺序在后台并行预取, 立即返回, 前面的子图可以在预取未完成时开始执行
+        :param py_list: 子图py文件路径list
+        :param testings: 测试执行器名称list
+        """
+        if self.store is None:
+            return
+        self.evict()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="plt_gt_prefetch")
+        for layerfile in py_list:
+            for testing in testings:
+                future = self._executor.submit(self._prefetch_one, layerfile, testing)
+                with self._lock:
+                    self._futures[(layerfile, testing)] = future
+        self.logger.get_log().info(f"后台预取plt_gt: {len(py_list)}个子图 x {len(testings)}个执行器")
+
+    def wait(self):
+        """
+        等待后台预取全部完成并关闭线程池, fork子进程之前须调用, 避免子进程继承正在运行的预取线程及其持有的锁
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.evict()
+
+    def locate(self, layerfile, testing, device):
+        """
+        定位本地ground truth: 优先本地缓存, 预取中则等待, 否则同步拉取
+        :return: 本地路径, 旧版真值为.tensor后缀, 需由调用方以paddle/torch加载
+        """
+        path = self.cache_path(layerfile, testing, device)
+        legacy_path = self.legacy_path(layerfile, testing, device)
+        if not os.path.exists(path) and not os.path.exists(legacy_path):
+            with self._lock:
+                future = self._futures.get((layerfile, testing))
+            if future is not None:
+                future.result()
+            elif self.store is not None and device == self.store_device:
+                try:
+                    self._fetch(layerfile, testing)
+                except Exception as e:
+                    self.logger.get_log().warning(f"拉取plt_gt失败: {layerfile} {testing}, {e}")
+        if os.path.exists(path):
+            # 更新访问时间, 淘汰时保留最近使用的
+            os.utime(path, None)
+            return path
+        if os.path.exists(legacy_path):
+            return legacy_path
+        raise FileNotFoundError(f"未找到 {layerfile} 在 {device}/{testing} 下的plt_gt: {path}")
+
+    def load(self, layerfile, testing, device):
+        """
+        加载.pltgt格式的ground truth, 见locate
+        :return: 嵌套结构, 数组为只读mmap
+        """
+        path = self.locate(layerfile, testing, device)
+        if not path.endswith(GT_SUFFIX):
+            raise FileNotFoundError(f"{layerfile} 在 {device}/{testing} 下只有旧版真值: {path}")
+        return load_gt(path)
+
+    def save(self, data, layerfile, testing, device, root="plt_gt"):
+        """
+        保存ground truth, 结构与对象存储一致, 供上传: <root>/<device>/<testing>/<case_hash>.pltgt
+        """
+        path = os.path.join(root, device, self.key(layerfile, testing))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_gt(data, path)
+        return path
+
+    def evict(self):
+        """
+        本地缓存超出上限时, 按最近访问时间淘汰
+        """
+        if self.max_cache_bytes <= 0 or not os.path.exists(self.cache_dir):
+            return
+        files = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(GT_SUFFIX):
+                    path = os.path.join(dirpath, filename)
+                    stat = os.stat(path)
+                    files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        total = sum(item[1] for item in files)
+        if total <= self.max_cache_bytes:
+            return
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_cache_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        self.logger.get_log().info(f"plt_gt本地缓存超出上限, 淘汰{evicted}个文件, 当前{total / 1024 / 1024:.1f}MB")
@@ -0,0 +1,230 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+性能计时核心: perf_counter_ns计时, 稳态预热检测, 置信区间自适应停止, 离群值剔除
+"""
+
+import os
+import math
+import time
+
+from pltools.res_save import save_pickle
+from pltools.statistics import STATIS_MAP, Q1_Q4_range, percentile, perf_by_step
+
+
+class PerfTimer(object):
+    """
+    性能计时器
+    """
+
+    def __init__(
+        self,
+        sync=None,
+        timeit_num=1,
+        max_repeat=None,
+        min_repeat=None,
+        ci_target=None,
+        warmup_max=None,
+        warmup_window=10,
+        warmup_tol=0.05,
+        batch=10,
+    ):
+        """
+        init
+        :param sync: 设备同步函数, 每个计时样本结束前调用, None表示无需同步
+        :param timeit_num: 每个样本内连续执行的次数
+        :param max_repeat: 最大样本数, 默认读取PLT_BM_REPEAT
+        :param min_repeat: 最小样本数, 默认读取PLT_BM_MIN_REPEAT
+        :param ci_target: 95%置信区间半宽/均值 小于该值时停止, 默认读取PLT_BM_CI_TARGET, 设为0表示固定跑满max_repeat
+        :param warmup_max: 最大预热样本数, 默认读取PLT_BM_WARMUP_MAX
+        :param warmup_window: 稳态检测窗口大小
+        :param warmup_tol: 相邻窗口中位数相对变化小于该值视为进入稳态
+        :param batch: 每执行batch个样本检查一次置信区间
+        """
+        self.sync = sync
+        self.timeit_num = int(timeit_num)
+        self.max_repeat = int(max_repeat or os.environ.get("PLT_BM_REPEAT", "100"))
+        self.min_repeat = min(int(min_repeat or os.environ.get("PLT_BM_MIN_REPEAT", "30")), self.max_repeat)
+        self.ci_target = float(ci_target if ci_target is not None else os.environ.get("PLT_BM_CI_TARGET", "0.01"))
+        self.warmup_max = int(warmup_max or os.environ.get("PLT_BM_WARMUP_MAX", "100"))
+        self.warmup_window = int(warmup_window)
+        self.warmup_tol = float(warmup_tol)
+        self.batch = int(batch)
+        self.warmup_num = 0
+
+    def _sample(self, func):
+        """
+        单个计时样本(s)
+        """
+        start = time.perf_counter_ns()
+        for _ in range(self.timeit_num):
+            func()
+        if self.sync is not None:
+            self.sync()
+        return (time.perf_counter_ns() - start) / 1e9
+
+    def warmup(self, func):
+        """
+        预热直到稳态: 相邻两个窗口的中位数相对变化小于warmup_tol, 或达到warmup_max
+        :return: 预热样本数
+        """
+        last_median = None
+        self.warmup_num = 0
+        while self.warmup_num < self.warmup_max:
+            window = [self._sample(func) for _ in range(self.warmup_window)]
+            self.warmup_num += self.warmup_window
+            window_median = percentile(window, 50)
+            if last_median is not None and abs(window_median - last_median) <= self.warmup_tol * last_median:
+                break
+            last_median = window_median
+        return self.warmup_num
+
+    def converged(self, samples):
+        """
+        剔除离群值后, 95%置信区间半宽/均值是否已小于ci_target
+        """
+        if self.ci_target <= 0 or len(samples) < self.min_repeat:
+            return False
+        filtered = reject_outliers(samples)
+        if len(filtered) < 2:
+            return False
+        mean_v = sum(filtered) / len(filtered)
+        if mean_v <= 0:
+            return True
+        return ci_half_width(filtered) / mean_v < self.ci_target
+
+    def measure(self, func):
+        """
+        预热后采样, 置信区间足够窄或达到max_repeat时停止
+        :param func: 无参可调用对象
+        :return: 样本list(s)
+        """
+        self.warmup(func)
+        samples = []
+        while len(samples) < self.max_repeat:
+            for _ in range(min(self.batch, self.max_repeat - len(samples))):
+                samples.append(self._sample(func))
+            if self.converged(samples):
+                break
+        return samples
+
+
+def reject_outliers(samples):
+    """
+    按四分位距剔除离群值
+    """
+    if len(samples) < 4:
+        return list(samples)
+    lower_bound, upper_bound = Q1_Q4_range(samples)
+    return [x for x in samples if lower_bound <= x <= upper_bound]
+
+
+def ci_half_width(samples, z=1.96):
+    """
+    均值的95%置信区间半宽
+    """
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_v = sum(samples) / n
+    std = math.sqrt(sum((x - mean_v) ** 2 for x in samples) / (n - 1))
+    return z * std / math.sqrt(n)
+
+
+def perf_summary(samples, statis="trimmean", scale=1, ndigits=6, warmup_num=0):
+    """
+    汇总耗时分布
+    :param samples: 样本list(s)
+    :param statis: 主结果的统计策略, trimmean, mean, median, best, best_top_k
+    :param scale: 结果缩放倍数, 与历史基线保持同一量纲
+    :param ndigits: 保留小数位
+    :return: dict, value为主结果, 其余为剔除离群值后的分布信息
+    """
+    filtered = reject_outliers(samples) or list(samples)
+    n = len(filtered)
+    mean_v = sum(filtered) / n
+    std = math.sqrt(sum((x - mean_v) ** 2 for x in filtered) / (n - 1)) if n > 1 else 0.0
+    half = ci_half_width(filtered)
+
+    def _fmt(x):
+        return round(x * scale, ndigits)
+
+    return {
+        "value": _fmt(STATIS_MAP[statis](data_list=filtered)),
+        "statis": statis,
+        "median": _fmt(percentile(filtered, 50)),
+        "p90": _fmt(percentile(filtered, 90)),
+        "p99": _fmt(percentile(filtered, 99)),
+        "mean": _fmt(mean_v),
+        "best": _fmt(min(filtered)),
+        "ci_low": _fmt(mean_v - half),
+        "ci_high": _fmt(mean_v + half),
+        "cv": round(std / mean_v, 4) if mean_v > 0 else 0.0,
+        "repeat": len(samples),
+        "outliers": len(samples) - n,
+        "warmup": warmup_num,
+    }
+
+
+def measure_perf(
+    func,
+    perf_name,
+    layerfile,
+    sync=None,
+    timeit_num=1,
+    max_repeat=None,
+    perf_repeat=None,
+    statis="trimmean",
+    scale=1,
+    ndigits=6,
+    cpu_threads=None,
+    logger=None,
+):
+    """
+    稳态预热 + 自适应轮次计时, 返回耗时分布, LayerEvalBM与LayerTrainBM共用
+    :param func: 无参可调用对象, 执行一次评估或训练
+    :param perf_name: 引擎名称, 用于日志与PLT_BM_PLOT落盘文件名
+    :param layerfile: 子图路径, 用于PLT_BM_PLOT落盘文件名
+    :param sync: 设备同步函数, None表示无需同步
+    :param timeit_num: 每个样本内连续执行的次数
+    :param max_repeat: 自适应停止的最大样本数, 默认读取PLT_BM_REPEAT
+    :param perf_repeat: 固定计时轮次(仅做简单预热), None时按max_repeat自适应停止
+    :param statis: 主结果的统计策略, 对应PLT_BM_STATIS
+    :param scale: 结果缩放倍数
+    :param ndigits: 保留小数位
+    :param cpu_threads: CPU执行的线程数, 非None时记入结果
+    :param logger: Logger, None时不打印
+    :return: dict, value为statis策略下的主结果
+    """
+    timer = PerfTimer(
+        sync=sync,
+        timeit_num=timeit_num,
+        max_repeat=perf_repeat or max_repeat,
+        min_repeat=perf_repeat,
+        warmup_max=10 if perf_repeat else None,
+    )
+    total_time_list = timer.measure(func)
+
+    if os.environ.get("PLT_BM_PLOT") == "True":
+        save_pickle(data=total_time_list, filename=perf_name + "_" + layerfile)
+        # 画图
+        perf_by_step(
+            data_list=total_time_list,
+            step_scale=[0.1, 0.5, 1],
+            filename=perf_name + "_" + layerfile + "_by_step",
+        )
+
+    time_res = perf_summary(
+        total_time_list,
+        statis=statis,
+        scale=scale,
+        ndigits=ndigits,
+        warmup_num=timer.warmup_num,
+    )
+    if cpu_threads:
+        time_res["cpu_threads"] = cpu_threads
+    if logger is not None:
+        logger.get_log().info(f"{perf_name} 耗时分布: {time_res}")
+    return time_res
@@ -37,7 +37,13 @@ def xlsx_save(sublayer_dict, excel_file):
     for key, sub_dict in sublayer_dict.items():
         row = {"sub_layer": key}
         for subkey, value in sub_dict.items():
-            row[subkey] = value
+            if isinstance(value, dict):  # 耗时分布dict展开为多列, 主值保留在原列
+                row[subkey] = value.get("value")
+                for stat_key, stat_value in value.items():
+                    if stat_key != "value":
+                        row[subkey + "^" + stat_key] = stat_value
+            else:
+                row[subkey] = value
         data.append(row)
 
     # 创建 DataFrame
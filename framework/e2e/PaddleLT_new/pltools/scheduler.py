@@ -0,0 +1,180 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+基于历史耗时的多设备调度: 最长耗时优先(LPT)装箱 + 设备间任务窃取
+"""
+
+import os
+import json
+import multiprocessing
+
+
+class CaseHistory(object):
+    """
+    子图历史执行记录, 按测试配置yml分别保存每个子图的耗时与峰值显存
+    """
+
+    def __init__(self, testing, filename=None, smooth=0.5):
+        """
+        init
+        :param testing: 测试配置yml路径
+        :param filename: 历史记录json文件, 默认读取环境变量PLT_CASE_HISTORY
+        :param smooth: 耗时的指数滑动平均系数, 越大越偏向最新一次耗时
+        """
+        self.testing = testing
+        self.filename = filename or os.environ.get("PLT_CASE_HISTORY", "plt_case_history.json")
+        self.smooth = smooth
+        self.history = {}
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, "r") as f:
+                    self.history = json.load(f)
+            except (OSError, ValueError):
+                self.history = {}
+        self.cases = self.history.setdefault(self.testing, {})
+
+    def expected_duration(self, py_file, default=None):
+        """
+        子图预期耗时(s), 无记录时返回default, default为None时取已有记录的中位数
+        """
+        if py_file in self.cases:
+            return self.cases[py_file]["duration"]
+        if default is not None:
+            return default
+        durations = sorted(item["duration"] for item in self.cases.values())
+        if not durations:
+            return 1.0
+        return durations[len(durations) // 2]
+
+    def record(self, py_file, duration, peak_memory=None):
+        """
+        记录单个子图本次执行结果
+        :param duration: 本次耗时(s)
+        :param peak_memory: 本次峰值显存(MB), 无法获取时为None
+        """
+        item = self.cases.get(py_file)
+        if item is None:
+            item = {"duration": duration, "peak_memory": peak_memory, "runs": 0}
+        else:
+            item["duration"] = self.smooth * duration + (1 - self.smooth) * item["duration"]
+            if peak_memory is not None:
+                item["peak_memory"] = max(peak_memory, item.get("peak_memory") or 0)
+        item["last_duration"] = duration
+        item["runs"] += 1
+        self.cases[py_file] = item
+
+    def save(self):
+        """
+        保存历史记录
+        """
+        tmp_file = self.filename + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.history, f, indent=1)
+        os.replace(tmp_file, self.filename)
+
+
+def lpt_split(py_list, n, history):
+    """
+    最长耗时优先装箱: 子图按预期耗时降序, 依次放入当前总耗时最小的分组
+    :param py_list: 子图py文件路径list
+    :param n: 分组数(设备数)
+    :param history: CaseHistory
+    :return: (分组list, 每组预期总耗时list), 每个分组内子图按预期耗时降序
+    """
+    if not isinstance(py_list, list) or not isinstance(n, int) or len(py_list) == 0 or n <= 0:
+        return [], []
+    default = history.expected_duration(None)
+    ordered = sorted(py_list, key=lambda x: history.expected_duration(x, default), reverse=True)
+    res = [[] for _ in range(n)]
+    loads = [0.0] * n
+    for py_file in ordered:
+        index = loads.index(min(loads))
+        res[index].append(py_file)
+        loads[index] += history.expected_duration(py_file, default)
+    return res, loads
+
+
+class WorkStealingQueues(object):
+    """
+    每个设备一个任务队列, 设备自身队列为空时从剩余预期耗时最多的设备队列中窃取任务
+    需在fork子进程之前创建
+    """
+
+    def __init__(self, groups, history):
+        """
+        init
+        :param groups: lpt_split产出的分组list
+        :param history: CaseHistory
+        """
+        default = history.expected_duration(None)
+        self.queues = []
+        self.remaining = multiprocessing.Array("d", len(groups))
+        # 每个队列中尚未被领取的任务数, 以计数而非queue.Empty判断队列是否取完
+        # (Queue.get超时可能只是feeder线程尚未写入管道, 并不代表队列为空)
+        self.pending = multiprocessing.Array("i", len(groups), lock=self.remaining.get_lock())
+        for i, group in enumerate(groups):
+            q = multiprocessing.Queue()
+            for py_file in group:
+                cost = history.expected_duration(py_file, default)
+                q.put((py_file, cost))
+                self.remaining[i] += cost
+                self.pending[i] += 1
+            self.queues.append(q)
+
+    def _take(self, index):
+        """
+        从指定设备队列中取出一个任务, 先在计数上占位再阻塞读取, 占位成功则队列中必有对应任务
+        """
+        with self.remaining.get_lock():
+            if self.pending[index] <= 0:
+                return None
+            self.pending[index] -= 1
+        py_file, cost = self.queues[index].get()
+        with self.remaining.get_lock():
+            self.remaining[index] = max(self.remaining[index] - cost, 0.0)
+        return py_file
+
+    def next_case(self, index):
+        """
+        获取设备index的下一个子图, 全部队列为空时返回(None, False)
+        :return: (py_file, 是否为窃取任务)
+        """
+        py_file = self._take(index)
+        if py_file is not None:
+            return py_file, False
+        victims = sorted(
+            [i for i in range(len(self.queues)) if i != index], key=lambda i: self.remaining[i], reverse=True
+        )
+        for victim in victims:
+            if self.pending[victim] <= 0:
+                continue
+            py_file = self._take(victim)
+            if py_file is not None:
+                return py_file, True
+        return None, False
+
+
+def makespan_report(device_elapsed, expected_loads=None):
+    """
+    汇总各设备实际耗时, 用于观察设备间负载是否均衡
+    :param device_elapsed: {设备: 实际总耗时(s)}
+    :param expected_loads: {设备: 调度时预期总耗时(s)}
+    :return: dict
+    """
+    if not device_elapsed:
+        return {}
+    makespan = max(device_elapsed.values())
+    mean_elapsed = sum(device_elapsed.values()) / len(device_elapsed)
+    report = {
+        "makespan": round(makespan, 2),
+        "min_device_elapsed": round(min(device_elapsed.values()), 2),
+        "mean_device_elapsed": round(mean_elapsed, 2),
+        # 最慢设备相对平均耗时的比例, 1.0表示完全均衡
+        "imbalance": round(makespan / mean_elapsed, 3) if mean_elapsed > 0 else 1.0,
+        "device_elapsed": {str(k): round(v, 2) for k, v in device_elapsed.items()},
+    }
+    if expected_loads:
+        report["expected_device_load"] = {str(k): round(v, 2) for k, v in expected_loads.items()}
+    return report
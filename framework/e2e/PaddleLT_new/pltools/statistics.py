@@ -54,6 +54,34 @@ def best_top_k(data_list, ratio=0.2):
     return res
 
 
+def percentile(data_list, q):
+    """
+    求分位数, 线性插值
+    :param data_list: 输入的data list, 多次试验的结果集合
+    :param q: 分位, 0~100
+    """
+    res = float(np.percentile(data_list, q))
+    return res
+
+
+def median(data_list):
+    """
+    求中位数
+    :param data_list: 输入的data list, 多次试验的结果集合
+    """
+    return percentile(data_list, 50)
+
+
+# 统计策略名称 -> 计算函数, 对应环境变量PLT_BM_STATIS
+STATIS_MAP = {
+    "trimmean": trimmean,
+    "mean": mean,
+    "median": median,
+    "best": best,
+    "best_top_k": best_top_k,
+}
+
+
 # list等分
 def split_list(lst, n):
     """
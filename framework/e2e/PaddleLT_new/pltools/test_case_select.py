@@ -0,0 +1,122 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+CaseSelect、filter_cases与CaseIndex测试
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pltools.case_select import CaseIndex, CaseSelect, filter_cases, ordered_dedup  # noqa: E402
+
+
+def _write(path, text):
+    """
+    写入文件并返回路径
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def _index(tmp_path, testing):
+    """
+    索引文件为<tmp>/index.json
+    """
+    return CaseIndex(testing=testing, filename=str(tmp_path / "index.json"))
+
+
+def test_get_py_list(tmp_path):
+    """
+    递归收集子图, 跳过__init__.py、utils.py、非py文件与ignore_list
+    """
+    keep = _write(tmp_path / "layercase" / "Clas_cases" / "a.py", "")
+    ignored = _write(tmp_path / "layercase" / "Clas_cases" / "b.py", "")
+    _write(tmp_path / "layercase" / "__init__.py", "")
+    _write(tmp_path / "layercase" / "Clas_cases" / "utils.py", "")
+    _write(tmp_path / "layercase" / "Clas_cases" / "c.yml", "")
+    py_list = CaseSelect(dirpath=str(tmp_path), ignore_list=[ignored]).get_py_list(str(tmp_path))
+    assert py_list == [keep]
+
+
+def test_ordered_dedup_and_filter():
+    """
+    保序去重, glob与标签筛选
+    """
+    raw_list = [
+        "layercase/sublayer1000/Clas_cases/DLA_DLA102/SIR_1.py",
+        "layercase/sublayer1000/Det_cases/yolo/SIR_2.py",
+        "layercase/sublayer1000/Clas_cases/DLA_DLA102/SIR_1.py",
+        "layercase/sublayer160/Ocr_cases/rec/SIR_3.py",
+    ]
+    py_list = ordered_dedup(raw_list)
+    assert py_list == [raw_list[0], raw_list[1], raw_list[3]]
+    assert filter_cases(py_list, globs=["layercase/sublayer1000/*"]) == py_list[:2]
+    assert filter_cases(py_list, tags=["Det_cases", "Ocr_cases"]) == py_list[1:]
+    assert filter_cases(py_list, globs=["layercase/sublayer1000/*"], tags=["Ocr_cases"]) == []
+    assert filter_cases(py_list) == py_list
+
+
+def test_case_index_impacted(tmp_path):
+    """
+    无记录、上次失败、子图或测试配置有改动时需要执行
+    """
+    testing = _write(tmp_path / "yaml" / "test.yml", "a: 1\n")
+    case_a = _write(tmp_path / "layercase" / "a.py", "a = 1\n")
+    case_b = _write(tmp_path / "layercase" / "b.py", "b = 1\n")
+    index = _index(tmp_path, testing)
+    assert index.impacted([case_a, case_b]) == [case_a, case_b]
+
+    index.update(py_list=[case_a, case_b], error_list=[case_b], durations={case_a: 1.5})
+    assert index.impacted([case_a, case_b]) == [case_b]
+    assert index.index[case_a]["results"][testing]["duration"] == 1.5
+
+    # 子图内容改动
+    _write(tmp_path / "layercase" / "a.py", "a = 2\n")
+    assert _index(tmp_path, testing).is_impacted(case_a)
+    _write(tmp_path / "layercase" / "a.py", "a = 1\n")
+
+    # 测试配置改动
+    index.save()
+    assert _index(tmp_path, testing).impacted([case_a, case_b]) == [case_b]
+    _write(tmp_path / "yaml" / "test.yml", "a: 2\n")
+    assert _index(tmp_path, testing).impacted([case_a, case_b]) == [case_a, case_b]
+
+    # 其他测试配置无记录
+    other = _write(tmp_path / "yaml" / "other.yml", "b: 1\n")
+    assert _index(tmp_path, other).is_impacted(case_a)
+
+
+def test_case_index_update_keeps_duration(tmp_path):
+    """
+    未给出耗时时保留上次耗时, 已删除的子图不记录
+    """
+    testing = _write(tmp_path / "test.yml", "a: 1\n")
+    case_a = _write(tmp_path / "a.py", "a = 1\n")
+    index = _index(tmp_path, testing)
+    index.update(py_list=[case_a], error_list=[], durations={case_a: 2.0})
+    index.update(py_list=[case_a, str(tmp_path / "removed.py")], error_list=[])
+    assert index.index[case_a]["results"][testing] == {
+        "status": "pass",
+        "testing_hash": index.testing_hash,
+        "duration": 2.0,
+    }
+    assert list(index.index) == [case_a]
+
+
+def test_case_index_broken_file(tmp_path):
+    """
+    索引文件损坏时视为空索引, save原子替换
+    """
+    (tmp_path / "index.json").write_text("{broken")
+    testing = _write(tmp_path / "test.yml", "a: 1\n")
+    case_a = _write(tmp_path / "a.py", "a = 1\n")
+    index = _index(tmp_path, testing)
+    assert index.index == {}
+    index.update(py_list=[case_a], error_list=[])
+    index.save()
+    assert not os.path.exists(str(tmp_path / "index.json.tmp"))
+    assert not _index(tmp_path, testing).is_impacted(case_a)
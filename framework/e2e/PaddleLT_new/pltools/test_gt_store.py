@@ -0,0 +1,100 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+GroundTruthStore测试, 以本地目录作为对象存储
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pltools.gt_store import GroundTruthStore, load_gt, save_gt  # noqa: E402
+
+
+@pytest.fixture
+def case_file(tmp_path):
+    """
+    子图文件
+    """
+    path = tmp_path / "layercase" / "net_0.py"
+    path.parent.mkdir()
+    path.write_text("class LayerCase(object):\n    pass\n")
+    return str(path)
+
+
+def _store(tmp_path):
+    """
+    远端为<tmp>/remote/gpu, 本地缓存为<tmp>/cache
+    """
+    remote = tmp_path / "remote" / "gpu"
+    remote.mkdir(parents=True, exist_ok=True)
+    return GroundTruthStore(cache_dir=str(tmp_path / "cache"), download_url=str(remote), workers=2)
+
+
+def test_save_load_roundtrip(tmp_path):
+    """
+    嵌套结构保存后按mmap只读加载
+    """
+    data = {"logit": np.arange(6, dtype=np.float32).reshape(2, 3), "grad": (np.ones(3), None, 1.5), "empty": []}
+    filename = str(tmp_path / "a.pltgt")
+    save_gt(data, filename)
+    loaded = load_gt(filename)
+    np.testing.assert_array_equal(loaded["logit"], data["logit"])
+    assert loaded["logit"].dtype == np.float32
+    assert not loaded["logit"].flags.writeable
+    assert isinstance(loaded["grad"], tuple) and loaded["grad"][1:] == (None, 1.5)
+    assert loaded["empty"] == []
+
+
+def test_prefetch_and_load(tmp_path, case_file):
+    """
+    后台预取.pltgt后从本地缓存加载
+    """
+    store = _store(tmp_path)
+    remote_file = os.path.join(store.download_url, store.key(case_file, "dy_eval"))
+    os.makedirs(os.path.dirname(remote_file))
+    save_gt({"logit": np.ones(4)}, remote_file)
+
+    store.prefetch(py_list=[case_file], testings=["dy_eval"])
+    store.wait()
+    assert os.path.exists(store.cache_path(case_file, "dy_eval", "gpu"))
+    np.testing.assert_array_equal(store.load(case_file, "dy_eval", "gpu")["logit"], np.ones(4))
+
+
+def test_legacy_fallback(tmp_path, case_file):
+    """
+    对象存储中没有.pltgt时回退下载旧版<case_name>.tensor
+    """
+    store = _store(tmp_path)
+    legacy_file = os.path.join(store.download_url, store.legacy_key(case_file, "dy_eval"))
+    os.makedirs(os.path.dirname(legacy_file))
+    with open(legacy_file, "wb") as f:
+        f.write(b"legacy")
+
+    store.prefetch(py_list=[case_file], testings=["dy_eval"])
+    store.wait()
+    path = store.locate(case_file, "dy_eval", "gpu")
+    assert path == store.legacy_path(case_file, "dy_eval", "gpu")
+    assert path.endswith(os.path.join("gpu", "dy_eval", GroundTruthStore.case_name(case_file) + ".tensor"))
+    with pytest.raises(FileNotFoundError):
+        store.load(case_file, "dy_eval", "gpu")
+
+    # 未预取时同步拉取
+    store = _store(tmp_path / "other")
+    os.makedirs(os.path.join(store.download_url, "dy_eval"))
+    os.replace(legacy_file, os.path.join(store.download_url, store.legacy_key(case_file, "dy_eval")))
+    assert store.locate(case_file, "dy_eval", "gpu").endswith(".tensor")
+
+
+def test_missing(tmp_path, case_file):
+    """
+    两种格式均不存在时抛出FileNotFoundError
+    """
+    store = _store(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        store.locate(case_file, "dy_eval", "gpu")
@@ -0,0 +1,177 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+PerfTimer与耗时汇总测试, 以假时钟代替perf_counter_ns
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pltools import perf_timer  # noqa: E402
+from pltools.perf_timer import PerfTimer, ci_half_width, measure_perf, perf_summary, reject_outliers  # noqa: E402
+
+
+class _FakeClock(object):
+    """
+    假时钟: 每调用一次func, 时钟前进durations中的下一个耗时(s), 用尽后保持最后一个
+    """
+
+    def __init__(self, durations):
+        self.durations = list(durations)
+        self.now = 0
+        self.calls = 0
+
+    def perf_counter_ns(self):
+        """
+        当前时间(ns)
+        """
+        return self.now
+
+    def func(self):
+        """
+        被计时函数
+        """
+        duration = self.durations[min(self.calls, len(self.durations) - 1)]
+        self.now += int(duration * 1e9)
+        self.calls += 1
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    替换perf_timer使用的计时函数
+    """
+
+    def _clock(durations):
+        fake = _FakeClock(durations)
+        monkeypatch.setattr(perf_timer.time, "perf_counter_ns", fake.perf_counter_ns)
+        return fake
+
+    return _clock
+
+
+def test_sample_timeit_num_and_sync(clock):
+    """
+    每个样本连续执行timeit_num次, 结束前调用一次sync
+    """
+    fake = clock([0.001])
+    synced = []
+    timer = PerfTimer(sync=lambda: synced.append(1), timeit_num=3, max_repeat=5, min_repeat=5, warmup_max=1)
+    assert timer._sample(fake.func) == pytest.approx(0.003)
+    assert fake.calls == 3 and len(synced) == 1
+
+
+def test_warmup_until_steady(clock):
+    """
+    相邻窗口中位数变化小于warmup_tol时停止预热
+    """
+    fake = clock([0.01] * 5 + [0.001])
+    timer = PerfTimer(max_repeat=10, warmup_max=100, warmup_window=5, warmup_tol=0.05)
+    assert timer.warmup(fake.func) == 15
+    assert fake.calls == 15
+
+
+def test_warmup_max(clock):
+    """
+    始终未进入稳态时预热warmup_max个样本
+    """
+    fake = clock([0.001 * 2**i for i in range(40)])
+    timer = PerfTimer(max_repeat=10, warmup_max=20, warmup_window=5)
+    assert timer.warmup(fake.func) == 20
+
+
+def test_measure_converged(clock):
+    """
+    耗时稳定时达到min_repeat即停止
+    """
+    fake = clock([0.002])
+    timer = PerfTimer(max_repeat=100, min_repeat=30, ci_target=0.01, warmup_max=10, warmup_window=5, batch=10)
+    samples = timer.measure(fake.func)
+    assert len(samples) == 30
+    assert samples == pytest.approx([0.002] * 30)
+    assert timer.warmup_num == 10
+
+
+def test_measure_fixed_repeat(clock):
+    """
+    ci_target为0时固定跑满max_repeat, 末批不超出max_repeat
+    """
+    fake = clock([0.001, 0.003])
+    timer = PerfTimer(max_repeat=25, min_repeat=5, ci_target=0, warmup_max=5, warmup_window=5, batch=10)
+    assert len(timer.measure(fake.func)) == 25
+    assert not timer.converged([0.001] * 25)
+
+
+def test_outliers_and_ci():
+    """
+    按四分位距剔除离群值, 置信区间半宽
+    """
+    samples = [1.0, 1.1, 0.9, 1.0, 1.05, 0.95, 10.0]
+    assert reject_outliers(samples) == samples[:-1]
+    assert reject_outliers([1.0, 10.0]) == [1.0, 10.0]
+    assert ci_half_width([1.0]) == 0.0
+    assert ci_half_width([1.0, 3.0]) == pytest.approx(1.96)
+
+
+def test_perf_summary():
+    """
+    汇总结果按scale缩放, 离群值计数并剔除
+    """
+    samples = [0.001, 0.001, 0.001, 0.001, 0.1]
+    summary = perf_summary(samples, statis="mean", scale=1000, warmup_num=7)
+    assert summary["value"] == 1.0
+    assert summary["median"] == 1.0 and summary["best"] == 1.0
+    assert summary["ci_low"] == summary["ci_high"] == 1.0
+    assert summary["cv"] == 0.0
+    assert summary["repeat"] == 5 and summary["outliers"] == 1 and summary["warmup"] == 7
+
+
+class _FakeLogger(object):
+    """
+    记录日志内容
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def get_log(self):
+        """
+        get_log
+        """
+        return self
+
+    def info(self, msg):
+        """
+        info
+        """
+        self.lines.append(msg)
+
+
+def test_measure_perf(clock, monkeypatch):
+    """
+    固定轮次时跑满perf_repeat, 结果附带cpu_threads并打印日志
+    """
+    monkeypatch.delenv("PLT_BM_PLOT", raising=False)
+    fake = clock([0.001])
+    logger = _FakeLogger()
+    res = measure_perf(
+        fake.func,
+        perf_name="dy_eval_perf",
+        layerfile="layercase/net_0.py",
+        timeit_num=2,
+        max_repeat=100,
+        perf_repeat=12,
+        statis="mean",
+        scale=100,
+        cpu_threads=4,
+        logger=logger,
+    )
+    assert res["repeat"] == 12 and res["warmup"] == 10
+    assert res["value"] == 0.2 and res["cpu_threads"] == 4
+    assert fake.calls == (10 + 12) * 2
+    assert logger.lines == ["dy_eval_perf 耗时分布: {}".format(res)]
@@ -0,0 +1,153 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+CaseHistory、lpt_split与WorkStealingQueues测试
+"""
+
+import os
+import sys
+import queue
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pltools.scheduler import CaseHistory, WorkStealingQueues, lpt_split, makespan_report  # noqa: E402
+
+
+def _history(tmp_path, durations):
+    """
+    按给定耗时构造历史记录
+    """
+    history = CaseHistory(testing="yaml/test.yml", filename=str(tmp_path / "history.json"))
+    for py_file, duration in durations.items():
+        history.record(py_file=py_file, duration=duration)
+    return history
+
+
+class _LateQueue(object):
+    """
+    模拟feeder线程尚未写入管道: 带超时的get总是超时, 阻塞get才能取到
+    """
+
+    def __init__(self, items):
+        self.items = list(items)
+
+    def get(self, timeout=None):
+        """
+        get
+        """
+        if timeout is not None:
+            raise queue.Empty
+        return self.items.pop(0)
+
+
+def _drain(case_queues, index, result_queue):
+    """
+    子进程: 不断领取子图直至全部队列为空
+    """
+    taken = []
+    while True:
+        py_file, _ = case_queues.next_case(index)
+        if py_file is None:
+            break
+        taken.append(py_file)
+    result_queue.put(taken)
+
+
+def test_history_smooth_and_save(tmp_path):
+    """
+    耗时按滑动平均更新, 保存后可重新加载
+    """
+    history = _history(tmp_path, {"a.py": 10.0})
+    history.record(py_file="a.py", duration=20.0, peak_memory=5.0)
+    assert history.expected_duration("a.py") == 15.0
+    assert history.cases["a.py"]["runs"] == 2
+    history.save()
+
+    reloaded = CaseHistory(testing="yaml/test.yml", filename=str(tmp_path / "history.json"))
+    assert reloaded.cases["a.py"]["duration"] == 15.0
+    assert reloaded.cases["a.py"]["peak_memory"] == 5.0
+
+
+def test_history_default_is_median(tmp_path):
+    """
+    无记录的子图取已有记录的中位数
+    """
+    history = _history(tmp_path, {"a.py": 1.0, "b.py": 3.0, "c.py": 9.0})
+    assert history.expected_duration("new.py") == 3.0
+    empty = CaseHistory(testing="yaml/other.yml", filename=str(tmp_path / "empty.json"))
+    assert empty.expected_duration("new.py") == 1.0
+
+
+def test_lpt_split_balance(tmp_path):
+    """
+    LPT装箱后各组负载均衡, 且每个子图恰好出现一次
+    """
+    durations = {"case_%d.py" % i: float(i) for i in range(1, 11)}
+    history = _history(tmp_path, durations)
+    groups, loads = lpt_split(py_list=list(durations), n=3, history=history)
+    assert sorted(sum(groups, [])) == sorted(durations)
+    assert max(loads) - min(loads) <= 1.0
+    for group, load in zip(groups, loads):
+        assert sum(durations[py_file] for py_file in group) == load
+    assert lpt_split(py_list=[], n=3, history=history) == ([], [])
+
+
+def test_work_stealing_single_process(tmp_path):
+    """
+    本设备队列取完后从其他设备窃取, 全部取完返回(None, False)
+    """
+    history = _history(tmp_path, {"a.py": 1.0, "b.py": 2.0, "c.py": 3.0})
+    case_queues = WorkStealingQueues(groups=[["a.py"], ["b.py", "c.py"]], history=history)
+    assert case_queues.next_case(0) == ("a.py", False)
+    assert case_queues.next_case(0) == ("b.py", True)
+    assert case_queues.next_case(0) == ("c.py", True)
+    assert case_queues.next_case(0) == (None, False)
+    assert case_queues.next_case(1) == (None, False)
+    assert list(case_queues.remaining) == [0.0, 0.0]
+
+
+def test_work_stealing_no_lost_case(tmp_path):
+    """
+    多进程同时领取, 每个子图恰好被执行一次
+    创建后立即领取时feeder线程可能尚未写入管道, 不得误判为队列已空
+    """
+    py_list = ["case_%d.py" % i for i in range(200)]
+    history = _history(tmp_path, {})
+    groups = [py_list[:150], py_list[150:190], py_list[190:], []]
+    ctx = multiprocessing.get_context("fork")
+    case_queues = WorkStealingQueues(groups=groups, history=history)
+    result_queue = ctx.Queue()
+    processes = [ctx.Process(target=_drain, args=(case_queues, i, result_queue)) for i in range(4)]
+    for process in processes:
+        process.start()
+    taken = []
+    for _ in processes:
+        taken.extend(result_queue.get(timeout=60))
+    for process in processes:
+        process.join()
+    assert sorted(taken) == sorted(py_list)
+
+
+def test_work_stealing_late_queue(tmp_path):
+    """
+    Queue.get超时不代表队列已空, 以未领取计数为准
+    """
+    history = _history(tmp_path, {"a.py": 1.0, "b.py": 2.0})
+    case_queues = WorkStealingQueues(groups=[["a.py"], ["b.py"]], history=history)
+    case_queues.queues = [_LateQueue([("a.py", 1.0)]), _LateQueue([("b.py", 2.0)])]
+    assert case_queues.next_case(0) == ("a.py", False)
+    assert case_queues.next_case(0) == ("b.py", True)
+    assert case_queues.next_case(1) == (None, False)
+
+
+def test_makespan_report():
+    """
+    imbalance为最慢设备相对平均耗时的比例
+    """
+    report = makespan_report({0: 10.0, 1: 30.0}, {0: 20.0, 1: 20.0})
+    assert report["makespan"] == 30.0
+    assert report["imbalance"] == 1.5
+    assert report["expected_device_load"] == {"0": 20.0, "1": 20.0}
+    assert makespan_report({}) == {}
@@ -0,0 +1,260 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+常驻worker进程池: 每个worker只导入一次paddle, 从队列中领取子图并在进程内执行精度测试
+"""
+
+import os
+import time
+import queue
+import traceback
+import contextlib
+import collections
+import multiprocessing
+
+from pltools.logger import Logger
+from pltools.allure_result import write_allure_result
+
+
+def _close_logger(logger):
+    """
+    关闭logger持有的文件句柄, 避免常驻进程句柄泄漏
+    """
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+
+
+def execute_case(py_file, testing, report_dir):
+    """
+    在当前进程内执行单个子图精度测试, 并写入allure result json
+    :param py_file: 子图py文件路径
+    :param testing: 测试配置yml路径
+    :param report_dir: allure报告路径
+    :return: (status, duration), status为passed/failed/broken
+    """
+    import layertest
+
+    title = py_file.replace(".py", "").replace("/", "^").replace(".", "^")
+    start = time.time()
+    trace = ""
+    try:
+        single_test = layertest.LayerTest(title=title, layerfile=py_file, testing=testing, device_place_id=0)
+        try:
+            single_test._case_run()
+        finally:
+            _close_logger(single_test.logger.get_log())
+        status = "passed"
+    except AssertionError:
+        status = "failed"
+        trace = traceback.format_exc()
+    except Exception:
+        status = "broken"
+        trace = traceback.format_exc()
+    stop = time.time()
+
+    write_allure_result(
+        report_dir=report_dir,
+        title=title,
+        layerfile=py_file,
+        status=status,
+        start=start * 1000,
+        stop=stop * 1000,
+        trace=trace,
+    )
+    return status, stop - start
+
+
+@contextlib.contextmanager
+def _device_env(device_id):
+    """
+    在父进程中临时设置CUDA_VISIBLE_DEVICES
+    spawn子进程启动时会重新导入__main__(run.py), 在_worker_main之前就已导入paddle,
+    因此设备须在Process.start()时通过继承的环境变量传入, 仅在子进程内设置为时已晚
+    """
+    if device_id is None:
+        yield
+        return
+    origin = os.environ.get("CUDA_VISIBLE_DEVICES")
+    os.environ["CUDA_VISIBLE_DEVICES"] = str(device_id)
+    try:
+        yield
+    finally:
+        if origin is None:
+            os.environ.pop("CUDA_VISIBLE_DEVICES", None)
+        else:
+            os.environ["CUDA_VISIBLE_DEVICES"] = origin
+
+
+def _worker_main(worker_id, device_id, testing, report_dir, task_queue, result_queue):
+    """
+    worker进程主循环
+    :param worker_id: worker编号
+    :param device_id: 绑定的设备编号, None表示不绑定
+    :param task_queue: 子图任务队列, 收到None时退出
+    :param result_queue: 结果队列
+    """
+    if device_id is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(device_id)
+
+    if os.environ.get("FRAMEWORK") == "paddle":
+        import paddle  # 每个worker仅导入一次
+    elif os.environ.get("FRAMEWORK") == "torch":
+        import torch
+    import layertest
+
+    while True:
+        py_file = task_queue.get()
+        if py_file is None:
+            break
+        status, duration = execute_case(py_file=py_file, testing=testing, report_dir=report_dir)
+        result_queue.put((worker_id, py_file, status, duration))
+
+
+class CaseWorkerPool(object):
+    """
+    常驻worker进程池, worker崩溃、超时或执行达到上限后自动重建
+    """
+
+    def __init__(self, testing, worker_num, device_list=None, max_cases=200, timeout=None, report_dir="report"):
+        """
+        init
+        :param testing: 测试配置yml路径
+        :param worker_num: worker进程数
+        :param device_list: 设备编号list, worker按序轮流绑定, None表示不绑定
+        :param max_cases: 单个worker最多执行的子图数, 达到后回收重建
+        :param timeout: 单个子图超时时间(s), None表示不限时
+        :param report_dir: allure报告路径
+        """
+        self.testing = testing
+        self.worker_num = max(int(worker_num), 1)
+        self.device_list = device_list
+        self.max_cases = max(int(max_cases), 1)
+        self.timeout = timeout
+        self.report_dir = report_dir
+
+        self.logger = Logger("PLTWorkerPool")
+        # spawn启动, 避免子进程继承父进程的CUDA上下文
+        self.ctx = multiprocessing.get_context("spawn")
+        self.result_queue = self.ctx.Queue()
+        self.workers = {}
+
+    def _device_of(self, worker_id):
+        """
+        worker绑定的设备
+        """
+        if not self.device_list:
+            return None
+        return self.device_list[worker_id % len(self.device_list)]
+
+    def _start_worker(self, worker_id):
+        """
+        启动单个worker
+        """
+        task_queue = self.ctx.Queue()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._device_of(worker_id), self.testing, self.report_dir, task_queue, self.result_queue),
+            daemon=True,
+        )
+        with _device_env(self._device_of(worker_id)):
+            process.start()
+        self.workers[worker_id] = {
+            "process": process,
+            "task_queue": task_queue,
+            "case": None,
+            "start": None,
+            "count": 0,
+        }
+        self.logger.get_log().info(f"worker {worker_id} 启动, pid: {process.pid}, device: {self._device_of(worker_id)}")
+
+    def _stop_worker(self, worker_id, kill=False):
+        """
+        停止单个worker
+        """
+        worker = self.workers.pop(worker_id)
+        process = worker["process"]
+        if kill:
+            process.kill()
+        elif process.is_alive():
+            worker["task_queue"].put(None)
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _dispatch(self, worker_id, pending):
+        """
+        向空闲worker派发下一个子图
+        """
+        if not pending:
+            return
+        worker = self.workers[worker_id]
+        worker["case"] = pending.popleft()
+        worker["start"] = time.time()
+        worker["task_queue"].put(worker["case"])
+
+    def _recycle(self, worker_id, pending):
+        """
+        重建worker并继续派发
+        """
+        self._start_worker(worker_id)
+        self._dispatch(worker_id, pending)
+
+    def run(self, py_list):
+        """
+        执行所有子图
+        :param py_list: 子图py文件路径list
+        :return: {py_file: {"status": passed/failed/broken/crash/timeout, "exit_code": int, "duration": float}}
+        """
+        pending = collections.deque(py_list)
+        results = {}
+        for worker_id in range(min(self.worker_num, len(py_list))):
+            self._start_worker(worker_id)
+            self._dispatch(worker_id, pending)
+
+        while any(worker["case"] is not None for worker in self.workers.values()):
+            try:
+                worker_id, py_file, status, duration = self.result_queue.get(timeout=1)
+            except queue.Empty:
+                worker_id, py_file = None, None
+
+            worker = self.workers.get(worker_id)
+            # 已被判定超时的worker迟到的结果直接丢弃
+            if worker is not None and worker["case"] == py_file:
+                results[py_file] = {"status": status, "exit_code": 0 if status == "passed" else 1, "duration": duration}
+                worker["case"] = None
+                worker["count"] += 1
+                if worker["count"] >= self.max_cases and pending:
+                    self.logger.get_log().info(f"worker {worker_id} 已执行 {worker['count']} 个子图, 回收重建")
+                    self._stop_worker(worker_id)
+                    self._recycle(worker_id, pending)
+                else:
+                    self._dispatch(worker_id, pending)
+
+            for worker_id in list(self.workers.keys()):
+                worker = self.workers[worker_id]
+                if worker["case"] is None:
+                    continue
+                process = worker["process"]
+                if not process.is_alive():
+                    # 进程退出但结果未回传, 视为core dump等崩溃
+                    self.logger.get_log().warning(f"{worker['case']} 执行时worker崩溃, exitcode: {process.exitcode}")
+                    results[worker["case"]] = {
+                        "status": "crash",
+                        "exit_code": process.exitcode,
+                        "duration": time.time() - worker["start"],
+                    }
+                    self._stop_worker(worker_id, kill=True)
+                    self._recycle(worker_id, pending)
+                elif self.timeout is not None and time.time() - worker["start"] > self.timeout:
+                    self.logger.get_log().warning(f"{worker['case']} 执行超时 {self.timeout}s, 回收worker")
+                    results[worker["case"]] = {"status": "timeout", "exit_code": -1, "duration": self.timeout}
+                    self._stop_worker(worker_id, kill=True)
+                    self._recycle(worker_id, pending)
+
+        for worker_id in list(self.workers.keys()):
+            self._stop_worker(worker_id)
+        return results
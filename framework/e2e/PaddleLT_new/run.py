@@ -6,6 +6,8 @@
 测试执行器
 """
 import os
+import time
+import queue
 import shutil
 import subprocess
 from subprocess import TimeoutExpired
@@ -17,15 +19,19 @@ import pandas as pd
 import layertest
 from db.layer_db import LayerBenchmarkDB
 from strategy.compare import perf_compare_dict, perf_compare_kernel_dict
-from pltools.case_select import CaseSelect
+from pltools.case_select import CaseSelect, CaseIndex, ordered_dedup, filter_cases
 from pltools.logger import Logger
 from pltools.yaml_loader import YamlLoader
 from pltools.json_loader import JSONLoader
-from pltools.res_save import xlsx_save, download_sth, create_tar_gz, extract_tar_gz, load_pickle, save_txt
+from pltools.res_save import xlsx_save, create_tar_gz, extract_tar_gz, load_pickle, save_txt
 from pltools.nv_tool import get_nv_memory
 from pltools.upload_bos import UploadBos
-from pltools.statistics import split_list, sublayer_perf_gsb_gen, kernel_perf_gsb_gen, sublayer_perf_ratio_gen
+from pltools.statistics import sublayer_perf_gsb_gen, kernel_perf_gsb_gen, sublayer_perf_ratio_gen
 from pltools.alarm import Alarm
+from pltools.worker_pool import CaseWorkerPool
+from pltools.fork_server import run_in_zygote
+from pltools.scheduler import CaseHistory, WorkStealingQueues, lpt_split, makespan_report
+from pltools.gt_store import GroundTruthStore
 
 
 class Run(object):
@@ -51,16 +57,31 @@ class Run(object):
             py_list = py_list + CaseSelect(layer_dir, self.ignore_list).get_py_list(base_path=layer_dir)
 
         # 测试集去重
-        self.py_list = []
-        for item in py_list:
-            if not item in self.py_list:
-                self.py_list.append(item)
+        py_list = ordered_dedup(py_list)
 
         self.testing = os.environ.get("TESTING")
         self.py_cmd = os.environ.get("python_ver")
         self.report_dir = os.path.join(os.getcwd(), "report")
 
         self.logger = Logger("PaddleLTRun")
+
+        # 按glob/标签筛选子图, 多个值以逗号分隔
+        case_glob = os.environ.get("PLT_CASE_GLOB", "None")
+        case_tag = os.environ.get("PLT_CASE_TAG", "None")
+        py_list = filter_cases(
+            py_list,
+            globs=None if case_glob == "None" else case_glob.split(","),
+            tags=None if case_tag == "None" else case_tag.split(","),
+        )
+
+        # 子图索引, 记录子图内容hash与历次结果, 用于仅执行改动或上次失败的子图
+        self.case_index = CaseIndex(testing=self.testing)
+        self.case_durations = {}
+        if os.environ.get("PLT_CASE_SELECT", "all") == "impacted":
+            impacted_list = self.case_index.impacted(py_list)
+            self.logger.get_log().info(f"子图总数: {len(py_list)}, 有改动或上次未通过的子图数: {len(impacted_list)}")
+            py_list = impacted_list
+        self.py_list = py_list
         self.AGILE_PIPELINE_BUILD_ID = os.environ.get("AGILE_PIPELINE_BUILD_ID", 0)
         self.now_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -90,28 +111,22 @@ class Run(object):
                     f"&& {self.py_cmd} -m pip install unidecode "
                 )
 
-        # 下载ground truth用于跨硬件测试
-        plt_gt_download_url = os.environ.get("PLT_GT_DOWNLOAD_URL")
-        if not plt_gt_download_url == "None" and os.environ.get("TESTING_MODE") == "precision":
-            self.logger.get_log().info(f"下载plt_gt的url为: {plt_gt_download_url}")
-            plt_gt_device = plt_gt_download_url.split("/")[-1]
-            # if not os.path.exists(os.path.join("plt_gt_baseline", plt_gt_device)):
-            #     os.makedirs(os.path.join("plt_gt_baseline", plt_gt_device))
-            for testing in YamlLoader(yml=self.testing).get_junior_name("testings"):
-                if not os.path.exists(os.path.join("plt_gt_baseline", plt_gt_device, testing)):
-                    os.makedirs(os.path.join("plt_gt_baseline", plt_gt_device, testing))
-                for py_file in self.py_list:
-                    case_name = py_file.replace(".py", "").replace("/", "^").replace(".", "^")
-                    self.logger.get_log().info(f"开始下载plt_gt: {case_name}")
-                    gt_url = f"{plt_gt_download_url}/{testing}/{case_name}.tensor"
-                    download_sth(
-                        gt_url=gt_url,
-                        output_path=os.path.join("plt_gt_baseline", plt_gt_device, testing, f"{case_name}.tensor"),
-                    )
+        # 后台并行预取ground truth用于跨硬件测试, 子图无需等待全部下载完成即可开始执行
+        self.gt_store = GroundTruthStore()
+        if self.gt_store.store is not None and os.environ.get("TESTING_MODE") == "precision":
+            self.logger.get_log().info(f"下载plt_gt的url为: {self.gt_store.download_url}")
+            self.gt_store.prefetch(
+                py_list=self.py_list, testings=YamlLoader(yml=self.testing).get_junior_name("testings")
+            )
 
-    def _exit_code_txt(self, error_count, error_list):
+    def _exit_code_txt(self, error_count, error_list, core_dumps_list=None):
         """"""
-        core_dumps_list = self._core_dumps_case_count(report_path=self.report_dir)
+        if core_dumps_list is None:
+            core_dumps_list = self._core_dumps_case_count(report_path=self.report_dir)
+        self.case_index.update(
+            py_list=self.py_list, error_list=list(error_list) + list(core_dumps_list), durations=self.case_durations
+        )
+        self.case_index.save()
         if error_count != 0 or core_dumps_list:
             self.logger.get_log().warning("测试失败, 下面进行bug分类统计: ")
             self.logger.get_log().warning(f"报错为core dumps的子图有: {core_dumps_list}")
@@ -226,6 +241,7 @@ class Run(object):
         """run one test"""
         title = py_file.replace(".py", "").replace("/", "^").replace(".", "^")
         self.logger.get_log().info(f"开始测试子图 {title}, 准备执行pytest命令~~")
+        case_start = time.time()
 
         if os.environ.get("PLT_PYTEST_TIMEOUT") == "None":
             if self.layer_type == "layerE2Ecase":
@@ -267,6 +283,7 @@ class Run(object):
                 proc.terminate()  # 发送 SIGTERM 信号到进程
                 exit_code = -1
 
+        self.case_durations[py_file] = time.time() - case_start
         self.logger.get_log().info(f"完成测试子图 {title}, 完成执行pytest命令~~")
         if exit_code != 0:
             return py_file, exit_code
@@ -296,35 +313,112 @@ class Run(object):
             self.logger.get_log().info("对于多线程失败case, 进入double check环节: ")
             self._test_run(py_list=error_list)
 
+    def _worker_pool_test_run(self, py_list):
+        """常驻worker进程池执行精度测试, 每个worker仅导入一次paddle"""
+        if self.layer_type == "layerE2Ecase":
+            self.logger.get_log().warning("layerE2Ecase为pytest用例, 不支持worker进程池, 回退为多线程执行")
+            self._multithread_test_run(py_list=py_list)
+            return
+
+        timeout = os.environ.get("PLT_PYTEST_TIMEOUT", "None")
+        pool = CaseWorkerPool(
+            testing=self.testing,
+            worker_num=int(os.environ.get("MULTI_WORKER", 1)),
+            device_list=[int(x) for x in os.environ.get("PLT_DEVICE_ID", "").split(",") if x.strip()],
+            max_cases=int(os.environ.get("PLT_WORKER_MAX_CASES", 200)),
+            timeout=None if timeout == "None" else float(timeout),
+            report_dir=self.report_dir,
+        )
+        results = pool.run(py_list=py_list)
+        self.case_durations.update({py_file: result["duration"] for py_file, result in results.items()})
+
+        error_list = [py_file for py_file in py_list if results.get(py_file, {}).get("status") != "passed"]
+        core_dumps_list = [py_file for py_file in py_list if results.get(py_file, {}).get("status", "crash") == "crash"]
+        error_count = len(error_list)
+
+        if os.environ.get("MULTI_DOUBLE_CHECK") == "False":
+            if not os.environ.get("PLT_GT_UPLOAD_URL") == "None":
+                self._gt_upload()
+            self._exit_code_txt(error_count=error_count, error_list=error_list, core_dumps_list=core_dumps_list)
+        else:
+            self.logger.get_log().info("对于worker进程池失败case, 进入double check环节: ")
+            self._test_run(py_list=error_list)
+
+    def _fork_server_test_run(self, py_list):
+        """fork-server执行精度测试, 每个子图从zygote进程fork子进程执行"""
+        if self.layer_type == "layerE2Ecase":
+            self.logger.get_log().warning("layerE2Ecase为pytest用例, 不支持fork-server, 回退为多线程执行")
+            self._multithread_test_run(py_list=py_list)
+            return
+
+        timeout = os.environ.get("PLT_PYTEST_TIMEOUT", "None")
+        # 本进程已导入paddle, fork须在未导入paddle的zygote进程中进行
+        records = run_in_zygote(
+            py_list=py_list,
+            testing=self.testing,
+            max_parallel=max(int(os.environ.get("MULTI_WORKER", 1)), 1),
+            device_list=[int(x) for x in os.environ.get("PLT_DEVICE_ID", "").split(",") if x.strip()],
+            timeout=None if timeout == "None" else float(timeout),
+            report_dir=self.report_dir,
+            result_file="fork_server_result.json",
+        )
+        self.case_durations.update({record.py_file: record.duration for record in records})
+
+        error_list = [record.py_file for record in records if record.status != "passed"]
+        core_dumps_list = [record.py_file for record in records if record.status == "crash"]
+        for record in records:
+            if record.status == "crash":
+                self.logger.get_log().warning(
+                    f"{record.py_file} core dumps, signal: {record.signal}, "
+                    f"stderr末尾: {record.stderr.decode('utf-8', errors='replace')[-2000:]}"
+                )
+
+        if os.environ.get("MULTI_DOUBLE_CHECK") == "False":
+            if not os.environ.get("PLT_GT_UPLOAD_URL") == "None":
+                self._gt_upload()
+            self._exit_code_txt(error_count=len(error_list), error_list=error_list, core_dumps_list=core_dumps_list)
+        else:
+            self.logger.get_log().info("对于fork-server失败case, 进入double check环节: ")
+            self._test_run(py_list=error_list)
+
     def _multi_gpu_multithread_test_run(self, py_list):
         """multithread run some test"""
         ######################################################
-        def _queue_run(py_list, device_place_id, result_queue):
+        def _queue_run(device_index, device_place_id, case_queues, result_queue):
             # def _queue_run(py_list, py_dict, result_queue):
             """
             multi run main
             """
             error_list = []
             error_count = 0
+            durations = {}
+            start = time.time()
+
+            def _thread_run():
+                """单个线程不断从设备队列领取子图, 本设备队列为空时从其他设备窃取"""
+                while True:
+                    py_file, stolen = case_queues.next_case(device_index)
+                    if py_file is None:
+                        break
+                    if stolen:
+                        self.logger.get_log().info(f"设备 {device_place_id} 窃取子图 {py_file}")
+                    case_start = time.time()
+                    _py_file, _exit_code = self._single_pytest_run(py_file, self.testing, 0)
+                    durations[py_file] = time.time() - case_start
+                    if _exit_code is not None:
+                        error_list.append(_py_file)
 
             os.environ["CUDA_VISIBLE_DEVICES"] = str(device_place_id)
             with ThreadPoolExecutor(max_workers=int(os.environ.get("MULTI_WORKER", 13))) as executor:
                 # 提交任务给线程池
-                # futures = [
-                #     executor.submit(self._single_pytest_run, py_file, self.testing, py_dict[py_file])
-                #     for py_file in py_list
-                # ]
-
-                futures = [executor.submit(self._single_pytest_run, py_file, self.testing, 0) for py_file in py_list]
+                futures = [executor.submit(_thread_run) for _ in range(int(os.environ.get("MULTI_WORKER", 13)))]
 
-                # 等待任务完成，并收集返回值
+                # 等待任务完成
                 for future in futures:
-                    _py_file, _exit_code = future.result()
-                    if _exit_code is not None:
-                        error_list.append(_py_file)
-                        error_count += 1
+                    future.result()
+            error_count = len(error_list)
 
-            result_queue.put((error_list, error_count))
+            result_queue.put((error_list, error_count, durations, device_place_id, time.time() - start))
 
         ######################################################
 
@@ -332,30 +426,52 @@ class Run(object):
         if len(device_list) < 2:
             raise Exception("single gpu cannot use _multi_gpu_multithread_test_run strategy")
 
-        # py_dict = {item: i % len(device_list) for i, item in enumerate(py_list)}
-
-        multiprocess_cases = split_list(lst=self.py_list, n=len(device_list))
+        # 按历史耗时做最长耗时优先装箱, 执行中空闲设备从其他设备窃取子图
+        case_history = CaseHistory(testing=self.testing)
+        multiprocess_cases, expected_loads = lpt_split(py_list=py_list, n=len(device_list), history=case_history)
+        case_queues = WorkStealingQueues(groups=multiprocess_cases, history=case_history)
         processes = []
         result_queue = multiprocessing.Queue()
+        # fork前结束plt_gt后台预取线程池, 子进程不能继承运行中的线程及其持有的锁
+        self.gt_store.wait()
 
         for i, cases_list in enumerate(multiprocess_cases):
-            self.logger.get_log().info(f"multiprocess_cases中i: {i}")
-            self.logger.get_log().info(f"multiprocess_cases中device_list: {device_list}")
-            self.logger.get_log().info(f"multiprocess_cases中device_list[i]: {device_list[i]}")
-            process = multiprocessing.Process(target=_queue_run, args=(cases_list, device_list[i], result_queue))
-            # process = multiprocessing.Process(target=_queue_run, args=(cases_list, py_dict, result_queue))
+            self.logger.get_log().info(
+                f"设备 {device_list[i]} 分配子图数: {len(cases_list)}, 预期耗时: {round(expected_loads[i], 2)}s"
+            )
+            process = multiprocessing.Process(target=_queue_run, args=(i, device_list[i], case_queues, result_queue))
             process.start()
             processes.append(process)
 
-        for process in processes:
-            process.join()
-
         error_list = []
         error_count = 0
-        while not result_queue.empty():
-            single_error_list, single_error_count = result_queue.get()
+        device_elapsed = {}
+        finished = set()
+        for single_error_list, single_error_count, durations, device_place_id, elapsed in self._collect_results(
+            processes=processes, result_queue=result_queue
+        ):
             error_list.extend(single_error_list)
             error_count += single_error_count
+            device_elapsed[device_place_id] = elapsed
+            self.case_durations.update(durations)
+            finished.update(durations)
+            for py_file, duration in durations.items():
+                case_history.record(py_file=py_file, duration=duration)
+
+        for process in processes:
+            process.join()
+
+        # 设备进程崩溃时其执行过和未领取的子图均无结果, 记为失败
+        crash_list = [py_file for py_file in py_list if py_file not in finished]
+        if crash_list:
+            self.logger.get_log().warning(f"设备进程异常退出, {len(crash_list)} 个子图无执行结果, 记为失败")
+            error_list.extend(crash_list)
+            error_count += len(crash_list)
+
+        case_history.save()
+        self.logger.get_log().info(
+            f"多卡调度makespan: {makespan_report(device_elapsed, dict(zip(device_list, expected_loads)))}"
+        )
 
         if os.environ.get("MULTI_DOUBLE_CHECK") == "False":
             if not os.environ.get("PLT_GT_UPLOAD_URL") == "None":
@@ -429,7 +545,7 @@ class Run(object):
         需要处理cpu绑核以及gpu并行
         """
 
-        def _queue_run(py_list, device_id, result_queue):
+        def _queue_run(device_id, case_queues, result_queue):
             """
             multi run main
             """
@@ -437,10 +553,19 @@ class Run(object):
             sublayer_dict = {}
             error_count = 0
             error_list = []
-            for py_file in py_list:
+            durations = {}
+            peak_memory = {}
+            start = time.time()
+            while True:
+                py_file, stolen = case_queues.next_case(device_id)
+                if py_file is None:
+                    break
+                case_start = time.time()
                 title = py_file.replace(".py", "").replace("/", "^").replace(".", "^")
                 single_test = layertest.LayerTest(title=title, layerfile=py_file, testing=self.testing)
                 perf_dict, exit_code = single_test._perf_case_run()
+                durations[py_file] = time.time() - case_start
+                peak_memory[py_file] = self._peak_device_memory()
 
                 # 报错的子图+engine将不会收录进sublayer_dict
                 if exit_code != 0:
@@ -452,30 +577,63 @@ class Run(object):
 
             # error_dict = self._run_main(all_cases=all_cases, loops=loops, base_times=base_times)
 
-            result_queue.put(sublayer_dict, error_list, error_count)
+            result_queue.put(
+                (sublayer_dict, error_list, error_count, durations, peak_memory, device_id, time.time() - start)
+            )
 
-        multiprocess_cases = split_list(lst=self.py_list, n=int(os.environ.get("MULTI_WORKER")))
+        # 按历史耗时做最长耗时优先装箱, 执行中空闲进程从其他进程窃取子图
+        case_history = CaseHistory(testing=self.testing)
+        multiprocess_cases, expected_loads = lpt_split(
+            py_list=self.py_list, n=int(os.environ.get("MULTI_WORKER")), history=case_history
+        )
+        case_queues = WorkStealingQueues(groups=multiprocess_cases, history=case_history)
         processes = []
         result_queue = multiprocessing.Queue()
+        # fork前结束plt_gt后台预取线程池, 子进程不能继承运行中的线程及其持有的锁
+        self.gt_store.wait()
 
         for i, cases_list in enumerate(multiprocess_cases):
-            process = multiprocessing.Process(target=_queue_run, args=(cases_list, i, result_queue))
+            process = multiprocessing.Process(target=_queue_run, args=(i, case_queues, result_queue))
             process.start()
             # os.sched_setaffinity(process.pid, {self.core_index + i})
             processes.append(process)
 
-        for process in processes:
-            process.join()
-
         sublayer_dict = {}
         error_list = []
         error_count = 0
+        device_elapsed = {}
         compare_list = YamlLoader(yml=self.testing).yml.get("compare")
-        while not result_queue.empty():
-            single_sublayer_dict, single_error_list, single_error_count = result_queue.get()
+        finished = set()
+        for (
+            single_sublayer_dict,
+            single_error_list,
+            single_error_count,
+            durations,
+            peak_memory,
+            device_id,
+            elapsed,
+        ) in self._collect_results(processes=processes, result_queue=result_queue):
             sublayer_dict.update(single_sublayer_dict)
             error_list.extend(single_error_list)
             error_count += single_error_count
+            device_elapsed[device_id] = elapsed
+            self.case_durations.update(durations)
+            finished.update(durations)
+            for py_file, duration in durations.items():
+                case_history.record(py_file=py_file, duration=duration, peak_memory=peak_memory.get(py_file))
+
+        for process in processes:
+            process.join()
+
+        # 进程崩溃时其执行过和未领取的子图均无结果, 记为失败
+        crash_list = [py_file for py_file in self.py_list if py_file not in finished]
+        if crash_list:
+            self.logger.get_log().warning(f"性能测试进程异常退出, {len(crash_list)} 个子图无执行结果, 记为失败")
+            error_list.extend(crash_list)
+            error_count += len(crash_list)
+
+        case_history.save()
+        self.logger.get_log().info(f"多进程调度makespan: {makespan_report(device_elapsed, dict(enumerate(expected_loads)))}")
 
         self._exit_code_txt(error_count=error_count, error_list=error_list)
 
@@ -730,6 +888,51 @@ class Run(object):
 
         return core_dumps_list
 
+    def _collect_results(self, processes, result_queue, poll=5):
+        """
+        收集子进程通过result_queue回传的结果, 每个进程一条
+        子进程core dump等异常退出时不会回传结果, 所有进程退出且队列已空后即返回, 不再无限阻塞
+        :param poll: 轮询间隔(s)
+        :return: 结果list, 数量可能少于进程数
+        """
+        results = []
+        while len(results) < len(processes):
+            try:
+                results.append(result_queue.get(timeout=poll))
+                continue
+            except queue.Empty:
+                pass
+            if any(process.is_alive() for process in processes):
+                continue
+            # 所有进程均已退出, 取完已写入管道但尚未读取的结果
+            try:
+                while len(results) < len(processes):
+                    results.append(result_queue.get(timeout=1))
+            except queue.Empty:
+                pass
+            break
+
+        for process in processes:
+            if process.exitcode not in (None, 0):
+                self.logger.get_log().warning(f"子进程 {process.pid} 异常退出, exitcode: {process.exitcode}")
+        return results
+
+    def _peak_device_memory(self):
+        """
+        当前进程的峰值显存(MB), 获取后重置峰值统计. 非paddle gpu环境返回None
+        """
+        if os.environ.get("FRAMEWORK") != "paddle" or os.environ.get("PLT_SET_DEVICE") != "gpu":
+            return None
+        import paddle
+
+        try:
+            peak_memory = paddle.device.cuda.max_memory_allocated() / 1024 / 1024
+            if hasattr(paddle.device.cuda, "reset_max_memory_allocated"):
+                paddle.device.cuda.reset_max_memory_allocated()
+            return round(peak_memory, 2)
+        except Exception:
+            return None
+
     def _pts_callback(self, error_count):
         """
         用于性能任务回调pts. 精度任务通过start.sh最后的命令回调
@@ -755,7 +958,11 @@ class Run(object):
 if __name__ == "__main__":
     tes = Run()
     if os.environ.get("TESTING_MODE") == "precision":
-        if os.environ.get("MULTI_WORKER") == "0":
+        if os.environ.get("PLT_FORK_SERVER") == "True":
+            tes._fork_server_test_run(py_list=tes.py_list)
+        elif os.environ.get("PLT_WORKER_POOL") == "True":
+            tes._worker_pool_test_run(py_list=tes.py_list)
+        elif os.environ.get("MULTI_WORKER") == "0":
             tes._test_run(py_list=tes.py_list)
         else:
             tes._multithread_test_run(py_list=tes.py_list)
@@ -13,19 +13,32 @@ export PLT_GET_NV_MEMORY="${PLT_GET_NV_MEMORY:-True}"
 export PLT_DEVICE_ID="${PLT_DEVICE_ID:-6}"  # 设备编号
 export CUDA_VISIBLE_DEVICES="${PLT_DEVICE_ID:-6}"
 export FRAMEWORK="${FRAMEWORK:-paddle}"  # 框架种类
+export PLT_CASE_LAZY_IMPORT="${PLT_CASE_LAZY_IMPORT:-True}"  # True: 按需加载单个子图模块; False: 整体导入全部子图(旧行为)
 export MULTI_WORKER="${MULTI_WORKER:-0}"  # 并行数
+export PLT_CASE_HISTORY="${PLT_CASE_HISTORY:-plt_case_history.json}"  # 子图历史耗时/显存记录, 用于多卡/多进程按耗时均衡调度
 
 export PLT_PYTEST_TIMEOUT="${PLT_PYTEST_TIMEOUT:-200}"  # 超时10分钟则判为失败. 设置为None则不限时
 
 #性能测试专属环境变量
 export PLT_BM_MODE="${PLT_BM_MODE:-latest}"  #基线任务为baseline, 测试任务为latest, 测试并设为新基线任务为latest_as_baseline
 export PLT_BM_DB="${PLT_BM_DB:-select}"  # insert: 存入数据, 作为基线或对比; select: 不存数据, 仅对比并生成表格; non-db: 不加载数据库，仅生成表格
+export PLT_DB_BACKEND="${PLT_DB_BACKEND:-mysql}"  # mysql: 读取apibm_config.yaml; sqlite: 本地替身, 用于调试
+export PLT_DB_SQLITE="${PLT_DB_SQLITE:-plt_benchmark.db}"  # sqlite库文件路径
+export PLT_DB_BATCH_SIZE="${PLT_DB_BATCH_SIZE:-500}"  # 子图结果批量写入, 每批executemany的行数, 整个job一次事务提交
 export PLT_BM_EMAIL="${PLT_BM_EMAIL:-False}"  # True: 发送邮件  False: 不发送邮件
-export PLT_BM_REPEAT="${PLT_BM_REPEAT:-1000}"  # 性能测试重复轮次
+export PLT_BM_REPEAT="${PLT_BM_REPEAT:-1000}"  # 性能测试最大重复轮次
+export PLT_BM_MIN_REPEAT="${PLT_BM_MIN_REPEAT:-30}"  # 性能测试最少重复轮次, 之后置信区间足够窄即停止
+export PLT_BM_CI_TARGET="${PLT_BM_CI_TARGET:-0.01}"  # 95%置信区间半宽/均值 的停止阈值, 设为0则固定跑满PLT_BM_REPEAT轮
+export PLT_BM_WARMUP_MAX="${PLT_BM_WARMUP_MAX:-100}"  # 稳态预热最大轮次
 export TIMEIT_NUM="${TIMEIT_NUM:-1}"  # timeit number数
-export PLT_BM_STATIS="${PLT_BM_STATIS:-trimmean}"  # 统计策略trimmean, mean, best, best_top_k
+export PLT_BM_STATIS="${PLT_BM_STATIS:-trimmean}"  # 统计策略trimmean, mean, median, best, best_top_k
 export PLT_BM_ERROR_CHECK="${PLT_BM_ERROR_CHECK:-True}"  # True: 执行性能测试前先执行一次精度测试
 export PLT_BM_PLOT="${PLT_BM_PLOT:-False}"  # True: 执行性能测试后生成性能图表
+export PLT_BM_CPU_THREADS="${PLT_BM_CPU_THREADS:-}"  # PLT_SET_DEVICE=cpu时固定的OMP/MKL线程数, 为空则不固定
+if [ -n "${PLT_BM_CPU_THREADS}" ]; then
+    export OMP_NUM_THREADS=${PLT_BM_CPU_THREADS}
+    export MKL_NUM_THREADS=${PLT_BM_CPU_THREADS}
+fi
 
 echo "wheel_url=${wheel_url}"
 echo "python_ver=${python_ver}"
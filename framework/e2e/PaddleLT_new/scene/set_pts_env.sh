@@ -12,20 +12,37 @@ export PLT_GET_NV_MEMORY="${PLT_GET_NV_MEMORY:-True}"
 export PLT_DEVICE_ID="${PLT_DEVICE_ID:-6}"
 export CUDA_VISIBLE_DEVICES="${PLT_DEVICE_ID:-6}"
 export FRAMEWORK="${FRAMEWORK:-paddle}"
+export PLT_CASE_LAZY_IMPORT="${PLT_CASE_LAZY_IMPORT:-True}"  # True: 按需加载单个子图模块; False: 整体导入全部子图(旧行为)
 export USE_PADDLE_MODEL="${USE_PADDLE_MODEL:-None}"  # 设定是否使用paddle模型库, 可选PaddleOCR
 export MULTI_WORKER="${MULTI_WORKER:-0}"
 export MULTI_DOUBLE_CHECK="${MULTI_DOUBLE_CHECK:-True}"
+export PLT_WORKER_POOL="${PLT_WORKER_POOL:-False}"  # True: 精度测试使用常驻worker进程池, 每个worker仅导入一次paddle
+export PLT_WORKER_MAX_CASES="${PLT_WORKER_MAX_CASES:-200}"  # 单个worker执行子图数上限, 达到后回收重建
+export PLT_FORK_SERVER="${PLT_FORK_SERVER:-False}"  # True: 精度测试使用fork-server, 父进程预导入paddle, 每个子图fork子进程执行
+export PLT_CASE_HISTORY="${PLT_CASE_HISTORY:-plt_case_history.json}"  # 子图历史耗时/显存记录, 用于多卡/多进程按耗时均衡调度
+export PLT_CASE_SELECT="${PLT_CASE_SELECT:-all}"  # all: 执行全部子图; impacted: 仅执行有改动或上次未通过的子图
+export PLT_CASE_INDEX="${PLT_CASE_INDEX:-plt_case_index.json}"  # 子图索引, 记录子图内容hash与历次结果
+export PLT_CASE_GLOB="${PLT_CASE_GLOB:-None}"  # 按glob筛选子图, 多个以逗号分隔
+export PLT_CASE_TAG="${PLT_CASE_TAG:-None}"  # 按标签(子图路径中的目录名)筛选子图, 多个以逗号分隔
 
 export PLT_PYTEST_TIMEOUT="${PLT_PYTEST_TIMEOUT:-600}"  # 超时10分钟则判为失败. 设置为None则不限时
 export PLT_SPEC_USE_MULTI="${PLT_SPEC_USE_MULTI:-False}"  # 开启动态InputSpec搜索遍历
 export PLT_SAVE_SPEC="${PLT_SAVE_SPEC:-False}"  # 是否保存InputSpec搜索遍历结果
 export PLT_SAVE_GT="${PLT_SAVE_GT:-False}"  # 是否保存精度ground truth, 也就是plt_gt
 export PLT_GT_UPLOAD_URL="${PLT_GT_UPLOAD_URL:-None}"  # plt_gt的上传路径, paddle-qa/PaddleLT/PaddleLTGroundTruth/latest
-export PLT_GT_DOWNLOAD_URL="${PLT_GT_DOWNLOAD_URL:-None}"  # plt_gt的下载url, https://paddle-qa.bj.bcebos.com/PaddleLT/PaddleLTGroundTruth/latest/gpu
+export PLT_GT_DOWNLOAD_URL="${PLT_GT_DOWNLOAD_URL:-None}"  # plt_gt的下载url或本地目录, https://paddle-qa.bj.bcebos.com/PaddleLT/PaddleLTGroundTruth/latest/gpu
+export PLT_GT_CACHE="${PLT_GT_CACHE:-plt_gt_baseline}"  # plt_gt本地缓存路径
+export PLT_GT_CACHE_MAX_MB="${PLT_GT_CACHE_MAX_MB:-0}"  # plt_gt本地缓存上限(MB), 超出后按最近访问时间淘汰, 0表示不限
+export PLT_GT_PREFETCH_WORKERS="${PLT_GT_PREFETCH_WORKERS:-8}"  # plt_gt后台并行预取线程数
+export PLT_COMPARE_ON_DEVICE="${PLT_COMPARE_ON_DEVICE:-False}"  # True: 精度对比先在设备上判断, 一致时不拷贝回host
+export PLT_COMPARE_CHUNK="${PLT_COMPARE_CHUNK:-1048576}"  # 精度对比分块大小(元素数), 大tensor按块流式计算误差
 
 # 精度结果入库
 export PLT_BM_MODE="${PLT_BM_MODE:-baseline}"  #基线任务为baseline, 测试任务为latest, 测试并设为新基线任务为latest_as_baseline
 export PLT_BM_DB="${PLT_BM_DB:-non-db}"  # insert: 存入数据, 作为基线或对比; select: 不存数据, 仅拉取之前结果; non-db: 不加载数据库
+export PLT_DB_BACKEND="${PLT_DB_BACKEND:-mysql}"  # mysql: 读取apibm_config.yaml; sqlite: 本地替身, 用于调试
+export PLT_DB_SQLITE="${PLT_DB_SQLITE:-plt_benchmark.db}"  # sqlite库文件路径
+export PLT_DB_BATCH_SIZE="${PLT_DB_BATCH_SIZE:-500}"  # 子图结果批量写入, 每批executemany的行数, 整个job一次事务提交
 
 echo "wheel_url=${wheel_url}"
 echo "python_ver=${python_ver}"
@@ -10,7 +10,6 @@ import os
 import json
 
 # import logging
-import traceback
 import numpy as np
 
 from pltools.logger import Logger
@@ -26,14 +25,52 @@ elif os.environ.get("FRAMEWORK") == "torch":
     framework = "torch"
 
 
-def base_compare(result, expect, res_name, exp_name, logger, delta=1e-10, rtol=1e-10, exc_dict={}):
+# 单个tensor元素数超过该值时分块流式计算误差, 否则与同dtype的小tensor拼接后批量计算
+COMPARE_CHUNK_SIZE = int(os.environ.get("PLT_COMPARE_CHUNK", str(1 << 20)))
+
+
+def _is_tensor(value):
     """
-    比较函数
-    :param result: 待测值
-    :param expect: 基线值
-    :param delta: 误差值
-    :param rtol: 相对误差
-    :return:
+    判断是否为框架tensor或numpy数组
+    """
+    if isinstance(value, np.ndarray):
+        return True
+    return framework != "" and isinstance(value, eval(f"{framework}.Tensor"))
+
+
+def _to_numpy(value):
+    """
+    框架tensor转换为numpy数组
+    """
+    if isinstance(value, np.ndarray):
+        return value
+    if framework == "torch":
+        return value.detach().cpu().numpy()
+    return value.numpy()
+
+
+def _on_device_allclose(result, expect, delta, rtol):
+    """
+    在设备上先行判断两个tensor是否一致, 一致时无需拷贝回host
+    :return: True表示一致, False表示不一致或无法在设备上判断
+    """
+    if framework != "paddle" or os.environ.get("PLT_COMPARE_ON_DEVICE", "False") != "True":
+        return False
+    if not isinstance(result, paddle.Tensor) or not isinstance(expect, paddle.Tensor):
+        return False
+    if result.dtype != expect.dtype or result.shape != expect.shape:
+        return False
+    if result.dtype not in (paddle.float32, paddle.float64):
+        return False
+    # 与np.testing.assert_allclose(actual=result, desired=expect)判据一致: |result - expect| <= atol + rtol * |expect|
+    return bool(paddle.allclose(result, expect, rtol=rtol, atol=delta, equal_nan=True))
+
+
+def _flatten_compare_tree(result, expect, res_name, exp_name, leaves, report):
+    """
+    展开result与expect的嵌套结构, 收集待对比的tensor叶子节点
+    :param leaves: 收集的[(res_name, exp_name, result, expect)]
+    :param report: 非tensor叶子节点的对比失败信息{res_name: str}
     """
     if isinstance(result, str):
         raise Exception("result is exception !!!")
@@ -45,110 +82,192 @@ def base_compare(result, expect, res_name, exp_name, logger, delta=1e-10, rtol=1
             Logger("PLT_compare").get_log().info(f"{exp_name} 结果为None, 所以跳过 {exp_name} 和 {res_name} 精度对比")
         if result is None:
             Logger("PLT_compare").get_log().info(f"{res_name} 结果为None, 所以跳过 {exp_name} 和 {res_name} 精度对比")
-        pass
-    elif isinstance(expect, eval(f"{framework}.Tensor")) or isinstance(expect, np.ndarray):
-        if isinstance(result, eval(f"{framework}.Tensor")):
-            if framework == "torch":
-                result = result.detach().numpy()
-            elif framework == "paddle":
-                result = result.numpy()
-            else:
-                result = result.numpy()
-        if isinstance(expect, eval(f"{framework}.Tensor")):
-            if framework == "torch":
-                expect = expect.detach().numpy()
-            elif framework == "paddle":
-                expect = expect.numpy()
-            else:
-                expect = expect.numpy()
-        # res = np.allclose(result, expect, atol=delta, rtol=rtol, equal_nan=True)
-        # # 出错打印错误数据
-        # if res is False:
-        #     diff = abs(result - expect)
-        #     # logger.error("{} is: {}".format(exp_name, expect))
-        #     # logger.error("{} is: {}".format(res_name, result))
-        #     logger.error("{} and {} has diff! max diff: {}".format(exp_name, res_name, np.amax(diff)))
-
-        try:
-            np.testing.assert_allclose(actual=result, desired=expect, atol=delta, rtol=rtol, equal_nan=True)
-
-            if result.dtype != expect.dtype:
-                logger.warn(
-                    "Different output data types! res type is: {}, and expect type is: {}".format(
-                        result.dtype, expect.dtype
-                    )
-                )
-            # assert res
-            assert result.shape == expect.shape
-            assert result.dtype == expect.dtype
-        except Exception:
-            exc_dict[res_name] = traceback.format_exc()
-            logger.warn(traceback.format_exc())
-
+    elif _is_tensor(expect):
+        leaves.append((res_name, exp_name, result, expect))
     elif isinstance(expect, dict):
         if "multi_result" in result:
             # 专用于多个结果比较, 例如多种inputspec. 只有result会有多个结果, 想法expect固定为一个
             for i, logit_dict in enumerate(result["multi_result"]):
-                base_compare(
-                    result=logit_dict,
-                    expect=expect,
-                    res_name=res_name + f"multi_result[{i}]",
-                    exp_name=exp_name,
-                    logger=logger,
-                    delta=delta,
-                    rtol=rtol,
-                    exc_dict=exc_dict,
-                )
+                _flatten_compare_tree(logit_dict, expect, res_name + f"multi_result[{i}]", exp_name, leaves, report)
         else:
             for k, v in expect.items():
                 if k in result:
-                    base_compare(
-                        result=result[k],
-                        expect=expect[k],
-                        res_name=res_name + "[{}]".format(str(k)),
-                        exp_name=exp_name + "[{}]".format(str(k)),
-                        logger=logger,
-                        delta=delta,
-                        rtol=rtol,
-                        exc_dict=exc_dict,
+                    _flatten_compare_tree(
+                        result[k], v, res_name + "[{}]".format(str(k)), exp_name + "[{}]".format(str(k)), leaves, report
                     )
                 else:
                     Logger("PLT_compare").get_log().info(f"{exp_name} 有 {k}, 但是 {res_name} 没有 {k}, 所以跳过 {k} 精度对比")
     elif isinstance(expect, list) or isinstance(expect, tuple):
         for i, element in enumerate(expect):
-            if isinstance(result, (np.generic, np.ndarray)) or isinstance(result, eval(f"{framework}.Tensor")):
+            if isinstance(result, np.generic) or _is_tensor(result):
                 if i > 0:
                     break
-                base_compare(
-                    result=result,
-                    expect=expect[i],
-                    res_name=res_name + "[{}]".format(str(i)),
-                    exp_name=exp_name + "[{}]".format(str(i)),
-                    logger=logger,
-                    delta=delta,
-                    rtol=rtol,
-                    exc_dict=exc_dict,
+                _flatten_compare_tree(
+                    result, element, res_name + "[{}]".format(str(i)), exp_name + "[{}]".format(str(i)), leaves, report
                 )
             else:
-                base_compare(
-                    result=result[i],
-                    expect=expect[i],
-                    res_name=res_name + "[{}]".format(str(i)),
-                    exp_name=exp_name + "[{}]".format(str(i)),
-                    logger=logger,
-                    delta=delta,
-                    rtol=rtol,
-                    exc_dict=exc_dict,
+                _flatten_compare_tree(
+                    result[i],
+                    element,
+                    res_name + "[{}]".format(str(i)),
+                    exp_name + "[{}]".format(str(i)),
+                    leaves,
+                    report,
                 )
     elif isinstance(expect, (bool, int, float)):
-        assert expect == result
+        if expect != result:
+            report[res_name] = f"{res_name}: {result} != {exp_name}: {expect}"
     else:
         raise Exception("expect is unknown data struction in compare_tool!!!")
 
+
+def _error_stats(result, expect, delta, rtol):
+    """
+    逐元素计算误差, 判据与np.testing.assert_allclose(equal_nan=True)一致
+    :return: (abs_err, rel_err, mismatch), 与输入等长的一维数组
+    """
+    if not np.issubdtype(result.dtype, np.inexact):
+        result = result.astype(np.float64)
+        expect = expect.astype(np.float64)
+    with np.errstate(invalid="ignore", over="ignore"):
+        abs_err = np.abs(result - expect)
+    both_nan = np.isnan(result) & np.isnan(expect)
+    abs_err[both_nan] = 0
+    # inf与同号inf视为一致
+    same_inf = np.isinf(result) & (result == expect)
+    abs_err[same_inf] = 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_err = abs_err / np.abs(expect)
+    rel_err[abs_err == 0] = 0
+    # nan与非nan比较时abs_err为nan, 判定为不一致
+    with np.errstate(invalid="ignore"):
+        mismatch = ~(abs_err <= delta + rtol * np.abs(expect))
+    # 与np.isclose一致: 任一侧为inf时, 只有同号inf视为一致(否则 inf <= atol + rtol * inf 恒成立)
+    mismatch[np.isinf(result) | np.isinf(expect)] = True
+    mismatch[both_nan | same_inf] = False
+    return abs_err, rel_err, mismatch
+
+
+def _nan_max(a, b):
+    """
+    取最大值, 任一为nan时返回nan
+    """
+    return float(np.maximum(a, b))
+
+
+def _stream_leaf_error(result, expect, delta, rtol):
+    """
+    大tensor分块流式计算最大绝对/相对误差, 避免申请与输入等大的临时数组
+    :return: (max_abs_err, max_rel_err, mismatch_count, size)
+    """
+    flat_res = result.reshape(-1)
+    flat_exp = expect.reshape(-1)
+    max_abs, max_rel, mismatch_count = 0.0, 0.0, 0
+    for begin in range(0, flat_res.size, COMPARE_CHUNK_SIZE):
+        abs_err, rel_err, mismatch = _error_stats(
+            flat_res[begin : begin + COMPARE_CHUNK_SIZE], flat_exp[begin : begin + COMPARE_CHUNK_SIZE], delta, rtol
+        )
+        max_abs = _nan_max(max_abs, np.max(abs_err))
+        max_rel = _nan_max(max_rel, np.max(rel_err))
+        mismatch_count += int(np.count_nonzero(mismatch))
+    return max_abs, max_rel, mismatch_count, flat_res.size
+
+
+def _batch_leaf_error(group, delta, rtol):
+    """
+    同dtype小tensor拼接后一次性计算误差, 再按段归约出每个叶子节点的结果
+    :param group: [(leaf_index, result, expect)]
+    :return: {leaf_index: (max_abs_err, max_rel_err, mismatch_count, size)}
+    """
+    group = [item for item in group if item[1].size > 0]
+    if not group:
+        return {}
+    flat_res = np.concatenate([item[1].reshape(-1) for item in group])
+    flat_exp = np.concatenate([item[2].reshape(-1) for item in group])
+    offsets = np.cumsum([0] + [item[1].size for item in group[:-1]])
+    abs_err, rel_err, mismatch = _error_stats(flat_res, flat_exp, delta, rtol)
+    # np.maximum遇到nan时结果为nan, 与逐个比较的语义一致
+    max_abs = np.maximum.reduceat(abs_err, offsets)
+    max_rel = np.maximum.reduceat(rel_err, offsets)
+    mismatch_count = np.add.reduceat(mismatch.astype(np.int64), offsets)
+    return {
+        item[0]: (float(max_abs[i]), float(max_rel[i]), int(mismatch_count[i]), item[1].size)
+        for i, item in enumerate(group)
+    }
+
+
+def base_compare(result, expect, res_name, exp_name, logger, delta=1e-10, rtol=1e-10, exc_dict=None):
+    """
+    比较函数
+    :param result: 待测值
+    :param expect: 基线值
+    :param delta: 误差值
+    :param rtol: 相对误差
+    :param exc_dict: 对比失败信息, 会在其中追加本次失败项, None时新建
+    :return: 对比失败信息{res_name: 失败原因}, 全部通过时为空dict
+    """
+    if exc_dict is None:
+        exc_dict = {}
+    leaves = []
+    _flatten_compare_tree(result, expect, res_name, exp_name, leaves, exc_dict)
+
+    # 按dtype分组: 大tensor单独流式计算, 小tensor拼接后批量计算
+    batch_groups = {}
+    leaf_errors = {}
+    for index, (leaf_res_name, leaf_exp_name, leaf_result, leaf_expect) in enumerate(leaves):
+        if _on_device_allclose(leaf_result, leaf_expect, delta, rtol):
+            continue
+        if _is_tensor(leaf_result):
+            leaf_result = _to_numpy(leaf_result)
+        leaf_expect = _to_numpy(leaf_expect)
+        if not isinstance(leaf_result, np.ndarray):
+            leaf_result = np.asarray(leaf_result)
+
+        if leaf_result.dtype != leaf_expect.dtype:
+            logger.warn(
+                "Different output data types! res type is: {}, and expect type is: {}".format(
+                    leaf_result.dtype, leaf_expect.dtype
+                )
+            )
+            exc_dict[
+                leaf_res_name
+            ] = f"{leaf_res_name} dtype: {leaf_result.dtype} 与 {leaf_exp_name} dtype: {leaf_expect.dtype} 不一致"
+            continue
+        if leaf_result.shape != leaf_expect.shape:
+            exc_dict[
+                leaf_res_name
+            ] = f"{leaf_res_name} shape: {leaf_result.shape} 与 {leaf_exp_name} shape: {leaf_expect.shape} 不一致"
+            continue
+
+        if leaf_result.size > COMPARE_CHUNK_SIZE:
+            leaf_errors[index] = _stream_leaf_error(leaf_result, leaf_expect, delta, rtol)
+            continue
+        group = batch_groups.setdefault(leaf_result.dtype, {"leaves": [], "size": 0})
+        group["leaves"].append((index, leaf_result, leaf_expect))
+        group["size"] += leaf_result.size
+        # 拼接缓冲区同样不超过COMPARE_CHUNK_SIZE
+        if group["size"] >= COMPARE_CHUNK_SIZE:
+            leaf_errors.update(_batch_leaf_error(group["leaves"], delta, rtol))
+            batch_groups.pop(leaf_result.dtype)
+
+    for group in batch_groups.values():
+        leaf_errors.update(_batch_leaf_error(group["leaves"], delta, rtol))
+
+    for index, (max_abs, max_rel, mismatch_count, size) in sorted(leaf_errors.items()):
+        if mismatch_count == 0:
+            continue
+        leaf_res_name, leaf_exp_name, _, _ = leaves[index]
+        exc_dict[leaf_res_name] = (
+            f"{leaf_res_name} 与 {leaf_exp_name} 精度不一致(atol={delta}, rtol={rtol}): "
+            f"mismatched elements: {mismatch_count} / {size}, "
+            f"max absolute difference: {max_abs}, max relative difference: {max_rel}"
+        )
+        logger.warn(exc_dict[leaf_res_name])
+
     return exc_dict
 
 
-def infer_compare(result, expect, res_name, exp_name, logger, delta=1e-10, rtol=1e-10, exc_dict={}):
+def infer_compare(result, expect, res_name, exp_name, logger, delta=1e-10, rtol=1e-10, exc_dict=None):
     """
     比较函数
     :param result: 待测值
@@ -205,14 +324,40 @@ def perf_compare_legacy(baseline, latest):
     return res
 
 
+def perf_value(res):
+    """
+    取性能结果的主值, 兼容历史基线中的单个float以及新版耗时分布dict
+    :param res: float 或 {"value": float, "median": float, ...}
+    :return: float, 无法解析时原样返回
+    """
+    if isinstance(res, dict):
+        return res.get("value", "error")
+    return res
+
+
+def perf_significant(baseline, latest):
+    """
+    判断两次性能结果的差异是否显著: 两者均带有置信区间且区间不重叠
+    :return: "True", "False", 缺少分布信息时为"None"
+    """
+    if not isinstance(baseline, dict) or not isinstance(latest, dict):
+        return "None"
+    if "ci_low" not in baseline or "ci_low" not in latest:
+        return "None"
+    overlap = latest["ci_low"] <= baseline["ci_high"] and baseline["ci_low"] <= latest["ci_high"]
+    return str(not overlap)
+
+
 def perf_compare(baseline, latest):
     """
     比较函数
-    :param latest: 待测值
-    :param baseline: 基线值
+    :param latest: 待测值, float或耗时分布dict
+    :param baseline: 基线值, float或耗时分布dict
     :return: 比例值
     """
-    if isinstance(baseline, str) or isinstance(baseline, str):
+    baseline = perf_value(baseline)
+    latest = perf_value(latest)
+    if isinstance(baseline, str) or isinstance(latest, str):
         res = "error"
         return res
     else:
@@ -291,16 +436,24 @@ def perf_compare_dict(compare_list, baseline_dict, data_dict, error_list, baseli
                             baseline=json.loads(baseline_dict[baseline_title]["result"])[latest_engine],
                             latest=perf_dict[latest_engine],
                         )
+                        compare_dict[layer_case][latest_engine + "^significant"] = perf_significant(
+                            baseline=json.loads(baseline_dict[baseline_title]["result"])[latest_engine],
+                            latest=perf_dict[latest_engine],
+                        )
                     else:
                         compare_dict[layer_case][latest_engine + "^" + latest_layer_type] = perf_dict[latest_engine]
                         compare_dict[layer_case][latest_engine + "^" + baseline_layer_type + "^baseline"] = "None"
                         compare_dict[layer_case][latest_engine + "^compare"] = "None"
+                        compare_dict[layer_case][latest_engine + "^significant"] = "None"
                 else:
                     compare_dict[layer_case][latest_engine + "^" + latest_layer_type] = perf_dict[latest_engine]
                     compare_dict[layer_case][baseline_engine + "^" + baseline_layer_type] = perf_dict[baseline_engine]
                     compare_dict[layer_case][latest_engine + "^" + baseline_engine + "^compare"] = perf_compare(
                         baseline=perf_dict[baseline_engine], latest=perf_dict[latest_engine]
                     )
+                    compare_dict[layer_case][latest_engine + "^" + baseline_engine + "^significant"] = perf_significant(
+                        baseline=perf_dict[baseline_engine], latest=perf_dict[latest_engine]
+                    )
 
     return compare_dict
 
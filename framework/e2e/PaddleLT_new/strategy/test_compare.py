@@ -0,0 +1,108 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+base_compare 判据与 np.testing.assert_allclose(equal_nan=True) 的一致性测试
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strategy.compare import base_compare  # noqa: E402
+
+
+class _Log(object):
+    """
+    收集warn信息
+    """
+
+    def __init__(self):
+        self.msgs = []
+
+    def warn(self, msg):
+        """
+        warn
+        """
+        self.msgs.append(msg)
+
+
+def _allclose_fails(result, expect, atol, rtol):
+    """
+    旧实现的判据
+    """
+    try:
+        np.testing.assert_allclose(actual=result, desired=expect, atol=atol, rtol=rtol, equal_nan=True)
+    except AssertionError:
+        return True
+    return False
+
+
+def _compare_fails(result, expect, atol, rtol):
+    exc_dict = base_compare({"logit": result}, {"logit": expect}, "res", "exp", _Log(), delta=atol, rtol=rtol)
+    return len(exc_dict) > 0
+
+
+@pytest.mark.parametrize(
+    "result, expect",
+    [
+        ([1.0, 2.0], [1.0, np.inf]),
+        ([1.0, np.inf], [1.0, 2.0]),
+        ([1.0, np.inf], [1.0, -np.inf]),
+        ([1.0, -np.inf], [1.0, -np.inf]),
+        ([1.0, np.inf], [1.0, np.inf]),
+        ([1.0, np.nan], [1.0, np.nan]),
+        ([1.0, np.nan], [1.0, 2.0]),
+        ([1.0, 2.0], [1.0, np.nan]),
+        ([np.nan, np.inf], [np.inf, np.nan]),
+        ([1.0, 1.0 + 1e-12], [1.0, 1.0]),
+    ],
+)
+@pytest.mark.parametrize("rtol", [0.0, 1e-10, 1e-2])
+def test_inf_nan_same_as_assert_allclose(result, expect, rtol):
+    """
+    inf/nan 的判定与 assert_allclose 一致
+    """
+    result = np.array(result, dtype=np.float32)
+    expect = np.array(expect, dtype=np.float32)
+    assert _compare_fails(result, expect, 1e-10, rtol) == _allclose_fails(result, expect, 1e-10, rtol)
+
+
+def test_random_same_as_assert_allclose():
+    """
+    随机输入(含inf/nan)逐个与 assert_allclose 的结论对比
+    """
+    rng = np.random.RandomState(2024)
+    specials = np.array([np.inf, -np.inf, np.nan, 0.0, 1.0], dtype=np.float64)
+    for _ in range(3000):
+        size = rng.randint(1, 6)
+        expect = rng.randn(size)
+        result = expect + rng.choice([0.0, 1e-12, 1e-6, 1e-2], size=size)
+        for arr in (expect, result):
+            mask = rng.rand(size) < 0.3
+            arr[mask] = rng.choice(specials, size=int(mask.sum()))
+        atol, rtol = rng.choice([0.0, 1e-10, 1e-5]), rng.choice([0.0, 1e-10, 1e-5])
+        assert _compare_fails(result, expect, atol, rtol) == _allclose_fails(result, expect, atol, rtol), (
+            result,
+            expect,
+            atol,
+            rtol,
+        )
+
+
+def test_large_leaf_streamed(monkeypatch):
+    """
+    超过分块大小的tensor流式计算, 结论不变
+    """
+    import strategy.compare as compare
+
+    monkeypatch.setattr(compare, "COMPARE_CHUNK_SIZE", 4)
+    expect = np.arange(10, dtype=np.float64)
+    result = expect.copy()
+    assert not _compare_fails(result, expect, 1e-10, 1e-10)
+    result[7] = np.inf
+    assert _compare_fails(result, expect, 1e-10, 1e-10)
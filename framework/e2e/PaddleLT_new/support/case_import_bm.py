@@ -0,0 +1,100 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+子图导入耗时评估: 对比按需加载(lazy)与整体导入(eager)下, 单个子图在全新进程中的导入耗时
+用法(在PaddleLT_new目录下执行):
+    python support/case_import_bm.py --case_dir layercase/sublayer1000 --num 20
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+PLT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PLT_ROOT)
+
+from pltools.case_select import CaseSelect  # noqa: E402
+
+# 子进程中执行的导入片段, 输出 [导入耗时, 已加载的case模块数]
+CHILD_SNIPPET = """
+import sys, time, json
+t0 = time.perf_counter()
+from generator.case_loader import load_case_module
+load_case_module(sys.argv[1])
+cost = time.perf_counter() - t0
+case_roots = ("layercase", "layerApicase", "layerTorchcase", "layerOCRcase", "layerNLPcase", "diy")
+print(json.dumps([cost, len([m for m in sys.modules if m.split(".")[0] in case_roots])]))
+"""
+
+
+def single_import(py_cmd, layerfile, lazy):
+    """
+    全新进程中导入单个子图
+    :return: (进程总耗时, 导入耗时, 已加载模块数)
+    """
+    env = os.environ.copy()
+    env["PLT_CASE_LAZY_IMPORT"] = "True" if lazy else "False"
+    env.setdefault("FRAMEWORK", "paddle")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [py_cmd, "-c", CHILD_SNIPPET, layerfile],
+        env=env,
+        cwd=PLT_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError("import {} failed: {}".format(layerfile, proc.stderr))
+    cost, module_num = json.loads(proc.stdout.strip().splitlines()[-1])
+    return wall, cost, module_num
+
+
+def summary(records):
+    """
+    统计耗时均值与中位数
+    """
+    walls = sorted(r[0] for r in records)
+    costs = sorted(r[1] for r in records)
+    return {
+        "wall_mean": round(sum(walls) / len(walls), 4),
+        "wall_median": round(walls[len(walls) // 2], 4),
+        "import_mean": round(sum(costs) / len(costs), 4),
+        "import_median": round(costs[len(costs) // 2], 4),
+        "module_num_mean": round(sum(r[2] for r in records) / len(records), 1),
+    }
+
+
+def main():
+    """
+    main
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--case_dir", type=str, default="layercase/sublayer1000", help="子图目录")
+    parser.add_argument("--num", type=int, default=20, help="抽样子图数量")
+    parser.add_argument("--seed", type=int, default=33, help="抽样随机种子")
+    parser.add_argument("--py_cmd", type=str, default=sys.executable, help="python解释器")
+    args = parser.parse_args()
+
+    py_list = CaseSelect(args.case_dir, None).get_py_list(base_path=args.case_dir, py_list=[])
+    random.seed(args.seed)
+    sample = random.sample(py_list, min(args.num, len(py_list)))
+
+    result = {}
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        records = [single_import(args.py_cmd, layerfile, lazy) for layerfile in sample]
+        result[mode] = summary(records)
+        print("{}: {}".format(mode, result[mode]))
+
+    speedup = result["eager"]["import_mean"] / max(result["lazy"]["import_mean"], 1e-9)
+    print("case num: {}, per-case import speedup(lazy vs eager): {:.2f}x".format(len(sample), speedup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+子图结果入库耗时评估: 在sqlite本地替身上对比逐行insert+commit与BulkWriter批量写入
+用法(在PaddleLT_new目录下执行):
+    python support/db_insert_bm.py --num 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+PLT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PLT_ROOT)
+
+from db.db import DB  # noqa: E402
+from bulk_writer import BulkWriter  # noqa: E402
+
+
+def synthetic_cases(num, seed):
+    """
+    生成子图性能结果, 结构与LayerBenchmarkDB入库的data_dict一致
+    """
+    random.seed(seed)
+    data_dict = {}
+    for i in range(num):
+        title = "layercase^sublayer1000^Det_cases^model_{}^SIR_{}".format(i // 50, i)
+        data_dict[title] = {
+            "dy2st_eval_cinn_perf": round(random.uniform(1e-4, 1e-2), 6),
+            "dy2st_eval_perf": round(random.uniform(1e-4, 1e-2), 6),
+            "dy2st_eval_cinn_perf^significant": random.random() > 0.5,
+        }
+    return data_dict
+
+
+def new_db(path):
+    """
+    全新的sqlite库
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ["PLT_DB_SQLITE"] = path
+    return DB(backend="sqlite")
+
+
+def row_insert(db, data_dict, create_time):
+    """
+    旧方式: 逐行insert, 每行commit
+    """
+    for title, perf_dict in data_dict.items():
+        db.insert_case(jid=1, case_name=title, result=json.dumps(perf_dict), create_time=create_time)
+
+
+def bulk_insert(db, data_dict, create_time):
+    """
+    BulkWriter批量写入, 一次事务提交
+    """
+    writer = BulkWriter(db=db)
+    for title, perf_dict in data_dict.items():
+        writer.add(
+            table="layer_case",
+            row={"jid": 1, "case_name": title, "result": json.dumps(perf_dict), "create_time": create_time},
+        )
+    writer.close()
+
+
+def main():
+    """
+    main
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num", type=int, default=5000, help="子图结果数量")
+    parser.add_argument("--seed", type=int, default=33, help="随机种子")
+    parser.add_argument("--db_dir", type=str, default=tempfile.gettempdir(), help="sqlite文件目录")
+    args = parser.parse_args()
+
+    data_dict = synthetic_cases(args.num, args.seed)
+    create_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    result = {}
+
+    db = new_db(os.path.join(args.db_dir, "plt_db_bm_row.db"))
+    start = time.perf_counter()
+    row_insert(db, data_dict, create_time)
+    result["row"] = {"total": round(time.perf_counter() - start, 4)}
+
+    db = new_db(os.path.join(args.db_dir, "plt_db_bm_bulk.db"))
+    start = time.perf_counter()
+    bulk_insert(db, data_dict, create_time)
+    result["bulk"] = {"total": round(time.perf_counter() - start, 4)}
+    db.cursor.execute("SELECT COUNT(*) FROM `layer_case`")
+    assert db.cursor.fetchone()[0] == args.num
+
+    for mode, cost in result.items():
+        print("{}: {}".format(mode, cost))
+    print(
+        "case num: {}, speedup(bulk vs row): {:.2f}x".format(
+            args.num, result["row"]["total"] / max(result["bulk"]["total"], 1e-9)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -139,9 +139,7 @@ class CIdb(DB):
         else:
             time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             try:
-                for case_name, data_dict in cases_dict.items():
-                    # print('data_dict is: ', data_dict)
-                    self.insert_case(jid=job_id, data_dict=data_dict, create_time=time_now)
+                self.insert_cases(jid=job_id, data_list=list(cases_dict.values()), create_time=time_now)
                 self.ci_update_job(id=job_id, status="done", update_time=time_now)
             except Exception as e:
                 self.ci_update_job(id=job_id, status="error", update_time=time_now)
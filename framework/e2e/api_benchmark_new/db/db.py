@@ -6,24 +6,59 @@
 db object
 """
 
+import os
+import sys
 import json
+import sqlite3
 import traceback
 from datetime import datetime
 import yaml
-import pymysql
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "tools"))
+from bulk_writer import BulkWriter  # noqa: E402
 
 # from utils.logger import logger
 
 ACCURACY = "%.6g"
 
+# sqlite本地替身的建表语句, 仅包含job/case录入用到的字段
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS `job` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT, `framework` TEXT, `status` TEXT, `mode` TEXT, `commit` TEXT,
+        `version` TEXT, `hostname` TEXT, `place` TEXT, `system` TEXT, `cuda` TEXT, `cudnn` TEXT, `snapshot` TEXT,
+        `md5_id` TEXT, `uid` TEXT, `routine` INTEGER, `ci` INTEGER, `comment` TEXT, `enable_backward` INTEGER,
+        `python` TEXT, `yaml_info` TEXT, `wheel_link` TEXT, `description` TEXT, `create_time` TEXT,
+        `update_time` TEXT)""",
+    """CREATE TABLE IF NOT EXISTS `case` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT, `jid` INTEGER, `case_name` TEXT, `api` TEXT, `result` TEXT,
+        `create_time` TEXT)""",
+]
+
 
 class DB(object):
     """DB class"""
 
-    def __init__(self, storage="storage.yaml"):
+    def __init__(self, storage="storage.yaml", backend=None):
+        """
+        :param storage: 信息配置文件
+        :param backend: mysql或sqlite, 默认读取环境变量PLT_DB_BACKEND. sqlite为本地替身, 路径读取PLT_DB_SQLITE
+        """
         self.storage = storage
-        host, port, user, password, database = self.load_storge()
-        self.db = pymysql.connect(host=host, port=port, user=user, password=password, database=database, charset="utf8")
+        self.backend = backend or os.environ.get("PLT_DB_BACKEND", "mysql")
+        if self.backend == "sqlite":
+            self.db = sqlite3.connect(os.environ.get("PLT_DB_SQLITE", "api_benchmark.db"), check_same_thread=False)
+            for sql in SQLITE_SCHEMA:
+                self.db.execute(sql)
+            self.db.commit()
+            self.placeholder = "?"
+        else:
+            import pymysql
+
+            host, port, user, password, database = self.load_storge()
+            self.db = pymysql.connect(
+                host=host, port=port, user=user, password=password, database=database, charset="utf8"
+            )
+            self.placeholder = "%s"
         self.cursor = self.db.cursor()
 
     def load_storge(self):
@@ -53,20 +88,38 @@ class DB(object):
         sql_table = "`" + table + "`"
         ls = [(k, data[k]) for k in data if data[k] is not None]
         keys = ",".join(("`" + i[0] + "`") for i in ls)
-        values = ",".join("%r" % i[1] for i in ls)
+        values = ",".join([self.placeholder] * len(ls))
 
         sql = "INSERT INTO {table}({keys}) VALUES ({values})".format(table=sql_table, keys=keys, values=values)
-        # sql = 'insert %s (' % table + ','.join(('`' + i[0] + '`') for i in ls) + \
-        #       ') values (' + ','.join('%r' % i[1] for i in ls) + ')'
         try:
-            self.cursor.execute(sql)
-            id = self.db.insert_id()
+            self.cursor.execute(sql, tuple(i[1] for i in ls))
+            id = self.cursor.lastrowid
             self.db.commit()
         except Exception as e:
             # print(traceback.format_exc())
             print(e)
         return id
 
+    def insert_many(self, table, rows):
+        """
+        批量插入数据, 单次executemany, 调用方负责commit
+        :param rows: 字段相同的dict list
+        """
+        if not rows:
+            return
+        keys = list(rows[0].keys())
+        sql = "INSERT INTO `{table}`({keys}) VALUES ({values})".format(
+            table=table, keys=",".join("`" + k + "`" for k in keys), values=",".join([self.placeholder] * len(keys))
+        )
+        self.cursor.executemany(sql, [tuple(row[k] for k in keys) for row in rows])
+
+    def ping(self):
+        """
+        连接断开时重连, sqlite无需重连
+        """
+        if self.backend != "sqlite":
+            self.db.ping(True)
+
     def update(self, table, data, data_condition):
         """按照data_condition 更新数据"""
         sql_table = "`" + table + "`"
@@ -157,11 +210,30 @@ class DB(object):
             case_id = self.insert(table="case", data=data)
             if case_id == -1:
                 print("db ping again~~~")
-                self.db.ping(True)
+                self.ping()
                 continue
             else:
                 break
 
+    def insert_cases(self, jid, data_list, create_time):
+        """
+        批量向case表中录入数据, 整个job的case在同一个事务中提交
+        :param data_list: case dict list, 字段同insert_case的data_dict
+        """
+        writer = BulkWriter(db=self)
+        for data_dict in data_list:
+            writer.add(
+                table="case",
+                row={
+                    "jid": jid,
+                    "case_name": data_dict["case_name"],
+                    "api": data_dict["api"],
+                    "result": data_dict["result"],
+                    "create_time": create_time,
+                },
+            )
+        writer.close()
+
     # def insert_case_origin(self, jid, data_dict, create_time):
     #     """向case表中录入数据"""
     #     for k, v in data_dict["result"].items():
@@ -192,6 +264,10 @@ class DB(object):
         sql_table = "`" + table + "`"
         sql = "SHOW COLUMNS from {}".format(sql_table)
         try:
+            if self.backend == "sqlite":
+                self.cursor.execute("PRAGMA table_info({})".format(sql_table))
+                results = [column[1] for column in self.cursor.fetchall()]
+                return results
             self.cursor.execute(sql)
             results = [column[0] for column in self.cursor.fetchall()]
         except Exception as e:
@@ -0,0 +1,175 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+多核分片执行: 每个隔离cpu核一个进程并绑核, 按历史耗时从大到小派发case, 合并各进程结果
+"""
+
+import os
+import json
+import time
+import queue
+import multiprocessing
+import traceback
+
+
+def parse_core_list(core_list):
+    """
+    解析cpu核列表, 例如 "2-5,8" -> [2, 3, 4, 5, 8]
+    :param core_list: str或None
+    :return: list
+    """
+    cores = []
+    if not core_list or core_list == "None":
+        return cores
+    for item in str(core_list).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            start, end = item.split("-")
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(item))
+    return cores
+
+
+def set_threads(num_threads):
+    """
+    设定当前进程的OMP/MKL线程数, paddle已导入时同步通过paddle接口生效
+    """
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    try:
+        import paddle
+
+        paddle_base = getattr(paddle, "base", None) or getattr(paddle, "fluid", None)
+        if paddle_base is not None and hasattr(paddle_base.core, "set_num_threads"):
+            paddle_base.core.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+class ShardedExecutor(object):
+    """
+    多核分片执行器
+    """
+
+    def __init__(self, cores=None, threads=None, cost_file=None):
+        """
+        init
+        :param cores: cpu核list, 默认读取环境变量API_BM_CORES, 例如 "2-33"
+        :param threads: 每个进程的OMP/MKL线程数, 默认读取环境变量API_BM_THREADS
+        :param cost_file: case历史耗时记录, 默认读取环境变量API_BM_CASE_COST
+        """
+        self.cores = cores if cores is not None else parse_core_list(os.environ.get("API_BM_CORES"))
+        self.threads = int(threads or os.environ.get("API_BM_THREADS", "1"))
+        self.cost_file = cost_file or os.environ.get("API_BM_CASE_COST", "api_bm_case_cost.json")
+
+    def enabled(self):
+        """
+        多于一个核时启用分片执行
+        """
+        return len(self.cores) > 1
+
+    def load_cost(self):
+        """
+        加载case历史耗时(s)
+        """
+        if not os.path.exists(self.cost_file):
+            return {}
+        try:
+            with open(self.cost_file, "r") as f:
+                return json.load(f)
+        except Exception:
+            print(traceback.format_exc())
+            return {}
+
+    def save_cost(self, cost_dict):
+        """
+        更新case历史耗时, 保留未执行case的旧记录
+        """
+        history = self.load_cost()
+        history.update(cost_dict)
+        tmp_file = "{}.{}.tmp".format(self.cost_file, os.getpid())
+        with open(tmp_file, "w") as f:
+            json.dump(history, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.cost_file)
+
+    def order(self, cases):
+        """
+        按历史耗时从大到小排序, 无记录的case按已知耗时均值估计
+        """
+        history = self.load_cost()
+        known = [history[c] for c in cases if c in history]
+        default = sum(known) / len(known) if known else 1.0
+        return sorted(cases, key=lambda c: history.get(c, default), reverse=True)
+
+    def _worker(self, core, run_case, task_queue, result_queue):
+        """
+        子进程: 绑核, 设定线程数, 循环领取case执行
+        """
+        os.sched_setaffinity(0, {core})
+        set_threads(self.threads)
+        while True:
+            case_name = task_queue.get()
+            if case_name is None:
+                break
+            start = time.perf_counter()
+            try:
+                error_dict = run_case([case_name])
+            except Exception:
+                error_dict = {case_name: {"api": None, "exception": traceback.format_exc()}}
+            result_queue.put((case_name, error_dict, time.perf_counter() - start))
+        result_queue.put(None)
+
+    def run(self, cases, run_case):
+        """
+        分片执行, 各进程动态领取case, 长耗时case优先派发
+        :param cases: case名list
+        :param run_case: 可调用对象, 输入case名list, 返回error_dict, 在子进程中调用
+        :return: 合并后的error_dict
+        """
+        ctx = multiprocessing.get_context("fork")
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        for case_name in self.order(list(cases)):
+            task_queue.put(case_name)
+        processes = []
+        for core in self.cores[: max(len(cases), 1)]:
+            task_queue.put(None)
+            process = ctx.Process(target=self._worker, args=(core, run_case, task_queue, result_queue))
+            process.start()
+            processes.append(process)
+
+        # 先收集结果再join, 避免队列未取空导致子进程无法退出
+        error_dict = {}
+        cost_dict = {}
+        finished = 0
+        while finished < len(processes):
+            try:
+                item = result_queue.get(timeout=5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            if item is None:
+                finished += 1
+                continue
+            case_name, case_error, cost = item
+            error_dict.update(case_error)
+            cost_dict[case_name] = round(cost, 4)
+        for process in processes:
+            process.join()
+
+        # 子进程异常退出时, 未上报结果的case计为失败
+        for process in processes:
+            if process.exitcode != 0:
+                print("api benchmark worker pid {} exit with code {}".format(process.pid, process.exitcode))
+        for case_name in cases:
+            if case_name not in cost_dict and case_name not in error_dict:
+                error_dict[case_name] = {"api": None, "exception": "worker exited before reporting this case"}
+
+        self.save_cost(cost_dict)
+        return error_dict
@@ -5,6 +5,7 @@
 jelly_2 用于paddle单个产品执行
 """
 import random
+import time
 import timeit
 import os
 import json
@@ -37,6 +38,8 @@ class Jelly_v2(object):
         # enable_backward=True,
         loops=50,
         base_times=1000,
+        timing=None,
+        min_block=None,
     ):
         """
 
@@ -44,6 +47,8 @@ class Jelly_v2(object):
         :param place:  cpu or gpu (string)
         :param card: 0 1 2 3 (int)
         :param explain: case的说明 会打印在日志中
+        :param timing: batch: 分块计时, 扣除空循环开销; single: 逐次计时(旧方式). 默认读取环境变量API_BM_TIMING
+        :param min_block: 分块计时时单块最短耗时(s), 默认读取环境变量API_BM_MIN_BLOCK
         """
         self.seed = 33
         # self.enable_backward = enable_backward
@@ -56,6 +61,10 @@ class Jelly_v2(object):
         self.loops = loops
         # timeit 基础运行时间
         self.base_times = base_times
+        # 计时模式
+        self.timing = timing or os.environ.get("API_BM_TIMING", "batch")
+        self.min_block = float(min_block or os.environ.get("API_BM_MIN_BLOCK", "0.001"))
+        self._overhead = None
         # 设置logger
         # self.logger = logger
         self.logger = logger.get_log()
@@ -187,40 +196,80 @@ class Jelly_v2(object):
                     else:
                         self.method[key][k] = v
 
+    def _single_timing(self, func):
+        """
+        逐次计时: 预热20%后, 每次调用单独计时, 共loops * base_times个样本
+        """
+        timeit.timeit(func, number=int(0.2 * self.loops * self.base_times))  # 预热
+        time_list = []
+        for i in range(self.loops * self.base_times):
+            cost = timeit.timeit(func, number=1)
+            time_list.append(cost * self.base_times)
+        return time_list
+
+    @staticmethod
+    def _block(func, number):
+        """
+        连续执行number次的总耗时(s)
+        """
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    def _loop_overhead(self, number=10000, repeat=5):
+        """
+        空循环(含lambda调用)单次开销(s), 取多次中的最小值
+        """
+        if self._overhead is None:
+            noop = lambda: None  # noqa: E731
+            self._overhead = min(self._block(noop, number) for _ in range(repeat)) / number
+        return self._overhead
+
+    def _batch_timing(self, func):
+        """
+        分块计时: 自动选取块大小N使单块耗时不小于min_block,
+        每个样本为N次调用扣除空循环开销后的平均耗时, 共loops个样本
+        """
+        overhead = self._loop_overhead()
+        number = 1
+        while self._block(func, number) < self.min_block and number < self.base_times:
+            number = min(number * 2, self.base_times)
+        for i in range(max(int(0.2 * self.loops), 1)):  # 预热
+            self._block(func, number)
+        time_list = []
+        for i in range(self.loops):
+            cost = self._block(func, number) - overhead * number
+            time_list.append(max(cost, 0.0) / number * self.base_times)
+        return time_list
+
+    def _timing(self, func):
+        """
+        按计时模式测试func, 返回样本list, 单位为base_times次调用的耗时(s)
+        """
+        if self.timing == "single":
+            return self._single_timing(func)
+        return self._batch_timing(func)
+
     def paddle_forward(self):
         """
         主体测试逻辑
         """
-        forward_time_list = []
         if self._layertypes(self.api) == "func":
             input_param = dict(self.data, **self.param)
-            tmp = timeit.timeit(lambda: self.api(**input_param), number=int(0.2 * self.loops * self.base_times))  # 预热
-            for i in range(self.loops * self.base_times):
-                forward_time = timeit.timeit(lambda: self.api(**input_param), number=1)
-                forward_time_list.append(forward_time * self.base_times)
+            forward_time_list = self._timing(lambda: self.api(**input_param))
         elif self._layertypes(self.api) == "class":
             # obj = self.api(**self.param)
             # for i in range(self.loops):
             #     forward_time = timeit.timeit(lambda: obj(*self.data.values()), number=self.base_times)
             #     forward_time.append(forward_time)
             obj = self.api(**self.param)
-            # 预热
             if self.method == dict():
-                tmp = timeit.timeit(lambda: obj(*self.data.values()), number=int(0.2 * self.loops * self.base_times))
+                forward_time_list = self._timing(lambda: obj(*self.data.values()))
             else:
                 obj_method = eval("obj" + "." + list(self.method.keys())[0])
                 method_params_dict = self.method[list(self.method.keys())[0]]
-                tmp = timeit.timeit(
-                    lambda: obj_method(**method_params_dict), number=int(0.2 * self.loops * self.base_times)
-                )
-            for i in range(self.loops * self.base_times):
-                if self.method == dict():
-                    forward_time = timeit.timeit(lambda: obj(*self.data.values()), number=1)
-                else:
-                    obj_method = eval("obj" + "." + list(self.method.keys())[0])
-                    method_params_dict = self.method[list(self.method.keys())[0]]
-                    forward_time = timeit.timeit(lambda: obj_method(**method_params_dict), number=1)
-                forward_time_list.append(forward_time * self.base_times)
+                forward_time_list = self._timing(lambda: obj_method(**method_params_dict))
         elif self._layertypes(self.api) == "reload":
             # 判断"reload" api中有一个输入还是两个输入
             if "y" in self.data.keys():
@@ -237,29 +286,19 @@ class Jelly_v2(object):
             def func_x(x):
                 eval(expression)
 
-            # 预热
             if "y" in self.data.keys():
-                tmp = timeit.timeit(lambda: func(x, y), number=int(0.2 * self.loops * self.base_times))  # 预热
+                forward_time_list = self._timing(lambda: func(x, y))
             else:
-                tmp = timeit.timeit(lambda: func_x(x), number=int(0.2 * self.loops * self.base_times))  # 预热
-
-            for i in range(self.loops * self.base_times):
-                if "y" in self.data.keys():
-                    forward_time = timeit.timeit(lambda: func(x, y), number=1)
-                else:
-                    forward_time = timeit.timeit(lambda: func_x(x), number=1)
-                forward_time_list.append(forward_time * self.base_times)
+                forward_time_list = self._timing(lambda: func_x(x))
         else:
             raise AttributeError
 
-        del tmp
         return forward_time_list
 
     def paddle_total(self):
         """
         计算paddle 总体时间
         """
-        total_time_list = []
         if self._layertypes(self.api) == "func":
             input_param = dict(self.data, **self.param)
             res = self.api(**input_param)
@@ -269,10 +308,7 @@ class Jelly_v2(object):
                 res = self.api(**input_param)
                 res.backward(grad_tensor)
 
-            tmp = timeit.timeit(lambda: func(input_param), number=int(0.2 * self.loops * self.base_times))  # 预热
-            for i in range(self.loops * self.base_times):
-                total_time = timeit.timeit(lambda: func(input_param), number=1)
-                total_time_list.append(total_time * self.base_times)
+            total_time_list = self._timing(lambda: func(input_param))
         elif self._layertypes(self.api) == "class":
             # obj = self.api(**self.param)
             # res = obj(*self.data.values())
@@ -294,19 +330,10 @@ class Jelly_v2(object):
                 res = obj_method(**input_param)
                 res.backward(grad_tensor)
 
-            # 预热
             if self.method == dict():
-                tmp = timeit.timeit(lambda: clas(self.data.values()), number=int(0.2 * self.loops * self.base_times))
+                total_time_list = self._timing(lambda: clas(self.data.values()))
             else:
-                tmp = timeit.timeit(
-                    lambda: clas_method(method_params_dict), number=int(0.2 * self.loops * self.base_times)
-                )
-            for i in range(self.loops * self.base_times):
-                if self.method == dict():
-                    total_time = timeit.timeit(lambda: clas(self.data.values()), number=1)
-                else:
-                    total_time = timeit.timeit(lambda: clas_method(method_params_dict), number=1)
-                total_time_list.append(total_time * self.base_times)
+                total_time_list = self._timing(lambda: clas_method(method_params_dict))
         elif self._layertypes(self.api) == "reload":
             if "y" in self.data.keys():
                 x = self.data["x"]
@@ -326,21 +353,13 @@ class Jelly_v2(object):
                 res = eval(expression)
                 res.backward(grad_tensor)
 
-            # 预热
             if "y" in self.data.keys():
-                tmp = timeit.timeit(lambda: func(x, y), number=int(0.2 * self.loops * self.base_times))  # 预热
+                total_time_list = self._timing(lambda: func(x, y))
             else:
-                tmp = timeit.timeit(lambda: func_x(x), number=int(0.2 * self.loops * self.base_times))  # 预热
-            for i in range(self.loops * self.base_times):
-                if "y" in self.data.keys():
-                    total_time = timeit.timeit(lambda: func(x, y), number=1)
-                else:
-                    total_time = timeit.timeit(lambda: func_x(x), number=1)
-                total_time_list.append(total_time * self.base_times)
+                total_time_list = self._timing(lambda: func_x(x))
         else:
             raise AttributeError
 
-        del tmp
         return total_time_list
 
     # def run(self):
@@ -14,6 +14,7 @@ from datetime import datetime
 
 from statistics.statistics import Statistics
 from db.db import DB
+from executor import ShardedExecutor
 
 import paddle
 
@@ -77,6 +78,9 @@ class ApiBenchmarkBASE(object):
         # 初始化统计模块
         self.statistics = Statistics()
 
+        # 多核分片执行
+        self.executor = ShardedExecutor()
+
     def _run_test(self, case_name, loops, base_times, log="log"):
         """
         运行单个case
@@ -159,14 +163,27 @@ class ApiBenchmarkBASE(object):
 
         return error_logo, error_info, api
 
-    def _run_main(self, all_cases, loops, base_times, log="log"):
+    def _run_main(self, all_cases, loops=None, base_times=None, log="log"):
         """
-        对指定case运行测试
+        对指定case运行测试, 设定多个cpu核(API_BM_CORES)时分片到多进程并行执行
         :param all_cases: list of cases
         :param latest_id: 任务jid
         :param iters: 迭代次数
         :return:
         """
+        loops = loops or self.loops
+        base_times = base_times or self.base_times
+        if self.executor.enabled():
+            return self.executor.run(
+                cases=list(all_cases),
+                run_case=lambda cases: self._run_cases(all_cases=cases, loops=loops, base_times=base_times, log=log),
+            )
+        return self._run_cases(all_cases=all_cases, loops=loops, base_times=base_times, log=log)
+
+    def _run_cases(self, all_cases, loops, base_times, log="log"):
+        """
+        在当前进程中依次运行case
+        """
         error_dict = {}
 
         for case_name in all_cases:
@@ -372,16 +389,14 @@ class ApiBenchmarkBASE(object):
         数据库交互
         """
         # db = DB(storage=self.storage)
-        latest_case = {}
         data = dict()
         for i in os.listdir("./{}/".format(log)):
             with open("./{}/".format(log) + i) as case:
                 res = case.readline()
                 api = i.split(".")[0]
                 data[api] = res
+        latest_cases = []
         for k, v in data.items():
-            latest_case["jid"] = latest_id
-            latest_case["case_name"] = k
-            latest_case["api"] = json.loads(v).get("api")
-            latest_case["result"] = v
-            db.insert_case(jid=latest_id, data_dict=latest_case, create_time=self.now_time)
+            latest_case = {"jid": latest_id, "case_name": k, "api": json.loads(v).get("api"), "result": v}
+            latest_cases.append(latest_case)
+        db.insert_cases(jid=latest_id, data_list=latest_cases, create_time=self.now_time)
@@ -8,7 +8,6 @@
 """
 
 import os
-import multiprocessing
 import socket
 import platform
 
@@ -61,7 +60,7 @@ class ApiBenchmarkCI(ApiBenchmarkBASE):
         """
         # 测试控制项
         self.core_index = args.core_index  # 第一个cpu核序号
-        self.multiprocess_num = 4  # 并行进程数
+        self.multiprocess_num = 4  # 并行进程数, 未设定API_BM_CORES时使用core_index起的连续核
         self.loops = 50  # 循环次数
         self.base_times = 1000  # timeit 基础运行时间
         self.default_dtype = "float32"
@@ -129,6 +128,10 @@ class ApiBenchmarkCI(ApiBenchmarkBASE):
         # 初始化统计模块
         self.statistics = Statistics()
 
+        # 多核分片执行
+        if not self.executor.enabled():
+            self.executor.cores = list(range(self.core_index, self.core_index + self.multiprocess_num))
+
         # 邮件报警
         # self.email = Alarm(storage=self.storage)
 
@@ -156,58 +159,12 @@ class ApiBenchmarkCI(ApiBenchmarkBASE):
     #         start = end
     #     return res
 
-    def split_list(self, lst, n):
-        """
-        将列表按顺序划分为 n 份
-        Args:
-            lst (list): 待划分的列表
-            n (int): 划分的份数
-        Returns:
-            res (list): 划分后的列表，其中每个元素为原列表的 1/n 部分
-        """
-        if not isinstance(lst, list) or not isinstance(n, int) or len(lst) == 0 or n <= 0:
-            return []
-
-        quotient, remainder = divmod(len(lst), n)
-        res = [[] for _ in range(n)]
-        for i, value in enumerate(lst):
-            index = i % n
-            res[index].append(value)
-        return res
-
-    def _multi_run_main(self, all_cases, loops, base_times, result_queue):
-        """
-        multi run main
-        """
-        error_dict = self._run_main(all_cases=all_cases, loops=loops, base_times=base_times)
-        result_queue.put(error_dict)
-
     def _run_ci(self):
         """
 
         :return:
         """
-        multiprocess_cases = self.split_list(lst=list(self.all_cases), n=self.multiprocess_num)
-        processes = []
-        result_queue = multiprocessing.Queue()
-
-        for i, cases_list in enumerate(multiprocess_cases):
-            process = multiprocessing.Process(
-                target=self._multi_run_main, args=(cases_list, self.loops, self.base_times, result_queue)
-            )
-            process.start()
-            os.sched_setaffinity(process.pid, {self.core_index + i})
-            processes.append(process)
-
-        for process in processes:
-            process.join()
-
-        error_dict = {}
-        while not result_queue.empty():
-            result_dict = result_queue.get()
-            error_dict.update(result_dict)
-
-        # error_dict = self._run_main(all_cases=self.all_cases, loops=self.loops, base_times=self.base_times)
+        error_dict = self._run_main(all_cases=self.all_cases, loops=self.loops, base_times=self.base_times)
 
         # 查询数据库构建baseline
         db = CIdb(storage=self.storage)
@@ -340,27 +297,7 @@ class ApiBenchmarkCI(ApiBenchmarkBASE):
 
         :return:
         """
-        multiprocess_cases = self.split_list(lst=list(self.all_cases), n=self.multiprocess_num)
-        processes = []
-        result_queue = multiprocessing.Queue()
-
-        for i, cases_list in enumerate(multiprocess_cases):
-            process = multiprocessing.Process(
-                target=self._multi_run_main, args=(cases_list, self.loops, self.base_times, result_queue)
-            )
-            process.start()
-            os.sched_setaffinity(process.pid, {self.core_index + i})
-            processes.append(process)
-
-        for process in processes:
-            process.join()
-
-        error_dict = {}
-        while not result_queue.empty():
-            result_dict = result_queue.get()
-            error_dict.update(result_dict)
-
-        # error_dict = self._run_main(all_cases=self.all_cases, loops=self.loops, base_times=self.base_times)
+        error_dict = self._run_main(all_cases=self.all_cases, loops=self.loops, base_times=self.base_times)
 
         # 初始化数据库
         db = CIdb(storage=self.storage)
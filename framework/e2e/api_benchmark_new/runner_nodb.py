@@ -20,6 +20,7 @@ from statistics.statistics import Statistics
 from db.xly_db import XLYdb
 from info.snapshot import Snapshot
 from alarm.alarm import Alarm
+from executor import ShardedExecutor
 
 sys.path.append("..")
 from utils.yaml_loader import YamlLoader
@@ -116,6 +117,9 @@ class ApiBenchmarkNoDB(object):
         # 初始化统计模块
         self.statistics = Statistics()
 
+        # 多核分片执行
+        self.executor = ShardedExecutor()
+
         # 邮件报警
         # self.email = Alarm(storage=self.storage)
 
@@ -181,11 +185,19 @@ class ApiBenchmarkNoDB(object):
 
     def _run_main(self, all_cases):
         """
-        对指定case运行测试
+        对指定case运行测试, 设定多个cpu核(API_BM_CORES)时分片到多进程并行执行
         :param all_cases: list of cases
         :param iters: 迭代次数
         :return:
         """
+        if self.executor.enabled():
+            return self.executor.run(cases=list(all_cases), run_case=self._run_cases)
+        return self._run_cases(all_cases)
+
+    def _run_cases(self, all_cases):
+        """
+        在当前进程中依次运行case
+        """
         error_dict = {}
 
         for case_name in all_cases:
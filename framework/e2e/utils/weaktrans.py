@@ -6,12 +6,17 @@
 transform base
 """
 
+import os
+import sys
 import random
 from inspect import isclass
 import paddle
 import numpy as np
 from utils.logger import logger
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools"))
+from log_summary import LogSummary  # noqa: E402
+
 
 class Framework(object):
     """
@@ -89,7 +94,7 @@ class WeakTrans(object):
         """
         inputs_info = self.case[framework].get("inputs", None)
         inputs = self._generate_params(inputs_info)
-        self.logger.get_log().info("Case的inputs设置：{}".format(inputs))
+        self.logger.get_log().info("Case的inputs设置：%s", LogSummary(inputs))
         return inputs
 
     def get_params(self, framework):
@@ -99,7 +104,7 @@ class WeakTrans(object):
         # 获取参数输入
         params_info = self.case[framework].get("params", None)
         params = self._generate_params(params_info)
-        self.logger.get_log().info("Case的params设置：{}".format(params))
+        self.logger.get_log().info("Case的params设置：%s", LogSummary(params))
         return params
 
     def get_method(self, framework):
@@ -109,7 +114,7 @@ class WeakTrans(object):
         # 获取参数输入
         method_info = self.case[framework].get("method", None)
         # method = self._generate_params(method_info)
-        self.logger.get_log().info("Case的api调用的方法method设置：{}".format(method_info))
+        self.logger.get_log().info("Case的api调用的方法method设置：%s", LogSummary(method_info))
         return method_info
 
     def get_func(self, framework):
@@ -5,10 +5,207 @@
 yaml base
 """
 
+import os
+import struct
+import pickle
+import stat
+import hashlib
+
 import yaml
 
 # from old_design.logger import Logger, logger
 
+CACHE_MAGIC = b"E2EYAML2"
+# 默认缓存目录, 仅当前用户可访问
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "e2e_yaml")
+
+
+class _CatalogueLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+    """
+    C实现的safe loader, 额外支持case中用到的!!python/tuple
+    """
+
+
+_CatalogueLoader.add_constructor(
+    "tag:yaml.org,2002:python/tuple", lambda loader, node: tuple(loader.construct_sequence(node))
+)
+
+
+def _private_path(path, is_dir):
+    """
+    path为当前用户所有且其他用户不可写, 用于校验缓存: 缓存内容为pickle, 被他人篡改即可执行任意代码
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not (stat.S_ISDIR(st.st_mode) if is_dir else stat.S_ISREG(st.st_mode)):
+        return False
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _api_name(info):
+    """
+    case中paddle api_name, 不存在时返回None
+    """
+    if isinstance(info, dict) and isinstance(info.get("paddle"), dict):
+        return info["paddle"].get("api_name")
+    return None
+
+
+class YamlCatalogue(object):
+    """
+    编译后的yaml case目录: 首次解析后缓存为二进制文件(以yaml的mtime与内容hash校验),
+    按case名与api_name建立索引, 单个case按需反序列化
+    缓存文件: magic + header长度 + pickle header(索引) + 逐个case的pickle数据
+    缓存目录以0700创建, 目录或缓存文件不属于当前用户、或可被其他用户写入时不使用缓存
+    """
+
+    def __init__(self, yml, cache_dir=None):
+        """
+        :param yml: yaml路径
+        :param cache_dir: 缓存目录, 默认读取环境变量E2E_YAML_CACHE(默认~/.cache/e2e_yaml), 设为None时不缓存
+        """
+        self.yml_path = os.path.abspath(yml)
+        cache_dir = cache_dir or os.environ.get("E2E_YAML_CACHE", DEFAULT_CACHE_DIR)
+        if cache_dir == "None":
+            self.cache_file = None
+        else:
+            path_hash = hashlib.sha1(self.yml_path.encode("utf-8")).hexdigest()[:16]
+            self.cache_file = os.path.join(cache_dir, "{}_{}.cache".format(os.path.basename(yml), path_hash))
+        self.index = {}
+        self.api_index = {}
+        self.empty = False
+        self._fd = None
+        self._data_start = 0
+        # 缓存不可用时全部case保存在内存中
+        self._in_memory = False
+        self._cases = {}
+        self._load()
+
+    def __del__(self):
+        if self._fd is not None:
+            os.close(self._fd)
+
+    def _read_header(self):
+        """
+        读取缓存header, 缓存不存在或损坏时返回None
+        """
+        if self.cache_file is None or not os.path.exists(self.cache_file):
+            return None
+        if not _private_path(os.path.dirname(self.cache_file), True) or not _private_path(self.cache_file, False):
+            return None
+        try:
+            with open(self.cache_file, "rb") as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                (header_len,) = struct.unpack("<Q", f.read(8))
+                header = pickle.loads(f.read(header_len))
+            header["data_start"] = len(CACHE_MAGIC) + 8 + header_len
+            return header
+        except Exception:
+            return None
+
+    def _load(self):
+        """
+        mtime与文件大小一致时直接使用缓存, 否则比对内容hash, 不一致时重新解析
+        """
+        stat = os.stat(self.yml_path)
+        header = self._read_header()
+        if header is None or header["mtime_ns"] != stat.st_mtime_ns or header["size"] != stat.st_size:
+            with open(self.yml_path, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if header is None or header["sha256"] != digest:
+                header = self._build(content, stat, digest)
+        self.index = header["index"]
+        self.api_index = header["api_index"]
+        self.empty = header["empty"]
+        if not self._in_memory:
+            self._fd = os.open(self.cache_file, os.O_RDONLY)
+            self._data_start = header["data_start"]
+
+    def _build(self, content, stat, digest):
+        """
+        解析yaml并写入缓存, 缓存不可写时仅保存在内存中
+        """
+        data = yaml.load(content, Loader=_CatalogueLoader)
+        empty = data is None
+        data = data or {}
+        blobs = []
+        index = {}
+        api_index = {}
+        offset = 0
+        for case_name, info in data.items():
+            blob = pickle.dumps(info, protocol=pickle.HIGHEST_PROTOCOL)
+            blobs.append(blob)
+            index[case_name] = (offset, len(blob))
+            offset += len(blob)
+            api_index.setdefault(_api_name(info), []).append(case_name)
+        header = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "empty": empty,
+            "index": index,
+            "api_index": api_index,
+        }
+        header_bytes = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+        header["data_start"] = len(CACHE_MAGIC) + 8 + len(header_bytes)
+
+        try:
+            if self.cache_file is None:
+                raise OSError("yaml cache disabled")
+            cache_dir = os.path.dirname(self.cache_file)
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            if not _private_path(cache_dir, True):
+                raise OSError("yaml cache dir {} is not private to current user".format(cache_dir))
+            tmp_file = "{}.{}.tmp".format(self.cache_file, os.getpid())
+            with os.fdopen(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                f.write(CACHE_MAGIC)
+                f.write(struct.pack("<Q", len(header_bytes)))
+                f.write(header_bytes)
+                for blob in blobs:
+                    f.write(blob)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            self._in_memory = True
+            self._cases = data
+        return header
+
+    def get(self, case_name):
+        """
+        获取单个case, 不存在时返回None
+        """
+        if case_name not in self._cases:
+            if case_name not in self.index:
+                return None
+            offset, length = self.index[case_name]
+            self._cases[case_name] = pickle.loads(os.pread(self._fd, length, self._data_start + offset))
+        return self._cases[case_name]
+
+    def keys(self):
+        """
+        全部case名, 保持yaml中的顺序
+        """
+        return self.index.keys()
+
+    def cases_by_api(self, api_name):
+        """
+        使用指定api_name的case名list
+        """
+        return list(self.api_index.get(api_name, []))
+
+    def to_dict(self):
+        """
+        完整的yaml内容, yaml为空时与yaml.load一致返回None
+        """
+        if self.empty:
+            return None
+        return {case_name: self.get(case_name) for case_name in self.index}
+
 
 class YamlLoader(object):
     """
@@ -18,12 +215,21 @@ class YamlLoader(object):
     def __init__(self, yml):
         """initialize"""
         try:
-            with open(yml, encoding="utf-8") as f:
-                self.yml = yaml.load(f, Loader=yaml.FullLoader)
+            self.catalogue = YamlCatalogue(yml)
         except Exception as e:
             print(e)
+        self._yml = None
+        self._loaded = False
         # self.logger = logger
 
+    @property
+    def yml(self):
+        """完整的yaml内容, 首次访问时加载全部case"""
+        if not self._loaded:
+            self._yml = self.catalogue.to_dict()
+            self._loaded = True
+        return self._yml
+
     def __str__(self):
         """str"""
         return str(self.yml)
@@ -33,11 +239,17 @@ class YamlLoader(object):
         get case info
         """
         # self.logger.get_log().info("get ->{}<- case profile".format(case_name))
-        return {"info": self.yml.get(case_name), "name": case_name}
+        return {"info": self.catalogue.get(case_name), "name": case_name}
 
     def get_all_case_name(self):
         """
         get all case name
         """
         # 获取全部case name
-        return self.yml.keys()
+        return self.catalogue.keys()
+
+    def get_case_name_by_api(self, api_name):
+        """
+        get case names of api_name
+        """
+        return self.catalogue.cases_by_api(api_name)
@@ -12,7 +12,6 @@ import threading
 from multiprocessing import Process
 
 import cv2
-import psutil
 import yaml
 import pytest
 import pynvml
@@ -25,8 +24,7 @@ from paddle.inference import convert_to_mixed_precision
 from pynvml.smi import nvidia_smi
 from .image_preprocess import read_images_path, get_images_npy, read_npy_path, preprocess, sig_fig_compare
 from .text_preprocess import ernie_data as text_pre
-
-_gpu_mem_lists = []
+from .sampling_monitor import SamplingMonitor, GPUSource
 
 FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
@@ -242,11 +240,10 @@ class InferenceTest(object):
         else:
             cuda_visible_device = 0
 
-        ori_gpu_mem = float(get_gpu_mem(cuda_visible_device)["used(MB)"])
-
-        record_thread = threading.Thread(target=record_by_pid, args=(os.getpid(), cuda_visible_device))
-        record_thread.setDaemon(True)
-        record_thread.start()
+        # the first sample is taken in start(), before any inference
+        monitor = SamplingMonitor([GPUSource(cuda_visible_device)], interval=0.01)
+        monitor.start()
+        ori_gpu_mem = monitor.max("gpu", "memory.used")
 
         input_names = predictor.get_input_names()
         for i, input_data_name in enumerate(input_names):
@@ -259,7 +256,8 @@ class InferenceTest(object):
         output_names = predictor.get_output_names()
         output_handle = predictor.get_output_handle(output_names[0])
         output_data = output_handle.copy_to_cpu()
-        gpu_max_mem = max([float(i["used(MB)"]) for i in _gpu_mem_lists])
+        monitor.stop()
+        gpu_max_mem = monitor.max("gpu", "memory.used")
         assert abs(gpu_max_mem - ori_gpu_mem) < 1, "set disable_gpu(), but gpu activity found"
 
     def mkldnn_test(
@@ -801,17 +799,7 @@ class InferenceTest(object):
                 self.pd_config.delete_pass(ir_pass)
 
         predictors = paddle_infer.PredictorPool(self.pd_config, thread_num)
-        for i in range(thread_num):
-            record_thread = threading.Thread(
-                target=self.run_multi_thread_test_predictor,
-                args=(predictors.retrieve(i), input_data_dict, output_data_dict, repeat, delta),
-            )
-            record_thread.start()
-            record_thread.join()
-
-        while not self.errors.empty():
-            print("errors queue not empty!!!")
-            raise self.errors.get()
+        self.run_multi_thread(predictors, thread_num, input_data_dict, output_data_dict, repeat, delta)
 
     def trt_dynamic_multi_thread_test(
         self,
@@ -870,20 +858,126 @@ class InferenceTest(object):
             {names[i]: opt_input_shape[i] for i in range(len(names))},
         )
         predictors = paddle_infer.PredictorPool(self.pd_config, thread_num)
+        self.run_multi_thread(predictors, thread_num, input_data_dict, output_data_dict, repeat, delta)
+
+    def multi_thread_stress_test(
+        self,
+        input_data_dict: dict,
+        output_data_dict: dict,
+        thread_num=None,
+        duration=None,
+        repeat=10,
+        delta=1e-5,
+        device="mkldnn",
+        cpu_num_threads=1,
+        mkldnn_cache_capacity=1,
+        gpu_mem=1000,
+    ):
+        """
+        concurrent stress test, every predictor of a PredictorPool runs in its own thread at the same time
+        Args:
+            input_data_dict(dict): input data constructed as dictionary
+            output_data_dict(dict): output data constructed as dictionary
+            thread_num(int): number of threads, default env INFER_STRESS_THREADS or 4
+            duration(float): seconds every thread keeps running, default env INFER_STRESS_DURATION,
+                             0 means run repeat times
+            repeat(int): inference repeat time of every thread when duration is 0
+            delta(float): difference threshold between inference outputs and thruth value
+            device(str): [cpu, mkldnn, gpu]
+            cpu_num_threads(int): math library threads of every predictor
+            mkldnn_cache_capacity(int): MKLDNN cache capacity
+            gpu_mem(int): gpu memory pool size(MB)
+        Returns:
+            stats(dict): aggregate qps and latency
+        """
+        if thread_num is None:
+            thread_num = int(os.environ.get("INFER_STRESS_THREADS", "4"))
+        if duration is None:
+            duration = float(os.environ.get("INFER_STRESS_DURATION", "0"))
+        if device == "gpu":
+            self.pd_config.enable_use_gpu(gpu_mem, 0)
+        else:
+            self.pd_config.disable_gpu()
+            self.pd_config.set_cpu_math_library_num_threads(cpu_num_threads)
+            if device == "mkldnn":
+                self.pd_config.enable_mkldnn()
+                self.pd_config.set_mkldnn_cache_capacity(mkldnn_cache_capacity)
+            else:
+                self.pd_config.disable_mkldnn()
+        predictors = paddle_infer.PredictorPool(self.pd_config, thread_num)
+        return self.run_multi_thread(
+            predictors, thread_num, input_data_dict, output_data_dict, repeat, delta, duration=duration
+        )
+
+    def run_multi_thread(
+        self, predictors, thread_num, input_data_dict: dict, output_data_dict: dict, repeat=1, delta=1e-5, duration=0
+    ):
+        """
+        start every predictor of the pool in its own thread, then join them all
+        Args:
+            predictors: paddle inference PredictorPool
+            thread_num(int): number of threads
+            input_data_dict(dict): input data constructed as dictionary
+            output_data_dict(dict): output data constructed as dictionary
+            repeat(int): inference repeat time of every thread when duration is 0
+            delta(float): difference threshold between inference outputs and thruth value
+            duration(float): seconds every thread keeps running, 0 means run repeat times
+        Returns:
+            stats(dict): aggregate qps and latency
+        """
+        window = {}
+        # all threads start timing together once their inputs are ready
+        barrier = threading.Barrier(thread_num, action=lambda: window.setdefault("start", time.perf_counter()))
+        latencies = [[] for _ in range(thread_num)]
+        threads = []
         for i in range(thread_num):
             record_thread = threading.Thread(
                 target=self.run_multi_thread_test_predictor,
                 args=(predictors.retrieve(i), input_data_dict, output_data_dict, repeat, delta),
+                kwargs={"duration": duration, "latencies": latencies[i], "barrier": barrier},
             )
             record_thread.start()
+            threads.append(record_thread)
+        for record_thread in threads:
             record_thread.join()
+        wall_time = time.perf_counter() - window.get("start", time.perf_counter())
 
+        errors = []
         while not self.errors.empty():
+            errors.append(self.errors.get())
+        if errors:
             print("errors queue not empty!!!")
-            raise self.errors.get()
+            # BrokenBarrierError only means another thread failed first
+            raise ([e for e in errors if not isinstance(e, threading.BrokenBarrierError)] or errors)[0]
+
+        stats = latency_stats(latencies, wall_time)
+        print(
+            "[Benchmark] threads={}, total runs={}, QPS={}, latency(ms): avg={}, p50={}, p90={}, p99={}, max={}".format(
+                thread_num,
+                stats["total"],
+                stats["qps"],
+                stats["avg_ms"],
+                stats["p50_ms"],
+                stats["p90_ms"],
+                stats["p99_ms"],
+                stats["max_ms"],
+            )
+        )
+        print("[Benchmark] latency histogram bin edges(ms): {}".format(stats["bin_edges_ms"]))
+        for i, hist in enumerate(stats["thread_hist"]):
+            print("[Benchmark] thread {} runs={}, histogram={}".format(i, len(latencies[i]), hist))
+        return stats
 
     def run_multi_thread_test_predictor(
-        self, predictor, input_data_dict: dict, output_data_dict: dict, repeat=1, delta=1e-5
+        self,
+        predictor,
+        input_data_dict: dict,
+        output_data_dict: dict,
+        repeat=1,
+        delta=1e-5,
+        duration=0,
+        latencies=None,
+        barrier=None,
     ):
         """
         test paddle predictor in multithreaded task
@@ -893,16 +987,33 @@ class InferenceTest(object):
             output_data_dict(dict): output data constructed as dictionary
             repeat(int): inference repeat time, set to catch gpu mem
             delta(float): difference threshold between inference outputs and thruth value
+            duration(float): seconds to keep running, 0 means run repeat times
+            latencies(list): latency(s) of every run is appended to it
+            barrier(threading.Barrier): wait for other threads before running
         Returns:
             None
         """
-        input_names = predictor.get_input_names()
-        for _, input_data_name in enumerate(input_names):
-            input_handle = predictor.get_input_handle(input_data_name)
-            input_handle.copy_from_cpu(input_data_dict[input_data_name])
-
-        for i in range(repeat):
-            predictor.run()
+        try:
+            input_names = predictor.get_input_names()
+            for _, input_data_name in enumerate(input_names):
+                input_handle = predictor.get_input_handle(input_data_name)
+                input_handle.copy_from_cpu(input_data_dict[input_data_name])
+
+            if barrier is not None:
+                barrier.wait()
+            end_time = time.perf_counter() + duration
+            runs = 0
+            while (runs < repeat) if not duration else (time.perf_counter() < end_time):
+                start = time.perf_counter()
+                predictor.run()
+                if latencies is not None:
+                    latencies.append(time.perf_counter() - start)
+                runs += 1
+        except Exception as e:
+            if barrier is not None:
+                barrier.abort()
+            self.errors.put(e)
+            return
         output_names = predictor.get_output_names()
         print("output_names:", output_names)
         print("truth_value_names:", list(output_data_dict.keys()))
@@ -918,6 +1029,33 @@ class InferenceTest(object):
                 self.errors.put(e)
 
 
+def latency_stats(latencies, wall_time, bins=10):
+    """
+    aggregate latency of all threads
+    Args:
+        latencies(list): latency(s) list of every thread
+        wall_time(float): seconds from all threads started to all threads finished
+        bins(int): number of histogram bins, shared by all threads
+    Returns:
+        stats(dict): qps, latency percentiles(ms) and per thread histogram
+    """
+    all_latency = np.array([t for thread_latency in latencies for t in thread_latency]) * 1000
+    if all_latency.size == 0:
+        all_latency = np.zeros(1)
+    edges = np.histogram_bin_edges(all_latency, bins=bins)
+    return {
+        "total": sum(len(thread_latency) for thread_latency in latencies),
+        "qps": round(sum(len(thread_latency) for thread_latency in latencies) / max(wall_time, 1e-9), 2),
+        "avg_ms": round(float(np.mean(all_latency)), 3),
+        "p50_ms": round(float(np.percentile(all_latency, 50)), 3),
+        "p90_ms": round(float(np.percentile(all_latency, 90)), 3),
+        "p99_ms": round(float(np.percentile(all_latency, 99)), 3),
+        "max_ms": round(float(np.max(all_latency)), 3),
+        "bin_edges_ms": [round(float(e), 3) for e in edges],
+        "thread_hist": [np.histogram(np.array(t) * 1000, bins=edges)[0].tolist() for t in latencies],
+    }
+
+
 def get_gpu_mem(gpu_id=0):
     """
     get gpu mem from gpu id
@@ -938,22 +1076,3 @@ def get_gpu_mem(gpu_id=0):
     gpu_mem["gpu_mem_utilization_rate(%)"] = gpu_utilization_info.memory
     pynvml.nvmlShutdown()
     return gpu_mem
-
-
-def record_by_pid(pid: int, cuda_visible_device: int):
-    """
-    record_by_pid
-    Args:
-        pid(int): pid of the process
-        cuda_visible_device(int): first gpu card of CUDA_VISIBLE_DEVICES
-    Returns:
-        gpu_max_mem(float): recorded max gpu mem
-    """
-    global _gpu_mem_lists
-
-    while psutil.pid_exists(pid):
-        gpu_mem = get_gpu_mem(cuda_visible_device)
-        _gpu_mem_lists.append(gpu_mem)
-
-    gpu_max_mem = max([float(i["used(MB)"]) for i in _gpu_mem_lists])
-    return gpu_max_mem
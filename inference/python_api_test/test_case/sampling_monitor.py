@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+in-process sampling monitor
+
+One background thread samples every source at a fixed interval. Sources keep their handles
+(psutil.Process, NVML handle) open between samples, and samples are kept in fixed size ring buffers,
+so memory does not grow with the test duration. Min/max/mean/count are streaming over all samples,
+percentiles are computed over the samples still in the ring buffer.
+"""
+import os
+import sys
+import threading
+import subprocess
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+
+class RingBuffer(object):
+    """
+    fixed size sample buffer with streaming statistics
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        __init__
+        Args:
+            capacity(int): number of latest samples kept for percentiles
+        """
+        self.data = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.sum = 0.0
+
+    def append(self, value):
+        """
+        append a sample
+        """
+        value = float(value)
+        self.data[self.count % self.capacity] = value
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sum += value
+
+    def values(self):
+        """
+        samples still in the buffer
+        """
+        return self.data[: min(self.count, self.capacity)]
+
+    def stats(self, percentiles=(50, 90, 99)):
+        """
+        Returns:
+            stats(dict): count/min/max/mean of all samples, pXX of buffered samples
+        """
+        if self.count == 0:
+            return {"count": 0}
+        res = {"count": self.count, "min": self.min, "max": self.max, "mean": self.sum / self.count}
+        for p, v in zip(percentiles, np.percentile(self.values(), percentiles)):
+            res["p{}".format(p)] = float(v)
+        return res
+
+
+class SampleSource(object):
+    """
+    base class of sampling sources
+    """
+
+    name = "base"
+
+    def open(self):
+        """
+        acquire handles, called once before the first sample
+        """
+        pass
+
+    def sample(self):
+        """
+        Returns:
+            values(dict): numeric values of this sample
+        """
+        raise NotImplementedError
+
+    def info(self):
+        """
+        Returns:
+            info(dict): static device information
+        """
+        return {}
+
+    def close(self):
+        """
+        release handles
+        """
+        pass
+
+
+class CPUSource(SampleSource):
+    """
+    cpu utilization and rss memory(MB) of a process
+    """
+
+    name = "cpu"
+
+    def __init__(self, pid=None):
+        self.pid = pid or os.getpid()
+        self.process = None
+
+    def open(self):
+        if psutil is None:
+            raise ImportError("psutil is not installed")
+        self.process = psutil.Process(self.pid)
+        # the first cpu_percent() call always returns 0
+        self.process.cpu_percent()
+
+    def sample(self):
+        return {
+            "cpu.util": self.process.cpu_percent(),
+            "memory.util": self.process.memory_percent(),
+            "memory.used": round(self.process.memory_info().rss / 1024.0 / 1024.0, 4),
+        }
+
+    def info(self):
+        try:
+            import cpuinfo
+
+            return {"name": cpuinfo.get_cpu_info()["brand_raw"]}
+        except Exception:
+            return {}
+
+
+class GPUSource(SampleSource):
+    """
+    nvidia gpu memory(MiB) and utilization by NVML, nvmlInit once per monitor
+    """
+
+    name = "gpu"
+
+    def __init__(self, gpu_id=0):
+        self.gpu_id = gpu_id
+        self.handle = None
+
+    def open(self):
+        if pynvml is None:
+            raise ImportError("pynvml is not installed")
+        pynvml.nvmlInit()
+        self.handle = pynvml.nvmlDeviceGetHandleByIndex(self.gpu_id)
+
+    def sample(self):
+        mem_info = pynvml.nvmlDeviceGetMemoryInfo(self.handle)
+        utilization = pynvml.nvmlDeviceGetUtilizationRates(self.handle)
+        return {
+            "memory.total": mem_info.total / 1024.0**2,
+            "memory.free": mem_info.free / 1024.0**2,
+            "memory.used": mem_info.used / 1024.0**2,
+            "utilization.gpu": utilization.gpu,
+            "utilization.memory": utilization.memory,
+        }
+
+    def info(self):
+        name = pynvml.nvmlDeviceGetName(self.handle)
+        return {
+            "index": self.gpu_id,
+            "name": name.decode("utf-8") if isinstance(name, bytes) else name,
+        }
+
+    def close(self):
+        pynvml.nvmlShutdown()
+
+
+class XPUSource(SampleSource):
+    """
+    kunlun xpu status by one `xpu_smi -d<id> -m` call per sample
+    """
+
+    name = "xpu"
+    keys = (
+        "pci_addr",
+        "board_id",
+        "dev_id",
+        "sn",
+        "temperature",
+        "p1",
+        "mem temperature",
+        "p2",
+        "power(mW)",
+        "freq_0",
+        "freq_1",
+        "freq_2",
+        "freq_3",
+        "freq_4",
+        "freq_5",
+        "L3_used",
+        "L3_size",
+        "HBM_used",
+        "HBM_size",
+        "use_ratio",
+        "firmware version",
+        "model",
+    )
+    info_keys = ("pci_addr", "sn", "firmware version", "model")
+
+    def __init__(self, xpu_id=0, xpu_smi="xpu_smi"):
+        self.xpu_id = xpu_id
+        self.xpu_smi = xpu_smi
+        self.last_info = {}
+
+    def _query(self):
+        """
+        one xpu_smi line as dict
+        """
+        output = subprocess.run(
+            [self.xpu_smi, "-d{}".format(self.xpu_id), "-m"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        ).stdout.decode("utf-8")
+        lines = [line.strip() for line in output.splitlines() if line.strip() != ""]
+        if len(lines) == 0:
+            return {}
+        return {k: v for k, v in zip(self.keys, lines[-1].split(" "))}
+
+    def sample(self):
+        item = self._query()
+        self.last_info.update({k: item[k] for k in self.info_keys if k in item})
+        return {k: int(v) for k, v in item.items() if k not in self.info_keys}
+
+    def info(self):
+        return dict(self.last_info)
+
+
+class FakeSource(SampleSource):
+    """
+    replay given samples, for tests without devices
+    """
+
+    def __init__(self, samples, name="fake", info=None):
+        """
+        __init__
+        Args:
+            samples(list|callable): list of value dicts replayed in order(the last one repeats),
+                                    or callable returning a value dict
+            name(str): source name
+            info(dict): static information
+        """
+        self.samples = samples
+        self.name = name
+        self._info = info or {}
+        self.index = 0
+
+    def sample(self):
+        if callable(self.samples):
+            return self.samples()
+        item = self.samples[min(self.index, len(self.samples) - 1)]
+        self.index += 1
+        return item
+
+    def info(self):
+        return dict(self._info)
+
+
+class SamplingMonitor(object):
+    """
+    background sampling thread over pluggable sources
+    """
+
+    def __init__(self, sources, interval=0.05, capacity=4096):
+        """
+        __init__
+        Args:
+            sources(list): SampleSource list
+            interval(float): seconds between samples
+            capacity(int): ring buffer size of every value
+        """
+        self.sources = list(sources)
+        self.interval = interval
+        self.capacity = capacity
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        open sources, take the first sample and start the sampling thread
+        """
+        opened = []
+        for source in self.sources:
+            try:
+                source.open()
+                opened.append(source)
+            except Exception as e:
+                sys.stderr.write("monitor source {} disabled: {}\n".format(source.name, e))
+        self.sources = opened
+        self.sample()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="sampling-monitor")
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def _run(self):
+        """
+        sampling loop
+        """
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """
+        take one sample of every source
+        """
+        for source in self.sources:
+            try:
+                values = source.sample()
+            except Exception as e:
+                sys.stderr.write("monitor source {} sample failed: {}\n".format(source.name, e))
+                continue
+            with self.lock:
+                buffers = self.buffers.setdefault(source.name, {})
+                for k, v in values.items():
+                    if k not in buffers:
+                        buffers[k] = RingBuffer(self.capacity)
+                    buffers[k].append(v)
+
+    def stop(self):
+        """
+        stop the sampling thread, take a last sample and release sources
+        """
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+            self.sample()
+        for source in self.sources:
+            try:
+                source.close()
+            except Exception as e:
+                sys.stderr.write("monitor source {} close failed: {}\n".format(source.name, e))
+
+    def stats(self):
+        """
+        Returns:
+            stats(dict): {source name: {value name: stats}}, can be called while running
+        """
+        with self.lock:
+            return {name: {k: buf.stats() for k, buf in buffers.items()} for name, buffers in self.buffers.items()}
+
+    def max(self, source_name, key, default=None):
+        """
+        max value of a source, default when it has no sample
+        """
+        with self.lock:
+            buf = self.buffers.get(source_name, {}).get(key)
+            return buf.max if buf is not None and buf.count > 0 else default
+
+    def info(self):
+        """
+        Returns:
+            info(dict): {source name: static information}
+        """
+        res = {}
+        for source in self.sources:
+            try:
+                res[source.name] = source.info()
+            except Exception:
+                res[source.name] = {}
+        return res
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def default_sources(pid=None, gpu_id=None, xpu_id=None):
+    """
+    cpu source, plus gpu/xpu source when gpu_id/xpu_id is given
+    """
+    sources = [CPUSource(pid)]
+    if gpu_id is not None:
+        sources.append(GPUSource(gpu_id))
+    if xpu_id is not None:
+        sources.append(XPUSource(xpu_id))
+    return sources
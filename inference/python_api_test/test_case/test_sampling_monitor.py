@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+test sampling monitor with FakeSource
+"""
+
+import os
+import sys
+
+import pytest
+
+# pylint: disable=wrong-import-position
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sampling_monitor import RingBuffer, FakeSource, SampleSource, SamplingMonitor
+
+# pylint: enable=wrong-import-position
+
+
+class BrokenSource(SampleSource):
+    """
+    source failing in open or sample
+    """
+
+    def __init__(self, name, fail_open=False):
+        self.name = name
+        self.fail_open = fail_open
+
+    def open(self):
+        if self.fail_open:
+            raise ImportError("device library is not installed")
+
+    def sample(self):
+        raise RuntimeError("device lost")
+
+
+def test_ring_buffer_wraparound():
+    """
+    the latest capacity samples are kept, min/max/mean/count cover all samples
+    """
+    buf = RingBuffer(capacity=4)
+    assert buf.stats() == {"count": 0}
+    for i in range(1, 11):
+        buf.append(i)
+    assert sorted(buf.values().tolist()) == [7.0, 8.0, 9.0, 10.0]
+    stats = buf.stats(percentiles=(0, 50, 100))
+    assert stats["count"] == 10
+    assert stats["min"] == 1.0 and stats["max"] == 10.0
+    assert stats["mean"] == pytest.approx(5.5)
+    assert stats["p0"] == 7.0 and stats["p50"] == pytest.approx(8.5) and stats["p100"] == 10.0
+
+
+def test_ring_buffer_not_full():
+    """
+    percentiles only use filled slots before the buffer wraps
+    """
+    buf = RingBuffer(capacity=8)
+    for value in (3, 1, 2):
+        buf.append(value)
+    assert buf.values().tolist() == [3.0, 1.0, 2.0]
+    assert buf.stats()["p50"] == 2.0
+
+
+def test_fake_source_replay():
+    """
+    samples are replayed in order and the last one repeats
+    """
+    source = FakeSource([{"memory.used": 1}, {"memory.used": 2}], info={"name": "fake"})
+    assert [source.sample()["memory.used"] for _ in range(4)] == [1, 2, 2, 2]
+    assert source.info() == {"name": "fake"}
+    assert FakeSource(lambda: {"memory.used": 5}).sample() == {"memory.used": 5}
+
+
+def test_monitor_percentiles():
+    """
+    monitor stats over the ring buffer of every value
+    """
+    samples = [{"memory.used": float(i), "utilization.gpu": 50.0} for i in range(10)]
+    monitor = SamplingMonitor([FakeSource(samples, name="gpu")], capacity=5)
+    for _ in range(10):
+        monitor.sample()
+    stats = monitor.stats()["gpu"]
+    assert stats["memory.used"]["count"] == 10
+    assert stats["memory.used"]["min"] == 0.0 and stats["memory.used"]["max"] == 9.0
+    assert stats["memory.used"]["p50"] == 7.0
+    assert stats["utilization.gpu"]["p99"] == 50.0
+    assert monitor.max("gpu", "memory.used") == 9.0
+    assert monitor.max("gpu", "missing", default=-1) == -1
+    assert monitor.max("cpu", "memory.used") is None
+
+
+def test_monitor_start_stop():
+    """
+    start and stop each take one sample, broken sources are disabled or skipped
+    """
+    source = FakeSource([{"memory.used": 1.0}, {"memory.used": 3.0}], name="gpu", info={"index": 0})
+    broken = BrokenSource("xpu")
+    with SamplingMonitor([source, broken, BrokenSource("npu", fail_open=True)], interval=3600) as monitor:
+        pass
+    assert [s.name for s in monitor.sources] == ["gpu", "xpu"]
+    assert monitor.stats() == {
+        "gpu": {"memory.used": {"count": 2, "min": 1.0, "max": 3.0, "mean": 2.0, "p50": 2.0, "p90": 2.8, "p99": 2.98}}
+    }
+    assert monitor.info() == {"gpu": {"index": 0}, "xpu": {}}
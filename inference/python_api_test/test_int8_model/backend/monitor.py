@@ -14,20 +14,15 @@
 # limitations under the License.
 """
 
-import multiprocessing
-import subprocess
-import time
-import sys
 import os
-import signal
-import cpuinfo
+import sys
+import time
+
+# pylint: disable=wrong-import-position
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "test_case"))
+from sampling_monitor import SamplingMonitor, CPUSource, GPUSource, XPUSource
 
-try:
-    import pynvml
-    import psutil
-    import GPUtil
-except Exception as e:
-    sys.stderr.write("Cannot import pynvml, psutil, GPUtil, maybe it's not installed.\n")
+# pylint: enable=wrong-import-position
 
 
 class StatBase(object):
@@ -74,130 +69,66 @@ class StatBase(object):
 
 
 class Monitor(StatBase):
-    """Monitor"""
-
-    def __init__(self, gpu_id=0, use_gpu=True, xpu_id=0, use_xpu=False, interval=0.1):
+    """Monitor, sample cpu/gpu/xpu in a background thread of the current process"""
+
+    def __init__(self, gpu_id=0, use_gpu=True, xpu_id=0, use_xpu=False, interval=0.05, sources=None):
+        """
+        Args:
+            gpu_id(int): gpu id, CUDA_VISIBLE_DEVICES first
+            use_gpu(bool): sample gpu
+            xpu_id(int): xpu id, XPU_VISIBLE_DEVICES first
+            use_xpu(bool): sample xpu
+            interval(float): seconds between samples
+            sources(list): SampleSource list, replace the default cpu/gpu/xpu sources, e.g. FakeSource in tests
+        """
         self.result = {}
         self.result["result"] = {}
         # in Paddle-Test int8 model test
         # we usually export CUDA_VISIBLE_DEVICES=global_gpu_id first.
-        self.gpu_id = int(os.environ.get("CUDA_VISIBLE_DEVICES", gpu_id))
+        self.gpu_id = int(os.environ.get("CUDA_VISIBLE_DEVICES", str(gpu_id)).split(",")[0])
         self.use_gpu = use_gpu
-        self.xpu_id = int(os.environ.get("XPU_VISIBLE_DEVICES", xpu_id))
+        self.xpu_id = int(os.environ.get("XPU_VISIBLE_DEVICES", str(xpu_id)).split(",")[0])
         self.use_xpu = use_xpu
         self.interval = interval
 
-        self.cpu_stat_q = multiprocessing.Queue()
+        if sources is None:
+            sources = [CPUSource(os.getpid())]
+            if self.use_gpu:
+                sources.append(GPUSource(self.gpu_id))
+            if self.use_xpu:
+                sources.append(XPUSource(self.xpu_id))
+        self.monitor = SamplingMonitor(sources, interval=interval)
 
     def start(self):
         """start"""
-        cmd = "%s --id=%s --query-gpu=%s --format=csv,noheader%s -lms 50" % (
-            StatBase.nvidia_smi_path,
-            self.gpu_id,
-            ",".join(StatBase.gpu_keys),
-            StatBase.nu_opt,
-        )
-        xpu_cmd = f"while true; do xpu_smi -d{self.xpu_id} -m; sleep 0.05; done"
-        # print(cmd)
-        if self.use_gpu:
-            self.gpu_stat_worker = subprocess.Popen(
-                cmd, stderr=subprocess.STDOUT, stdout=subprocess.PIPE, shell=True, close_fds=True, preexec_fn=os.setsid
-            )
-
-        if self.use_xpu:
-            self.xpu_stat_worker = subprocess.Popen(
-                xpu_cmd,
-                stderr=subprocess.STDOUT,
-                stdout=subprocess.PIPE,
-                shell=True,
-                close_fds=True,
-                preexec_fn=os.setsid,
-            )
-
-        # cpu stat
-        pid = os.getpid()
-        self.cpu_stat_worker = multiprocessing.Process(
-            target=self.cpu_stat_func, args=(self.cpu_stat_q, pid, self.interval)
-        )
-        self.cpu_stat_worker.start()
+        self.monitor.start()
 
     def stop(self):
         """stop"""
-        try:
-            if self.use_gpu:
-                os.killpg(self.gpu_stat_worker.pid, signal.SIGUSR1)
-            if self.use_xpu:
-                os.killpg(self.xpu_stat_worker.pid, signal.SIGUSR1)
-            # os.killpg(p.pid, signal.SIGTERM)
-            self.cpu_stat_worker.terminate()
-            self.cpu_stat_worker.join(timeout=0.01)
-        except Exception as e:
-            print(e)
-            return
+        self.monitor.stop()
+        stats = self.monitor.stats()
+        self.result["stats"] = stats
 
         # gpu
-        if self.use_gpu:
-            lines = self.gpu_stat_worker.stdout.readlines()
-            # print(lines)
-            lines = [line.strip().decode("utf-8") for line in lines if line.strip() != ""]
-            gpu_info_list = [{k: v for k, v in zip(StatBase.gpu_keys, line.split(", "))} for line in lines]
-            if len(gpu_info_list) == 0:
-                return
-            result = gpu_info_list[0]
-            for item in gpu_info_list:
-                for k in item.keys():
-                    if k not in ["name", "uuid", "timestamp"]:
-                        result[k] = max(int(result[k]), int(item[k]))
-                    else:
-                        result[k] = max(result[k], item[k])
-            self.result["result"]["gpu_memory.used"] = result["memory.used"]
+        gpu_mem = self.monitor.max("gpu", "memory.used")
+        if self.use_gpu and gpu_mem is not None:
+            self.result["result"]["gpu_memory.used"] = int(round(gpu_mem))
 
         # xpu
-        if self.use_xpu:
-            lines = self.xpu_stat_worker.stdout.readlines()
-            # print(lines)
-            lines = [line.strip().decode("utf-8") for line in lines if line.strip() != ""]
-            xpu_info_list = [{k: v for k, v in zip(StatBase.xpu_keys, line.split(" "))} for line in lines]
-            if len(xpu_info_list) == 0:
-                return
-            result = xpu_info_list[0]
-            for item in xpu_info_list:
-                for k in item.keys():
-                    if k not in ["pci_addr", "sn", "firmware version", "model"]:
-                        result[k] = max(int(result[k]), int(item[k]))
-                    else:
-                        result[k] = max(result[k], item[k])
+        if self.use_xpu and stats.get("xpu"):
+            result = self.monitor.info().get("xpu", {})
+            result.update({k: int(v["max"]) for k, v in stats["xpu"].items()})
             self.result["XPU"] = result
 
         # cpu
-        cpu_result = {}
-        if self.cpu_stat_q.qsize() > 0:
-            cpu_result = {k: v for k, v in zip(StatBase.cpu_keys, self.cpu_stat_q.get())}
-        while not self.cpu_stat_q.empty():
-            item = {k: v for k, v in zip(StatBase.cpu_keys, self.cpu_stat_q.get())}
-            for k in StatBase.cpu_keys:
-                cpu_result[k] = max(cpu_result[k], item[k])
-        cpu_result["name"] = cpuinfo.get_cpu_info()["brand_raw"]
-        self.result["result"]["cpu_memory.used"] = cpu_result["memory.used"]
+        cpu_mem = self.monitor.max("cpu", "memory.used")
+        if cpu_mem is not None:
+            self.result["result"]["cpu_memory.used"] = cpu_mem
 
     def output(self):
         """output"""
         return self.result
 
-    def cpu_stat_func(self, q, pid, interval=0.01):
-        """cpu stat function"""
-        stat_info = psutil.Process(pid)
-        while True:
-            # pid = os.getpid()
-            cpu_util, mem_util, mem_use = (
-                stat_info.cpu_percent(),
-                stat_info.memory_percent(),
-                round(stat_info.memory_info().rss / 1024.0 / 1024.0, 4),
-            )
-            q.put([cpu_util, mem_util, mem_use])
-            time.sleep(interval)
-        return
-
 
 if __name__ == "__main__":
     begin = time.time()
@@ -1,258 +0,0 @@
-"""
-trt_int8 base values
-"""
-
-trt_int8 = {
-    "PPYOLOE": {
-        "model_name": "PPYOLOE",
-        "jingdu": {
-            "value": 0.008505799229272469,
-            "unit": "mAP",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 284.9,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "PicoDet": {
-        "model_name": "PicoDet",
-        "jingdu": {
-            "value": 0.29576267147717544,
-            "unit": "mAP",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 15.6,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "YOLOv5s": {
-        "model_name": "YOLOv5s",
-        "jingdu": {
-            "value": 0.337513986405508,
-            "unit": "mAP",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 41.9,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "YOLOv6s": {
-        "model_name": "YOLOv6s",
-        "jingdu": {
-            "value": 0.38167538696759734,
-            "unit": "mAP",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 36.3,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "YOLOv7": {
-        "model_name": "YOLOv7",
-        "jingdu": {
-            "value": 0.4599616751537943,
-            "unit": "mAP",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 101.8,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "ResNet_vd": {
-        "model_name": "ResNet_vd",
-        "jingdu": {
-            "value": 0.78542,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 6.6,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "MobileNetV3_large": {
-        "model_name": "MobileNetV3_large",
-        "jingdu": {
-            "value": 0.70114,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 4.8,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "PPLCNetV2": {
-        "model_name": "PPLCNetV2",
-        "jingdu": {
-            "value": 0.75986,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 3.8,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "PPHGNet_tiny": {
-        "model_name": "PPHGNet_tiny",
-        "jingdu": {
-            "value": 0.77626,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 8.0,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "EfficientNetB0": {
-        "model_name": "EfficientNetB0",
-        "jingdu": {
-            "value": 0.75366,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 9.6,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "PP-HumanSeg-Lite": {
-        "model_name": "PP-HumanSeg-Lite",
-        "jingdu": {
-            "value": 0.9596980417424789,
-            "unit": "mIoU",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 42.2,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "PP-Liteseg": {
-        "model_name": "PP-Liteseg",
-        "jingdu": {
-            "value": 0.6646508698054427,
-            "unit": "mIoU",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 375.9,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "HRNet": {
-        "model_name": "HRNet",
-        "jingdu": {
-            "value": 0.7899464457999261,
-            "unit": "mIoU",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 532.6,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "UNet": {
-        "model_name": "UNet",
-        "jingdu": {
-            "value": 0.6434970135618086,
-            "unit": "mIoU",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 1105.8,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "Deeplabv3-ResNet50": {
-        "model_name": "Deeplabv3-ResNet50",
-        "jingdu": {
-            "value": 0.7900994083314681,
-            "unit": "mIoU",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 861.7,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-    "ERNIE_3.0-Medium": {
-        "model_name": "ERNIE_3.0-Medium",
-        "jingdu": {
-            "value": 0.6809545875810936,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 102.71,
-            "unit": "ms",
-            "batch_size": 32,
-            "th": 0.05,
-        },
-    },
-    "PP-MiniLM": {
-        "model_name": "PP-MiniLM",
-        "jingdu": {
-            "value": 0.6899907321594069,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 115.12,
-            "unit": "ms",
-            "batch_size": 32,
-            "th": 0.05,
-        },
-    },
-    "BERT_Base": {
-        "model_name": "BERT_Base",
-        "jingdu": {
-            "value": 0.051546658541685234,
-            "unit": "acc",
-            "th": 0.05,
-        },
-        "xingneng": {
-            "value": 18.94,
-            "unit": "ms",
-            "batch_size": 1,
-            "th": 0.05,
-        },
-    },
-}
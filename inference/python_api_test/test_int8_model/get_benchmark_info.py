@@ -1,73 +1,52 @@
 """
-get benchmark info from log
+get benchmark info from result store
 """
 
 import os
 import sys
+import ast
 import json
 import datetime
-import openpyxl
-from openpyxl.styles import Font
-from openpyxl.styles import PatternFill
-from openpyxl.styles import Alignment
-
-import base_mkldnn_fp32
-import base_mkldnn_int8
-import base_trt_fp16
-import base_trt_int8
-import base_nv_trt_fp16
-import base_nv_trt_int8
+
 import mail_report
 import write_db
+from utils.result_store import load_results, load_baseline
 
 
-FONT = {
-    "g": "00ff00",
-    "b": "ff0000",
-    "s": "000000",
-    "o": "cccccc",
-}
+FINAL_RESULT_TAG = "[Benchmark][final result]"
 
 
-def get_runtime_info(log_file):
+def get_runtime_info(mode):
     """
-    获取本次执行结果
+    获取本次执行结果, 优先读取结果库, 结果库中没有该mode时兼容读取日志 eval_{mode}_acc.log
     """
-    benchmark_res = {}
+    benchmark_res = load_results(mode)
+    if benchmark_res:
+        return benchmark_res
+    log_file = "eval_{}_acc.log".format(mode)
     if not os.path.exists(log_file):
         return benchmark_res
     with open(log_file) as fin:
-        benchmark_lines = ""
-        lines = fin.readlines()
-        for line in lines:
-            if "[Benchmark][final result]" in line:
-                tmp = line.strip("[Benchmark][final result]").strip()
-                res_json = eval(tmp)
-                model_name = res_json["model_name"]
-                benchmark_res[model_name] = res_json
+        for line in fin:
+            pos = line.find(FINAL_RESULT_TAG)
+            if pos < 0:
+                continue
+            try:
+                res_json = ast.literal_eval(line[pos + len(FINAL_RESULT_TAG) :].strip())
+            except (ValueError, SyntaxError):
+                print("skip broken result line: {}".format(line.strip()))
+                continue
+            benchmark_res[res_json["model_name"]] = res_json
     return benchmark_res
 
 
-def get_base_info(mode):
+def get_base_info(mode, version=None):
     """
-    从base文件中读取base数据
-    mode: trt_int8 trt_fp16 mkldnn_int8 mkldnn_fp32
+    从baseline.jsonl中读取base数据
+    mode: trt_int8 trt_fp16 nv_trt_int8 nv_trt_fp16 mkldnn_int8 mkldnn_fp32
+    version: base版本, 默认每个模型的最新版本
     """
-    if mode == "trt_int8":
-        base_res = base_trt_int8.trt_int8
-    elif mode == "trt_fp16":
-        base_res = base_trt_fp16.trt_fp16
-    elif mode == "nv_trt_int8":
-        base_res = base_nv_trt_int8.nv_trt_int8
-    elif mode == "nv_trt_fp16":
-        base_res = base_nv_trt_fp16.nv_trt_fp16
-    elif mode == "mkldnn_int8":
-        base_res = base_mkldnn_int8.mkldnn_int8
-    elif mode == "mkldnn_fp32":
-        base_res = base_mkldnn_fp32.mkldnn_fp32
-    else:
-        base_res = None
-    return base_res
+    return load_baseline(mode, version)
 
 
 def compare_diff(base_res, benchmark_res, metric_list):
@@ -79,19 +58,22 @@ def compare_diff(base_res, benchmark_res, metric_list):
     for model, info in base_res.items():
         compare_res[model] = {}
         for item in metric_list:
+            base_item = info.get(item, {"value": -1, "unit": "", "th": 0})
             compare_res[model][item] = {
-                "th": info[item]["th"],
-                "base": info[item]["value"],
+                "th": base_item["th"],
+                "base": base_item["value"],
                 "benchmark": -1,
                 "diff": -1,
                 "gsb": "o",
-                "unit": info[item]["unit"],
+                "unit": base_item["unit"],
             }
 
         if model not in benchmark_keys:
             continue
 
         for item in metric_list:
+            if item not in benchmark_res[model]:
+                continue
             compare_res[model][item]["benchmark"] = benchmark_res[model][item]["value"]
             if compare_res[model][item]["base"] <= 0:
                 continue
@@ -205,137 +187,14 @@ def res_summary(diff_res, mode_list, metric_list):
     return res, tongji
 
 
-def res2xls(env, res, tongji, mode_list, metric_list, jingping_list, save_file):
-    """
-    将结果保存为excel文件
-    """
-
-    wb = openpyxl.Workbook()
-
-    # table1: 详细数据
-    sheet_detail = wb.create_sheet(index=0, title="detail")
-    sheet_detail = wb["detail"]
-
-    # 表头
-    sheet_detail.cell(1, 2).value = env
-
-    D = 1 + 2 * len(jingping_list)
-    n = len(metric_list) * D
-    row_s = 2
-    column_s = 2
-    for m in mode_list:
-        sheet_detail.cell(row_s, column_s).value = m
-        column_s += n
-
-    row_s = 3
-    column_s = 2
-    for m in mode_list:
-        for k in metric_list:
-            sheet_detail.cell(row_s, column_s).value = k
-            column_s += D
-
-    row_s = 4
-    column_s = 2
-    n = len(mode_list) * len(metric_list)
-    for i in range(n):
-        w = 0
-        sheet_detail.cell(4, column_s + w).value = "实际值"
-        for jingping in jingping_list:
-            w += 1
-            sheet_detail.cell(4, column_s + w).value = "{}值".format(jingping)
-            w += 1
-            sheet_detail.cell(4, column_s + w).value = "diff-{}".format(jingping)
-        column_s += D
-
-    # 数据
-    row_s = 5
-    models = list(res["base"].keys())
-    for model in models:
-        column_s = 1
-        w = 0
-        sheet_detail.cell(row_s, column_s).value = model
-        for m in mode_list:
-            for k in metric_list:
-                w += 1
-                sheet_detail.cell(row_s, column_s + w).value = res["base"][model][m][k]["benchmark"]
-                for jingping in jingping_list:
-                    if (model in res[jingping].keys()) and (m in res[jingping][model].keys()):
-                        w += 1
-                        sheet_detail.cell(row_s, column_s + w).value = res[jingping][model][m][k]["base"]
-                        w += 1
-                        sheet_detail.cell(row_s, column_s + w).value = res[jingping][model][m][k]["diff"]
-                        _color = res[jingping][model][m][k]["gsb"]
-                        _font = Font(color=FONT[_color])
-                        sheet_detail.cell(row_s, column_s + w).font = _font
-                    else:
-                        w += 1
-                        w += 1
-        row_s += 1
-
-    # 合并表头单元格
-    """
-    sheet_detail.merge_cells("B1:Z1")
-    sheet_detail.merge_cells("B2:I2")
-    sheet_detail.merge_cells("B3:E3")
-    sheet_detail.merge_cells("F3:I3")
-    sheet_detail.merge_cells("J2:Q2")
-    sheet_detail.merge_cells("J3:M3")
-    sheet_detail.merge_cells("N3:Q3")
-    sheet_detail.merge_cells("R2:Y2")
-    sheet_detail.merge_cells("R3:U3")
-    sheet_detail.merge_cells("V3:Y3")
-    sheet_detail.merge_cells("Z2:AG2")
-    sheet_detail.merge_cells("Z3:AC3")
-    sheet_detail.merge_cells("AD3:AG3")
-    """
-
-    # table2: gsb统计数据
-    for jingping in jingping_list:
-        add_table_gsb(wb, jingping, tongji[jingping], metric_list, mode_list)
-
-    wb.save("{}".format(save_file))
-
-
-def add_table_gsb(wb, jingping, tongji, metric_list, mode_list):
+def res2html(task_dt, env, res, tongji, mode_list, metric_list, jingping_list, save_file):
     """
-    gsb
+    将结果保存为html报告
     """
-    title = "gsb-{}".format(jingping)
-    sheet_gsb = wb.create_sheet(index=1, title=title)
-    sheet_gsb = wb[title]
-
-    # 表头
-    column_s = 2
-    row_s = 1
-    for k in metric_list:
-        sheet_gsb.cell(row_s, column_s).value = k
-        column_s += 3
-
-    column_s = 2
-    row_s = 2
-    for k in metric_list:
-        sheet_gsb.cell(row_s, column_s).value = "GSB"
-        sheet_gsb.cell(row_s, column_s + 1).value = "下降数（占比）"
-        sheet_gsb.cell(row_s, column_s + 2).value = "上升数（占比）"
-        column_s += 3
-
-    # 数据
-    column_s = 1
-    row_s = 3
-    for m in mode_list:
-        info = tongji[m]
-        sheet_gsb.cell(row_s, column_s).value = m
-        for k in metric_list:
-            sheet_gsb.cell(row_s, column_s + 1).value = info[k]["gsb"]
-            sheet_gsb.cell(row_s, column_s + 2).value = "{}({})".format(info[k]["b"], info[k]["b_ratio"])
-            sheet_gsb.cell(row_s, column_s + 3).value = "{}({})".format(info[k]["g"], info[k]["g_ratio"])
-            column_s += 3
-        column_s = 1
-        row_s += 1
-
-    # 并表头单元格
-    sheet_gsb.merge_cells("B1:D1")
-    sheet_gsb.merge_cells("E1:G1")
+    subject, content = mail_report.create_table_day(task_dt, env, tongji, res, mode_list, metric_list, jingping_list)
+    with open(save_file, "w") as fout:
+        fout.write(content.replace("<body>", "<body>\n<h3>{}</h3>".format(subject), 1))
+    return subject, content
 
 
 def res2db(env, benchmark_res, mode_list, metric_list):
@@ -376,7 +235,7 @@ def res2db(env, benchmark_res, mode_list, metric_list):
 
 def run():
     """
-    统计结果并保存到excel文件
+    统计结果并保存为html报告
     """
     task_dt = datetime.date.today()
 
@@ -415,15 +274,15 @@ def run():
     benchmark_res = {}
     diff_res = {}
     diff_res_nv = {}
+    base_version = os.environ.get("BENCHMARK_BASELINE_VERSION", None)
     for mode in mode_list:
-        log_file = "eval_{}_acc.log".format(mode)
-        _current = get_runtime_info(log_file)
+        _current = get_runtime_info(mode)
         benchmark_res.setdefault(mode, _current)
-        _base = get_base_info(mode)
+        _base = get_base_info(mode, base_version)
         _diff = compare_diff(_base, _current, metric_list)
         diff_res.setdefault(mode, _diff)
         if mode in ["trt_int8", "trt_fp16"]:
-            _base_nv = get_base_info("nv_" + mode)
+            _base_nv = get_base_info("nv_" + mode, base_version)
             _diff_nv = compare_diff(_base_nv, _current, metric_list)
             diff_res_nv.setdefault(mode, _diff_nv)
 
@@ -441,35 +300,16 @@ def run():
     if "trt_int8" in mode_list:
         jingping_list.append("NV-TRT")
 
-    env_str = "环境: "
-    env_str += "docker: "
-    env_str += docker_image
-    env_str += "  "
-    env_str += "frame: "
-    env_str += "  "
-    env_str += "frame_branch: "
-    env_str += frame_branch
-    env_str += "  "
-    env_str += "frame_commit: "
-    env_str += frame_commit
-    env_str += "  "
-    env_str += "device: "
-    env_str += gpu
-    env_str += "  "
-    env_str += cpu
-    env_str += "  "
-    env_str += "阈值: 时延/内存/显存 0.05，精度 0.01"
-    env_str += "  "
-
-    # save result to xlsx
-    res2xls(env_str, res, tongji, mode_list, metric_list, jingping_list, save_file)
+    # save result to html report
+    subject, content = res2html(task_dt, env, res, tongji, mode_list, metric_list, jingping_list, save_file)
 
     # save result to db
     db_res = res2db(env, benchmark_res, mode_list, metric_list)
     write_db.write(db_res)
 
-    # send mail
-    mail_report.report_day(task_dt, env, tongji, res, mode_list, metric_list, jingping_list)
+    # send mail, the report file is uploaded by default
+    if os.environ.get("BENCHMARK_SEND_MAIL", "False") == "True":
+        mail_report.mail_content(subject, content)
 
 
 if __name__ == "__main__":
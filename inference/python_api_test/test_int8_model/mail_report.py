@@ -11,8 +11,6 @@ from email.header import Header
 import datetime
 import time
 
-import mail_conf
-
 MTRICE_CHINESE = {"jingdu": "精度", "xingneng": "时延", "cpu_mem": "内存", "gpu_mem": "显存"}
 
 
@@ -175,15 +173,21 @@ def create_table_day(task_dt, env, gsb, detail, mode_list, metric_list, jingping
     return subject, content
 
 
+def mail_content(subject, content):
+    """
+    按mail_conf配置发送报告
+    """
+    import mail_conf
+
+    mail(mail_conf.SENDER, mail_conf.RECIVER, subject, content, mail_conf.PROXY)
+
+
 def report_day(task_dt, env, gsb, detail, mode_list, metric_list, jingping_list):
     """
     天级报告
     """
-    sender = mail_conf.SENDER
-    reciver = mail_conf.RECIVER
-    proxy = mail_conf.PROXY
     subject, content = create_table_day(task_dt, env, gsb, detail, mode_list, metric_list, jingping_list)
-    mail(sender, reciver, subject, content, proxy)
+    mail_content(subject, content)
 
 
 if __name__ == "__main__":
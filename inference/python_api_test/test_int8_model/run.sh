@@ -3,6 +3,10 @@
 bash prepare.sh
 mv models models.bak
 
+# results in benchmark_result.jsonl are tagged with this run id, get_benchmark_info.py only reads this run
+export BENCHMARK_RUN_ID=${BENCHMARK_RUN_ID:-$(date "+%Y%m%d%H%M%S")_$$}
+echo ${BENCHMARK_RUN_ID} > benchmark_run_id
+
 OLD_IFS="${IFS}"
 IFS=","
 
@@ -11,9 +15,12 @@ do
     echo "==========START ${mode}========="
 
     cp -r models.bak models
+    # eval scripts append their results to benchmark_result.jsonl tagged with this mode
+    export BENCHMARK_MODE=${mode}
     if [[ ${mode} =~ "trt_int8" ]] || [[ ${mode} =~ "trt_fp16" ]]
     then
-        bash run_${mode}.sh > eval_${mode}_acc.log.tmp 2>&1
+        # warm-up run, its results are kept apart from this run
+        BENCHMARK_RUN_ID=${BENCHMARK_RUN_ID}_warmup bash run_${mode}.sh > eval_${mode}_acc.log.tmp 2>&1
     fi
     bash run_${mode}.sh > eval_${mode}_acc.log 2>&1
     rm -rf models
@@ -31,6 +31,7 @@ from paddlenlp.data import Stack, Tuple, Pad
 from paddlenlp.metrics import AccuracyAndF1, Mcc, PearsonAndSpearman
 from paddlenlp.transformers import BertForSequenceClassification, BertTokenizer
 from backend.monitor import Monitor
+from utils.result_store import write_result
 
 METRIC_CLASSES = {
     "cola": Mcc,
@@ -272,6 +273,13 @@ class WrapperPredictor(object):
             },
         }
         print("[Benchmark][final result]{}".format(final_res))
+        write_result(
+            final_res,
+            precision=FLAGS.precision,
+            backend=FLAGS.deploy_backend,
+            device=FLAGS.device,
+            latency={"avg": round(predict_time * 1000 / i, 2)},
+        )
         benchmark_result = {
             "model_path": FLAGS.model_path,
             "model_name": FLAGS.model_name,
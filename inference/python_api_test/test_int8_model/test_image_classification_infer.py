@@ -25,8 +25,9 @@ import yaml
 
 import paddle
 from backend.monitor import Monitor
-from paddle.io import DataLoader
+from utils.result_store import write_result
 from utils.imagenet_reader import ImageNetDataset
+from utils.eval_pipeline import PrefetchLoader, TopkAccuracy, cache_subdir
 
 
 def argsparser():
@@ -77,15 +78,31 @@ def argsparser():
         help="whether val on full data, if not we will only val on 1000 samples",
     )
     parser.add_argument("--model_name", type=str, default="", help="model_name for benchmark")
+    parser.add_argument("--num_workers", type=int, default=4, help="preprocess worker processes, 0 means no worker")
+    parser.add_argument("--cache_dir", type=str, default=None, help="decoded image cache dir, None means no cache")
     return parser
 
 
-def eval_reader(data_dir, batch_size, crop_size, resize_size):
+def eval_reader(data_dir, batch_size, crop_size, resize_size, num_workers=0, cache_dir=None):
     """
     eval reader func
     """
     val_reader = ImageNetDataset(mode="val", data_dir=data_dir, crop_size=crop_size, resize_size=resize_size)
-    val_loader = DataLoader(val_reader, batch_size=batch_size, shuffle=False, drop_last=False, num_workers=0)
+    if cache_dir:
+        cache_dir = cache_subdir(
+            cache_dir,
+            "imagenet_val",
+            paths=[data_dir, os.path.join(data_dir, "val_list.txt")],
+            params={"crop_size": crop_size, "resize_size": resize_size},
+        )
+    val_loader = PrefetchLoader(
+        val_reader,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        drop_last=False,
+        cache_dir=cache_dir,
+        cache_ids=[sample[0] for sample in val_reader.data],
+    )
     return val_loader
 
 
@@ -107,13 +124,19 @@ def eval(predictor, FLAGS):
     """
     if os.path.exists(FLAGS.data_path):
         val_loader = eval_reader(
-            FLAGS.data_path, batch_size=FLAGS.batch_size, crop_size=FLAGS.img_size, resize_size=FLAGS.resize_size
+            FLAGS.data_path,
+            batch_size=FLAGS.batch_size,
+            crop_size=FLAGS.img_size,
+            resize_size=FLAGS.resize_size,
+            num_workers=FLAGS.num_workers,
+            cache_dir=FLAGS.cache_dir,
         )
     else:
         image = np.ones((1, 3, FLAGS.img_size, FLAGS.img_size)).astype(np.float32)
         label = None
         val_loader = [[image, label]]
     results = []
+    accuracy = TopkAccuracy(topk=(1, 5))
     predict_time = 0.0
     time_min = float("inf")
     time_max = float("-inf")
@@ -150,20 +173,10 @@ def eval(predictor, FLAGS):
         time_min = min(time_min, timed)
         time_max = max(time_max, timed)
         predict_time += timed
-        sort_array = batch_output.argsort(axis=1)
-        top_1_pred = sort_array[:, -1:][:, ::-1]
         if label is None:
-            results.append(top_1_pred)
+            results.append(batch_output.argmax(axis=1)[:, None])
             break
-        label = np.array(label)
-        top_1 = np.mean(label == top_1_pred)
-        top_5_pred = sort_array[:, -5:][:, ::-1]
-        acc_num = 0
-        for i, _ in enumerate(label):
-            if label[i][0] in top_5_pred[i]:
-                acc_num += 1
-        top_5 = float(acc_num) / len(label)
-        results.append([top_1, top_5])
+        accuracy.update(batch_output, np.array(label))
         if batch_id >= sample_nums:
             break
         if batch_id % 100 == 0:
@@ -189,7 +202,7 @@ def eval(predictor, FLAGS):
 
     print("[Benchmark] cpu_mem:{} MB, gpu_mem: {} MB".format(cpu_mem, gpu_mem))
 
-    result = np.mean(np.array(results), axis=0)
+    result = accuracy.accumulate() if accuracy.count > 0 else np.mean(np.array(results), axis=0)
     fp_message = FLAGS.precision
     print_msg = "Paddle-Inference-GPU"
     if FLAGS.use_trt and FLAGS.deploy_backend == "paddle_inference":
@@ -238,6 +251,13 @@ def eval(predictor, FLAGS):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=FLAGS.precision,
+        backend=FLAGS.deploy_backend,
+        device=FLAGS.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     benchmark_result = {
         "model_path": FLAGS.model_path,
         "model_name": FLAGS.model_name,
@@ -307,6 +327,8 @@ def main(FLAGS):
                     batch_size=FLAGS.batch_size,
                     crop_size=FLAGS.img_size,
                     resize_size=FLAGS.resize_size,
+                    num_workers=FLAGS.num_workers,
+                    cache_dir=FLAGS.cache_dir,
                 )
             ),
             verbose=False,
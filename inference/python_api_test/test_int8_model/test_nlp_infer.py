@@ -31,6 +31,7 @@ from paddlenlp.datasets import load_dataset
 from paddlenlp.data import Stack, Tuple, Pad
 from paddlenlp.metrics import Mcc, PearsonAndSpearman
 from backend.monitor import Monitor
+from utils.result_store import write_result
 
 METRIC_CLASSES = {
     "cola": Mcc,
@@ -297,6 +298,13 @@ class WrapperPredictor(object):
             },
         }
         print("[Benchmark][final result]{}".format(final_res))
+        write_result(
+            final_res,
+            precision=FLAGS.precision,
+            backend=FLAGS.deploy_backend,
+            device=FLAGS.device,
+            latency={"avg": round(predict_time * 1000 / i, 2)},
+        )
         benchmark_result = {
             "model_path": FLAGS.model_path,
             "model_name": FLAGS.model_name,
@@ -26,6 +26,7 @@ import paddle
 from paddle.inference import create_predictor, PrecisionType
 from paddle.inference import Config as PredictConfig
 from backend import PaddleInferenceEngine, TensorRTEngine, Monitor
+from utils.result_store import write_result
 
 from ppocr.data import create_operators, transform, build_dataloader
 from ppocr.postprocess import build_post_process
@@ -206,6 +207,13 @@ def predict_image(predictor, rerun_flag=False):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=args.precision,
+        backend=args.deploy_backend,
+        device=args.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     sys.stdout.flush()
 
 
@@ -216,6 +224,7 @@ def eval(args, predictor, rerun_flag=False):
     """
     # DataLoader need run on cpu
     config = load_config(args.dataset_config)
+    config["Eval"]["loader"]["num_workers"] = args.num_workers
     devices = paddle.set_device("cpu")
     val_loader = build_dataloader(config, "Eval", devices, logger)
     post_process_class = build_post_process(config["PostProcess"])
@@ -311,6 +320,13 @@ def eval(args, predictor, rerun_flag=False):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=args.precision,
+        backend=args.deploy_backend,
+        device=args.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     sys.stdout.flush()
 
 
@@ -331,6 +347,7 @@ def main(args):
     else:
         # DataLoader need run on cpu
         config = load_config(args.dataset_config)
+        config["Eval"]["loader"]["num_workers"] = args.num_workers
         devices = paddle.set_device("cpu")
         val_loader = build_dataloader(config, "Eval", devices, logger)
 
@@ -419,5 +436,6 @@ if __name__ == "__main__":
     parser.add_argument("--min_subgraph_size", type=int, default=15)
     parser.add_argument("--model_type", type=str, default="det")
     parser.add_argument("--model_name", type=str, default="", help="model name for benchmark")
+    parser.add_argument("--num_workers", type=int, default=4, help="preprocess worker processes, 0 means no worker")
     args = parser.parse_args()
     main(args)
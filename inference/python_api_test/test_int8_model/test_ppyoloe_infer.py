@@ -23,6 +23,7 @@ import numpy as np
 
 import paddle
 from backend.monitor import Monitor
+from utils.result_store import write_result
 from ppdet.core.workspace import load_config, create
 from ppdet.metrics import COCOMetric
 
@@ -60,6 +61,7 @@ def argsparser():
     parser.add_argument("--exclude_nms", action="store_true", default=False, help="Whether exclude nms or not.")
     parser.add_argument("--calibration_file", type=str, default=None, help="quant onnx model calibration cache file.")
     parser.add_argument("--small_data", action="store_true", default=False, help="Whether use small data to eval.")
+    parser.add_argument("--num_workers", type=int, default=4, help="preprocess worker processes, 0 means no worker")
     return parser
 
 
@@ -212,6 +214,13 @@ def eval(predictor, val_loader, metric, rerun_flag=False):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=FLAGS.precision,
+        backend=FLAGS.deploy_backend,
+        device=FLAGS.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     benchmark_result = {
         "model_path": FLAGS.model_path,
         "model_name": FLAGS.model_name,
@@ -297,7 +306,7 @@ def main():
     else:
         dataset = reader_cfg["EvalDataset"]
     global val_loader
-    val_loader = create("EvalReader")(dataset, reader_cfg["worker_num"], return_list=True)
+    val_loader = create("EvalReader")(dataset, FLAGS.num_workers, return_list=True)
     clsid2catid = {v: k for k, v in dataset.catid2clsid.items()}
     anno_file = dataset.get_anno()
     metric = COCOMetric(anno_file=anno_file, clsid2catid=clsid2catid, IouType="bbox")
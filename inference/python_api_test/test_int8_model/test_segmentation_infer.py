@@ -27,6 +27,7 @@ from paddleseg.core.infer import reverse_transform
 from paddleseg.utils import metrics
 
 from backend.monitor import Monitor
+from utils.result_store import write_result
 
 
 def argsparser():
@@ -73,6 +74,7 @@ def argsparser():
     parser.add_argument("--calibration_file", type=str, default=None, help="quant onnx model calibration cache file.")
     parser.add_argument("--model_name", type=str, default="", help="model_name for benchmark")
     parser.add_argument("--small_data", action="store_true", default=False, help="Whether use small data to eval.")
+    parser.add_argument("--num_workers", type=int, default=4, help="preprocess worker processes, 0 means no worker")
     return parser
 
 
@@ -202,6 +204,13 @@ def eval(predictor, loader, eval_dataset, rerun_flag):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=FLAGS.precision,
+        backend=FLAGS.deploy_backend,
+        device=FLAGS.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     benchmark_result = {
         "model_path": FLAGS.model_path,
         "model_name": FLAGS.model_name,
@@ -237,7 +246,9 @@ def main():
     eval_dataset = builder.val_dataset
 
     batch_sampler = paddle.io.BatchSampler(eval_dataset, batch_size=1, shuffle=False, drop_last=False)
-    eval_loader = paddle.io.DataLoader(eval_dataset, batch_sampler=batch_sampler, num_workers=0, return_list=True)
+    eval_loader = paddle.io.DataLoader(
+        eval_dataset, batch_sampler=batch_sampler, num_workers=FLAGS.num_workers, return_list=True
+    )
     FLAGS.total_samples = len(eval_dataset) if not FLAGS.small_data else 100
     FLAGS.sample_nums = len(eval_loader) if not FLAGS.small_data else 100
     FLAGS.batch_size = int(FLAGS.total_samples / FLAGS.sample_nums)
@@ -25,7 +25,9 @@ import pkg_resources as pkg
 
 import paddle
 from backend.monitor import Monitor
+from utils.result_store import write_result
 from utils.dataset import COCOValDataset
+from utils.eval_pipeline import PrefetchLoader, cache_subdir
 from utils.yolo_series_post_process import YOLOPostProcess, coco_metric
 
 
@@ -62,6 +64,8 @@ def argsparser():
     parser.add_argument("--calibration_file", type=str, default=None, help="quant onnx model calibration cache file.")
     parser.add_argument("--model_name", type=str, default="", help="model name for benchmark")
     parser.add_argument("--small_data", action="store_true", default=False, help="Whether use small data to eval.")
+    parser.add_argument("--num_workers", type=int, default=4, help="preprocess worker processes, 0 means no worker")
+    parser.add_argument("--cache_dir", type=str, default=None, help="decoded image cache dir, None means no cache")
     return parser
 
 
@@ -204,6 +208,13 @@ def eval(predictor, val_loader, anno_file, rerun_flag=False):
         },
     }
     print("[Benchmark][final result]{}".format(final_res))
+    write_result(
+        final_res,
+        precision=FLAGS.precision,
+        backend=FLAGS.deploy_backend,
+        device=FLAGS.device,
+        latency={"min": round(time_min * 1000, 2), "max": round(time_max * 1000, 2), "avg": round(time_avg * 1000, 2)},
+    )
     benchmark_result = {
         "model_path": FLAGS.model_path,
         "model_name": FLAGS.model_name,
@@ -236,7 +247,22 @@ def main():
         dataset_dir=FLAGS.dataset_dir, image_dir=FLAGS.val_image_dir, anno_path=FLAGS.val_anno_path
     )
     anno_file = dataset.ann_file
-    val_loader = paddle.io.DataLoader(dataset, batch_size=FLAGS.batch_size, drop_last=True)
+    cache_dir = None
+    if FLAGS.cache_dir:
+        cache_dir = cache_subdir(
+            FLAGS.cache_dir,
+            "coco_val",
+            paths=[os.path.join(FLAGS.dataset_dir, FLAGS.val_image_dir), anno_file],
+            params={"img_size": dataset.img_size},
+        )
+    val_loader = PrefetchLoader(
+        dataset,
+        batch_size=FLAGS.batch_size,
+        num_workers=FLAGS.num_workers,
+        drop_last=True,
+        cache_dir=cache_dir,
+        cache_ids=dataset.ids,
+    )
 
     if FLAGS.deploy_backend == "paddle_inference":
         from backend.paddle_inference import PaddleInferenceEngine
@@ -0,0 +1,287 @@
+"""
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import collections
+import multiprocessing
+
+import numpy as np
+
+_worker_dataset = None
+_worker_cache = None
+
+
+def _digest(value):
+    """
+    sha1 of a json serializable value
+    """
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cache_subdir(cache_dir, name, paths=(), params=None):
+    """
+    cache sub directory keyed by the dataset files and the preprocess params, so that a change of
+    data dir, annotation file or preprocess config never reads samples decoded for another config
+    Args:
+        cache_dir(str): cache root
+        name(str): readable prefix, e.g. imagenet_val
+        paths(list): data dirs and annotation/list files, files are keyed by path, size and mtime
+        params(dict): preprocess params, e.g. crop_size, resize_size
+    Returns:
+        <cache_dir>/<name>_<hash>
+    """
+    key = []
+    for path in paths:
+        path = os.path.abspath(path)
+        stat = os.stat(path) if os.path.isfile(path) else None
+        key.append([path, stat.st_size if stat else None, stat.st_mtime_ns if stat else None])
+    return os.path.join(cache_dir, "{}_{}".format(name, _digest([key, params or {}])[:16]))
+
+
+class SampleCache(object):
+    """
+    decoded sample cache on disk, one npy file per field, loaded by mmap in repeat runs
+    manifest.json records the dataset length and a hash of the sample ids, it is checked on open
+    and the cache is cleared when the dataset changed
+    """
+
+    def __init__(self, cache_dir, length=None, ids=None):
+        """
+        Args:
+            cache_dir(str): cache directory, should differ for different preprocess configs, see cache_subdir
+            length(int): dataset length
+            ids(list): sample ids in dataset order, e.g. image ids or file names, default range(length)
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        ids = list(range(length)) if ids is None and length is not None else ids
+        self.manifest = {
+            "length": len(ids) if ids is not None else length,
+            "ids": _digest([str(i) for i in ids]) if ids is not None else None,
+        }
+        self._check_manifest()
+
+    def _check_manifest(self):
+        """
+        clear the cache when the manifest does not match this dataset
+        """
+        path = os.path.join(self.cache_dir, "manifest.json")
+        manifest = None
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    manifest = json.load(f)
+            except ValueError:
+                manifest = None
+        if manifest == self.manifest:
+            return
+        for name in os.listdir(self.cache_dir):
+            item = os.path.join(self.cache_dir, name)
+            if os.path.isdir(item):
+                shutil.rmtree(item, ignore_errors=True)
+            else:
+                os.remove(item)
+        tmp_file = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_file, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_file, path)
+
+    def _meta_path(self, index):
+        return os.path.join(self.cache_dir, "{:08d}.json".format(index))
+
+    def _field_path(self, index, field):
+        return os.path.join(self.cache_dir, "{:08d}.{}.npy".format(index, field))
+
+    def has(self, index):
+        """
+        whether sample index is cached
+        """
+        return os.path.exists(self._meta_path(index))
+
+    def get(self, index):
+        """
+        load cached sample, arrays are read only memmaps
+        """
+        with open(self._meta_path(index)) as f:
+            meta = json.load(f)
+        values = [np.load(self._field_path(index, field), mmap_mode="r") for field in meta["fields"]]
+        if meta["type"] == "dict":
+            return dict(zip(meta["fields"], values))
+        return values if meta["type"] == "list" else tuple(values)
+
+    def put(self, index, sample):
+        """
+        cache a tuple/list/dict sample of arrays, samples with non-array fields are not cached
+        """
+        if isinstance(sample, dict):
+            sample_type, fields, values = "dict", [str(k) for k in sample], list(sample.values())
+        elif isinstance(sample, (list, tuple)):
+            sample_type = "list" if isinstance(sample, list) else "tuple"
+            fields, values = [str(i) for i in range(len(sample))], list(sample)
+        else:
+            return
+        values = [np.asarray(v) for v in values]
+        if any(v.dtype == object for v in values):
+            return
+        pid = os.getpid()
+        for field, value in zip(fields, values):
+            tmp_file = "{}.{}.tmp.npy".format(self._field_path(index, field), pid)
+            np.save(tmp_file, value)
+            os.replace(tmp_file, self._field_path(index, field))
+        # meta is written last, a sample is visible only when all fields are written
+        tmp_file = "{}.{}.tmp".format(self._meta_path(index), pid)
+        with open(tmp_file, "w") as f:
+            json.dump({"type": sample_type, "fields": fields}, f)
+        os.replace(tmp_file, self._meta_path(index))
+
+
+def load_sample(dataset, cache, index):
+    """
+    load sample from cache, decode and cache it when missing
+    """
+    if cache is not None and cache.has(index):
+        return cache.get(index)
+    sample = dataset[index]
+    if cache is not None:
+        cache.put(index, sample)
+    return sample
+
+
+def _init_worker(dataset, cache):
+    global _worker_dataset, _worker_cache
+    _worker_dataset = dataset
+    _worker_cache = cache
+
+
+def _worker_load(index):
+    return load_sample(_worker_dataset, _worker_cache, index)
+
+
+def collate(samples):
+    """
+    stack samples to a batch, keep the structure of a sample(tuple/list -> list, dict -> dict)
+    """
+    first = samples[0]
+    if isinstance(first, dict):
+        return {k: collate([s[k] for s in samples]) for k in first}
+    if isinstance(first, (list, tuple)):
+        return [collate([s[i] for s in samples]) for i in range(len(first))]
+    if isinstance(first, (np.ndarray, np.generic, int, float)):
+        return np.stack([np.asarray(s) for s in samples])
+    return list(samples)
+
+
+class PrefetchLoader(object):
+    """
+    eval loader over a map-style dataset: samples are decoded in worker processes, at most
+    prefetch batches are in flight, batches are yielded in dataset order as numpy arrays
+    """
+
+    def __init__(
+        self, dataset, batch_size=1, num_workers=4, prefetch=4, drop_last=False, cache_dir=None, cache_ids=None
+    ):
+        """
+        Args:
+            dataset: map-style dataset with __getitem__ and __len__
+            batch_size(int): batch size
+            num_workers(int): preprocess worker processes, 0 means decode in the main process
+            prefetch(int): batches decoded ahead of the consumer
+            drop_last(bool): drop the last incomplete batch
+            cache_dir(str): decoded sample cache dir, None means no cache
+            cache_ids(list): sample ids in dataset order, recorded in the cache manifest
+        """
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.prefetch = max(prefetch, 1)
+        self.drop_last = drop_last
+        self.cache = SampleCache(cache_dir, length=len(dataset), ids=cache_ids) if cache_dir else None
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.dataset) // self.batch_size
+        return (len(self.dataset) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        num_samples = len(self) * self.batch_size if self.drop_last else len(self.dataset)
+        if self.num_workers <= 0:
+            for start in range(0, num_samples, self.batch_size):
+                end = min(start + self.batch_size, num_samples)
+                yield collate([load_sample(self.dataset, self.cache, i) for i in range(start, end)])
+            return
+
+        # fork: workers inherit the dataset instead of pickling it
+        pool = multiprocessing.get_context("fork").Pool(
+            self.num_workers, initializer=_init_worker, initargs=(self.dataset, self.cache)
+        )
+        try:
+            pending = collections.deque()
+            next_index = 0
+            batch = []
+            while next_index < num_samples or pending:
+                while next_index < num_samples and len(pending) < self.prefetch * self.batch_size:
+                    if self.cache is not None and self.cache.has(next_index):
+                        # cached samples are mmap loaded in the main process, no pickling through the pool
+                        pending.append((next_index, None))
+                    else:
+                        pending.append((next_index, pool.apply_async(_worker_load, (next_index,))))
+                    next_index += 1
+                index, result = pending.popleft()
+                batch.append(self.cache.get(index) if result is None else result.get())
+                if len(batch) == self.batch_size or (not pending and next_index >= num_samples):
+                    yield collate(batch)
+                    batch = []
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+class TopkAccuracy(object):
+    """
+    vectorized top-k accuracy, accumulated over samples
+    """
+
+    def __init__(self, topk=(1, 5)):
+        self.topk = topk
+        self.correct = {k: 0 for k in topk}
+        self.count = 0
+
+    def update(self, logits, labels):
+        """
+        Args:
+            logits(np.ndarray): [batch, class_num]
+            labels(np.ndarray): [batch] or [batch, 1]
+        """
+        logits = np.asarray(logits).reshape(len(logits), -1)
+        labels = np.asarray(labels).reshape(-1)
+        max_k = min(max(self.topk), logits.shape[1])
+        # top max_k classes, ordered by score
+        top = np.argpartition(-logits, max_k - 1, axis=1)[:, :max_k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(logits, top, axis=1), axis=1), axis=1)
+        hits = top == labels[:, None]
+        for k in self.topk:
+            self.correct[k] += int(hits[:, :k].any(axis=1).sum())
+        self.count += len(labels)
+
+    def accumulate(self):
+        """
+        Returns:
+            list of accuracy in the order of topk
+        """
+        return [self.correct[k] / max(self.count, 1) for k in self.topk]
@@ -0,0 +1,209 @@
+"""
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import argparse
+
+# results of eval scripts, appended by every run
+RESULT_FILE = os.environ.get("BENCHMARK_RESULT_FILE", "benchmark_result.jsonl")
+# id of the current run, written by run.sh so that later steps(get_benchmark_info.py) only read this run
+RUN_ID_FILE = os.environ.get("BENCHMARK_RUN_ID_FILE", "benchmark_run_id")
+# versioned baseline records, kept in the repo
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "baseline.jsonl")
+
+
+def _to_builtin(value):
+    """
+    json fallback for numpy scalars/arrays
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class ResultStore(object):
+    """
+    append-only jsonl store, one record per line
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path(str): jsonl file
+        """
+        self.path = path
+
+    def append(self, record):
+        """
+        append a record, the line is written by one locked write so parallel runs do not interleave
+        """
+        line = json.dumps(record, default=_to_builtin, ensure_ascii=False) + "\n"
+        with open(self.path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(line)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def records(self, **filters):
+        """
+        records matching all filters in append order, broken lines(e.g. killed writer) are skipped
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    sys.stderr.write("skip broken record in {}: {}\n".format(self.path, line[:80]))
+                    continue
+                if all(record.get(k) == v for k, v in filters.items()):
+                    yield record
+
+    def latest(self, key="model_name", **filters):
+        """
+        Returns:
+            index(dict): record key -> latest matching record
+        """
+        index = {}
+        for record in self.records(**filters):
+            index[record.get(key)] = record
+        return index
+
+
+def current_run_id():
+    """
+    Returns:
+        run id from env BENCHMARK_RUN_ID, or RUN_ID_FILE written by run.sh, None if neither exists
+    """
+    run_id = os.environ.get("BENCHMARK_RUN_ID")
+    if run_id:
+        return run_id
+    if os.path.exists(RUN_ID_FILE):
+        with open(RUN_ID_FILE) as f:
+            run_id = f.read().strip()
+    return run_id or None
+
+
+def write_result(final_res, mode=None, path=None, **meta):
+    """
+    append the final result of an eval script
+    Args:
+        final_res(dict): model_name, batch_size and metric dicts(jingdu/xingneng/cpu_mem/gpu_mem/xpu)
+        mode(str): benchmark mode, default env BENCHMARK_MODE set by run.sh
+        path(str): store file, default RESULT_FILE
+        meta: precision, backend, device, latency...
+    """
+    record = {
+        "kind": "result",
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "mode": mode or os.environ.get("BENCHMARK_MODE", ""),
+        "run_id": current_run_id(),
+    }
+    record.update(meta)
+    record.update(final_res)
+    ResultStore(path or RESULT_FILE).append(record)
+    return record
+
+
+def load_results(mode, path=None, run_id=None):
+    """
+    Args:
+        run_id(str): only read records of this run, default current_run_id();
+                     records of earlier runs and of the trt warm-up run are skipped
+    Returns:
+        results(dict): model_name -> latest result record of mode
+    """
+    filters = {"kind": "result", "mode": mode}
+    run_id = run_id or current_run_id()
+    if run_id is not None:
+        filters["run_id"] = run_id
+    return ResultStore(path or RESULT_FILE).latest(**filters)
+
+
+def load_baseline(mode, version=None, path=None):
+    """
+    Args:
+        mode(str): trt_int8 trt_fp16 nv_trt_int8 nv_trt_fp16 mkldnn_int8 mkldnn_fp32
+        version(str): baseline version, None means the latest version of every model
+    Returns:
+        baseline(dict): model_name -> baseline record
+    """
+    filters = {"kind": "baseline", "mode": mode}
+    if version is not None:
+        filters["version"] = version
+    return ResultStore(path or BASELINE_FILE).latest(**filters)
+
+
+def promote_baseline(mode, version, metric_list, result_path=None, baseline_path=None, run_id=None):
+    """
+    append the results of mode in run_id(default current_run_id()) as a new baseline version,
+    thresholds are kept from the current baseline
+    Returns:
+        number of promoted models
+    """
+    base = load_baseline(mode, path=baseline_path)
+    store = ResultStore(baseline_path or BASELINE_FILE)
+    count = 0
+    for model, result in load_results(mode, result_path, run_id).items():
+        record = {"kind": "baseline", "mode": mode, "version": version, "model_name": model}
+        record["batch_size"] = result.get("batch_size")
+        for item in metric_list:
+            if item not in result:
+                continue
+            th = base.get(model, {}).get(item, {}).get("th", 0.05)
+            record[item] = {"value": result[item]["value"], "unit": result[item]["unit"], "th": th}
+        store.append(record)
+        count += 1
+    return count
+
+
+def parse_args():
+    """
+    parse args
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["show", "promote"], help="show latest results or promote them to baseline")
+    parser.add_argument("--mode", type=str, required=True, help="benchmark mode")
+    parser.add_argument("--version", type=str, default=None, help="baseline version to create")
+    parser.add_argument("--metric", type=str, default="jingdu,xingneng,cpu_mem,gpu_mem", help="metrics to promote")
+    parser.add_argument("--result_file", type=str, default=None, help="result store file")
+    parser.add_argument("--baseline_file", type=str, default=None, help="baseline store file")
+    parser.add_argument("--run_id", type=str, default=None, help="run id, default the last run of run.sh")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.action == "show":
+        for model, record in load_results(args.mode, args.result_file, args.run_id).items():
+            print(json.dumps(record, ensure_ascii=False))
+    else:
+        if args.version is None:
+            raise ValueError("--version is required to promote baseline")
+        num = promote_baseline(
+            args.mode, args.version, args.metric.split(","), args.result_file, args.baseline_file, args.run_id
+        )
+        print("promoted {} models of {} to baseline version {}".format(num, args.mode, args.version))
@@ -86,7 +86,7 @@ pip install bce-python-sdk
 
 PADDLE_COMMIT=`python -c "import paddle; print(paddle.version.commit)"`
 DT=`date "+%Y-%m-%d"`
-SAVE_FILE=${DT}_${FRAME}_${FRAME_BRANCH/\//-}_${PADDLE_COMMIT}_${DEVICE}.xlsx
+SAVE_FILE=${DT}_${FRAME}_${FRAME_BRANCH/\//-}_${PADDLE_COMMIT}_${DEVICE}.html
 
 PYTHON_VERSION=${PYTHON_VERSION:-3.8}
 CUDA_VERSION=${CUDA_VERSION:-11.2}
@@ -108,5 +108,5 @@ python -m pip install -r requirements.txt -i https://mirror.baidu.com/pypi/simpl
 python upload.py --bucket_name paddle-qa --object_key inference_benchmark/paddle/slim/${SAVE_FILE} --upload_file_name ${UPLOAD_FILE_PATH}
 cd -
 
-cp ${SAVE_FILE} benchmark_res.xlsx
+cp ${SAVE_FILE} benchmark_res.html
 '
@@ -36,16 +36,35 @@ from utility import *
 rec_image_shape_dict = {"CRNN": "3,32,100", "ABINet": "3,32,128", "ViTSTR": "1,224,224", "VisionLAN": "3,64,256"}
 
 
+def metric_matcher(keyword):
+    """
+    metric_matcher, 返回按行匹配指标的函数, 供 run_cmd 在输出流中增量提取
+    """
+
+    def match(line):
+        if (keyword + ":" in line) and ("best_accuracy" not in line):
+            return line.split(":")[-1]
+        return None
+
+    return match
+
+
 def metricExtraction(keyword, output):
     """
     metricExtraction
+    output 为 run_cmd 的返回值时优先使用流式提取到的指标
     """
+    if hasattr(output, "metrics"):
+        if keyword in output.metrics:
+            metric = output.metrics[keyword]
+            print(metric)
+            return metric
+        output = output.output
+    match = metric_matcher(keyword)
     for line in output.split("\n"):
-        if (keyword + ":" in line) and ("best_accuracy" not in line):
-            output_rec = line
+        metric = match(line)
+        if metric is not None:
             break
-    print(output_rec)
-    metric = output_rec.split(":")[-1]
     print(metric)
     return metric
 
@@ -303,11 +322,11 @@ class TestOcrModelFunction:
         """
         cmd = platformAdapter(cmd)
         print(cmd)
-        cmd_result = subprocess.getstatusoutput(cmd)
+        cmd_result = run_cmd(cmd, "ocr_cli")
         exit_code = cmd_result[0]
         output = cmd_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "cli")
+        exit_check_fucntion(exit_code, output, "cli", markers=cmd_result.markers)
 
     def test_ocr_train(self, use_gpu):
         """
@@ -333,12 +352,12 @@ class TestOcrModelFunction:
         if platform.system() == "Darwin":
             cmd = cmd.replace("sed -i", 'sed -i ""')
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
         log_dir = "PaddleOCR/log_" + self.model
-        exit_check_fucntion(exit_code, output, "train", log_dir)
+        exit_check_fucntion(exit_code, output, "train", log_dir, markers=detection_result.markers)
 
     def test_ocr_train_acc(self):
         """
@@ -427,11 +446,11 @@ class TestOcrModelFunction:
             cmd = cmd.replace("rm -rf", "del")
             cmd = cmd.replace("mv", "ren")
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_get_pretrained_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "eval")
+        exit_check_fucntion(exit_code, output, "eval", markers=detection_result.markers)
 
     def test_ocr_eval(self, use_gpu):
         """
@@ -451,11 +470,11 @@ class TestOcrModelFunction:
             cmd = cmd.replace(";", "&")
         cmd = cmd.replace("_udml.yml", ".yml")
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_eval" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "eval")
+        exit_check_fucntion(exit_code, output, "eval", markers=detection_result.markers)
         """
           if self.category=='rec' or self.category=='table':
              keyword='acc'
@@ -510,12 +529,12 @@ configs/picodet/legacy_model/application/layout_analysis/picodet_lcnet_x2_5_layo
             cmd = cmd.replace(";", "&")
 
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_rec_infer" % self.model, metrics={"result": metric_matcher("result")})
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "infer")
-        check_infer_metric(self.category, output, self.dataset)
+        exit_check_fucntion(exit_code, output, "infer", markers=detection_result.markers)
+        check_infer_metric(self.category, detection_result, self.dataset)
 
     def test_ocr_export_model(self, use_gpu):
         """
@@ -535,11 +554,11 @@ configs/picodet/legacy_model/application/layout_analysis/picodet_lcnet_x2_5_layo
         print(cmd)
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_export_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "export_model")
+        exit_check_fucntion(exit_code, output, "export_model", markers=detection_result.markers)
 
     def test_ocr_rec_predict(self, use_gpu, use_tensorrt, enable_mkldnn):
         """
@@ -611,12 +630,12 @@ configs/picodet/legacy_model/application/layout_analysis/picodet_lcnet_x2_5_layo
 
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_rec_predict" % self.model)
         print(cmd)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "predict")
+        exit_check_fucntion(exit_code, output, "predict", markers=detection_result.markers)
         # acc
         # metricExtraction('Predicts', output)
         check_predict_metric(self.category, output, self.dataset)
@@ -644,11 +663,11 @@ configs/picodet/legacy_model/application/layout_analysis/picodet_lcnet_x2_5_layo
         print(cmd)
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "ocr_predict_recovery")
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "predict_recovery")
+        exit_check_fucntion(exit_code, output, "predict_recovery", markers=detection_result.markers)
 
 
 class Test3DModelFunction:
@@ -678,12 +697,12 @@ class Test3DModelFunction:
 
         cmd = platformAdapter(cmd)
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
         log_dir = "Paddle3D/log_" + self.model
-        exit_check_fucntion(exit_code, output, "train", log_dir)
+        exit_check_fucntion(exit_code, output, "train", log_dir, markers=detection_result.markers)
 
     def test_3D_get_pretrained_model(self):
         """
@@ -734,11 +753,11 @@ wget https://bj.bcebos.com/paddle3d/models/centerpoint//centerpoint_pillars_02vo
             cmd = cmd.replace("rm -rf", "del")
             cmd = cmd.replace("mv", "ren")
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_get_pretrained_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "eval")
+        exit_check_fucntion(exit_code, output, "eval", markers=detection_result.markers)
 
     def test_3D_eval(self, use_gpu):
         """
@@ -758,11 +777,11 @@ wget https://bj.bcebos.com/paddle3d/models/centerpoint//centerpoint_pillars_02vo
             or (self.model == "centerpoint_pillars_02voxel_nuscenes_10sweep")
         ):
             cmd = 'echo "not supported for eval when bs >1"'
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_eval" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "eval")
+        exit_check_fucntion(exit_code, output, "eval", markers=detection_result.markers)
 
     def test_3D_eval_bs1(self, use_gpu):
         """
@@ -775,11 +794,11 @@ wget https://bj.bcebos.com/paddle3d/models/centerpoint//centerpoint_pillars_02vo
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_eval_bs1" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "eval")
+        exit_check_fucntion(exit_code, output, "eval", markers=detection_result.markers)
 
     def test_3D_export_model(self, use_gpu):
         """
@@ -804,11 +823,11 @@ wget https://bj.bcebos.com/paddle3d/models/centerpoint//centerpoint_pillars_02vo
         print(cmd)
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_export_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "export_model")
+        exit_check_fucntion(exit_code, output, "export_model", markers=detection_result.markers)
 
     def test_3D_predict_python(self, use_gpu, use_trt):
         """
@@ -925,12 +944,12 @@ wget https://bj.bcebos.com/paddle3d/models/centerpoint//centerpoint_pillars_02vo
 
         if platform.system() == "Windows":
             cmd = cmd.replace(";", "&")
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_3D_predict_python" % self.model)
         print(cmd)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "predict")
+        exit_check_fucntion(exit_code, output, "predict", markers=detection_result.markers)
 
 
 class TestSpeechModelFunction:
@@ -951,11 +970,11 @@ class TestSpeechModelFunction:
         """
         cmd = platformAdapter(cmd)
         print(cmd)
-        cmd_result = subprocess.getstatusoutput(cmd)
+        cmd_result = run_cmd(cmd, "speech_cli")
         exit_code = cmd_result[0]
         output = cmd_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "cli")
+        exit_check_fucntion(exit_code, output, "cli", markers=cmd_result.markers)
 
     def test_speech_get_pretrained_model(self):
         """
@@ -964,11 +983,11 @@ class TestSpeechModelFunction:
         cmd = self.testcase_yml[self.model]["get_pretrained_model"]
         cmd = platformAdapter(cmd)
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_speech_get_pretrained_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "get_pretrained_model")
+        exit_check_fucntion(exit_code, output, "get_pretrained_model", markers=detection_result.markers)
 
     def test_speech_train(self):
         """
@@ -977,11 +996,11 @@ class TestSpeechModelFunction:
         cmd = self.testcase_yml[self.model]["train"]
         cmd = platformAdapter(cmd)
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_speech_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "train")
+        exit_check_fucntion(exit_code, output, "train", markers=detection_result.markers)
 
     def test_speech_synthesize_e2e(self):
         """
@@ -990,8 +1009,8 @@ class TestSpeechModelFunction:
         cmd = self.testcase_yml[self.model]["synthesize_e2e"]
         cmd = platformAdapter(cmd)
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_speech_synthesize_e2e" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         allure_step(cmd, output)
-        exit_check_fucntion(exit_code, output, "synthesize_e2e")
+        exit_check_fucntion(exit_code, output, "synthesize_e2e", markers=detection_result.markers)
@@ -13,6 +13,7 @@
   **************************************************************************/
 """
 import subprocess
+import sys
 import re
 import ast
 import logging
@@ -30,17 +31,47 @@ import pytest
 from pytest_assume.plugin import assume
 from pytest import approx
 
+# 流式执行命令的公共库, 位于仓库根目录 tools/stream_runner.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools"))
+from stream_runner import run_command
 
-def exit_check_fucntion(exit_code, output, mode, log_dir=""):
+# 命令完整输出的日志目录, 内存中只保留最后 CMD_TAIL_LINES 行
+CMD_LOG_DIR = os.environ.get("CMD_LOG_DIR", "cmd_logs")
+CMD_TAIL_LINES = int(os.environ.get("CMD_TAIL_LINES", "2000"))
+# 单条命令超时与无输出超时(秒), 未设置则不限制
+CMD_TIMEOUT = float(os.environ["CMD_TIMEOUT"]) if os.environ.get("CMD_TIMEOUT") else None
+CMD_IDLE_TIMEOUT = float(os.environ["CMD_IDLE_TIMEOUT"]) if os.environ.get("CMD_IDLE_TIMEOUT") else None
+FAILURE_MARKERS = ("Error", "ABORT!!!")
+
+
+def run_cmd(cmd, name, metrics=None):
+    """
+    run_cmd, 输出写入 CMD_LOG_DIR/<name>.log, 返回值与 subprocess.getstatusoutput 兼容
+    """
+    return run_command(
+        cmd,
+        log_file=os.path.join(CMD_LOG_DIR, name.replace("/", "_") + ".log"),
+        markers=FAILURE_MARKERS,
+        metrics=metrics,
+        tail_lines=CMD_TAIL_LINES,
+        timeout=CMD_TIMEOUT,
+        idle_timeout=CMD_IDLE_TIMEOUT,
+    )
+
+
+def exit_check_fucntion(exit_code, output, mode, log_dir="", markers=None):
     """
     exit_check_fucntion
+    markers 为 run_cmd 增量匹配到的失败标记, 为 None 时在 output 中查找
     """
+    if markers is None:
+        markers = [marker for marker in FAILURE_MARKERS if marker in output]
     print(output)
     if exit_code == 0:
         allure.attach(output, "output.log", allure.attachment_type.TEXT)
     assert exit_code == 0, " %s  model pretrained failed!   log information:%s" % (mode, output)
-    assert "Error" not in output, "%s  model failed!   log information:%s" % (mode, output)
-    if "ABORT!!!" in output:
+    assert "Error" not in markers, "%s  model failed!   log information:%s" % (mode, output)
+    if "ABORT!!!" in markers:
         log_dir = os.path.abspath(log_dir)
         all_files = os.listdir(log_dir)
         for file in all_files:
@@ -49,7 +80,7 @@ def exit_check_fucntion(exit_code, output, mode, log_dir=""):
             with open(filename) as file_obj:
                 content = file_obj.read()
                 print(content)
-    assert "ABORT!!!" not in output, "%s  model failed!   log information:%s" % (mode, output)
+    assert "ABORT!!!" not in markers, "%s  model failed!   log information:%s" % (mode, output)
     logging.info("train model sucessfuly!")
 
 
@@ -10,6 +10,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+# 日志指标解析的公共库, 位于仓库根目录 tools/log_metric.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "tools"))
+from log_metric import MetricExtractor, UNSIGNED_NUMBER, kpi_pattern
+
 def run_model(model_name, run_mode, extra_parameters='training.max_steps=100'):
     """
     运行模型，并返回模型的输出结果
@@ -392,24 +396,16 @@ def plot_kpi_curves(model_name, model_data,run_mode):
 def log_parse(log_content, kpi_name):
     """
     解析日志文件，提取指定KPI的值
+    kpi_name 为列表时一次扫描提取多个KPI，返回 {kpi_name: 数组}
     """
-    # 定义一个空列表来存储提取到的KPI值
-    kpi_value_all = []
-    # 打开日志文件
-    with open(log_content, 'r') as f:
-        # 逐行读取日志内容
-        for line in f.readlines():
-            # 使用正则表达式匹配KPI名称和对应的数值，将提取到的数值添加到kpi_value_all中
-            if kpi_name in line:
-                regexp = r"%s\s*([0-9.]+)" % re.escape(kpi_name)  # 修改正则表达式以支持带有"."的KPI名称
-                r = re.findall(regexp, line)
-                if len(r) > 0:
-                    kpi_value_all.append(float(r[0].strip()))
-    
+    kpi_names = [kpi_name] if isinstance(kpi_name, str) else list(kpi_name)
+    # 与逐行解析一致: 每行只取第一个匹配，数值不带符号；正则只编译一次，日志按块流式读取
+    patterns = {name: kpi_pattern(name, number=UNSIGNED_NUMBER, first_per_line=True) for name in kpi_names}
+    kpi_values = MetricExtractor(patterns).extract(log_content)
     # 如果没有提取到任何KPI值，则将最终的KPI值设置为-1
-    if len(kpi_value_all) == 0:
-        kpi_value_all.append(-1)
-    # 否则，根据不同的KPI名称选择最后一个值作为最终的KPI值
-    # 返回最终的KPI值
-    kpi_value_all = np.array(kpi_value_all)
-    return kpi_value_all
+    for name, values in kpi_values.items():
+        if len(values) == 0:
+            kpi_values[name] = np.array([-1.0])
+    if isinstance(kpi_name, str):
+        return kpi_values[kpi_name]
+    return kpi_values
@@ -19,16 +19,41 @@ import re
 import subprocess
 import ast
 import os
+import sys
 import logging
 import numpy as np
 import pytest
 from pytest_assume.plugin import assume
 from pytest import approx
 
+# 流式执行命令的公共库, 位于仓库根目录 tools/stream_runner.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools"))
+from stream_runner import run_command
+
 # 删除文件的方式有变，需要增加 rsync --delete-before -d 220701
 
 logging.basicConfig(level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# 命令完整输出的日志目录, 内存中只保留最后 CMD_TAIL_LINES 行, 用于断言信息
+CMD_LOG_DIR = os.environ.get("CMD_LOG_DIR", "cmd_logs")
+CMD_TAIL_LINES = int(os.environ.get("CMD_TAIL_LINES", "2000"))
+# 单条命令超时与无输出超时(秒), 未设置则只受 pytest.ini 中整个 case 的 timeout 限制
+CMD_TIMEOUT = float(os.environ["CMD_TIMEOUT"]) if os.environ.get("CMD_TIMEOUT") else None
+CMD_IDLE_TIMEOUT = float(os.environ["CMD_IDLE_TIMEOUT"]) if os.environ.get("CMD_IDLE_TIMEOUT") else None
+
+
+def run_cmd(cmd, name):
+    """
+    function, 输出写入 CMD_LOG_DIR/<name>.log, 返回值与 subprocess.getstatusoutput 兼容
+    """
+    return run_command(
+        cmd,
+        log_file=os.path.join(CMD_LOG_DIR, name.replace("/", "_") + ".log"),
+        tail_lines=CMD_TAIL_LINES,
+        timeout=CMD_TIMEOUT,
+        idle_timeout=CMD_IDLE_TIMEOUT,
+    )
+
 
 def dependency_install(package):
     """
@@ -273,7 +298,7 @@ class TestClassModel:
                 -o DataLoader.Train.sampler.batch_size=32 -o DataLoader.Eval.sampler.batch_size=32'
             % self.yaml
         )
-        clas_result = subprocess.getstatusoutput(cmd)
+        clas_result = run_cmd(cmd, "%s_class_train" % self.model)
         exit_code = clas_result[0]
         output = clas_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -295,7 +320,7 @@ class TestClassModel:
                     wget -q https://paddle-imagenet-models-name.bj.bcebos.com/dygraph/%s_pretrained.pdparams"
                 % self.model
             )
-        clas_result = subprocess.getstatusoutput(cmd)
+        clas_result = run_cmd(cmd, "%s_get_pretrained_model" % self.model)
         exit_code = clas_result[0]
         output = clas_result[1]
         exit_check_fucntion(exit_code, output, "downlooad")
@@ -309,7 +334,7 @@ class TestClassModel:
                 -o Global.save_inference_dir=./inference/%s"
             % (self.yaml, self.model, self.model)
         )
-        clas_result = subprocess.getstatusoutput(cmd)
+        clas_result = run_cmd(cmd, "%s_class_export_model" % self.model)
         exit_code = clas_result[0]
         output = clas_result[1]
         exit_check_fucntion(exit_code, output, "export_model")
@@ -331,7 +356,7 @@ class TestClassModel:
             % self.model
         )
         for cmd in [cmd_gpu, cmd_cpu]:
-            clas_result = subprocess.getstatusoutput(cmd)
+            clas_result = run_cmd(cmd, "%s_class_predict" % self.model)
             exit_code = clas_result[0]
             output = clas_result[1]
             # check exit_code
@@ -388,7 +413,7 @@ class TestOcrModel:
             % (self.yaml, self.model, self.yaml, self.model)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         log_dir = "PaddleOCR/log_" + self.model
@@ -403,7 +428,7 @@ class TestOcrModel:
                 -o Global.use_gpu=True Global.checkpoints=output/%s/latest"
             % (self.yaml, self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_eval" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "eval")
@@ -418,7 +443,7 @@ class TestOcrModel:
                 Global.infer_img=doc/imgs_words/en/word_1.png"
             % (self.yaml, self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_rec_infer" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "infer")
@@ -434,7 +459,7 @@ class TestOcrModel:
             % (self.yaml, self.model, self.model)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_export_model" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "export_model")
@@ -452,7 +477,7 @@ class TestOcrModel:
                 --rec_image_shape="3, 32, 100" --rec_algorithm=CRNN'
             % (self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_rec_predict" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "predict")
@@ -467,7 +492,7 @@ class TestOcrModel:
                 Global.test_batch_size_per_card=1'
             % (self.yaml, self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_det_infer" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "infer")
@@ -482,7 +507,7 @@ class TestOcrModel:
                 --det_model_dir="./models_inference/"%s --det_algorithm=DB '
             % (self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_ocr_det_predict" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "predict")
@@ -496,7 +521,7 @@ class TestOcrModel:
             -o Global.use_gpu=True Global.checkpoints=output/%s/latest Global.infer_img="./doc/imgs_en/img_10.jpg"'
             % (self.yaml, self.model)
         )
-        e2eection_result = subprocess.getstatusoutput(cmd)
+        e2eection_result = run_cmd(cmd, "%s_ocr_e2e_infer" % self.model)
         exit_code = e2eection_result[0]
         output = e2eection_result[1]
         exit_check_fucntion(exit_code, output, "infer")
@@ -514,7 +539,7 @@ class TestOcrModel:
                 --e2e_algorithm=PGNet --use_gpu=True'
             % (self.model)
         )
-        e2eection_result = subprocess.getstatusoutput(cmd)
+        e2eection_result = run_cmd(cmd, "%s_ocr_e2e_predict" % self.model)
         exit_code = e2eection_result[0]
         output = e2eection_result[1]
         exit_check_fucntion(exit_code, output, "predict")
@@ -529,7 +554,7 @@ class TestOcrModel:
                 Global.checkpoints=output/%s/latest Global.infer_img="./doc/imgs_en/img_10.jpg"'
             % (self.yaml, self.model)
         )
-        clsection_result = subprocess.getstatusoutput(cmd)
+        clsection_result = run_cmd(cmd, "%s_ocr_cls_infer" % self.model)
         exit_code = clsection_result[0]
         output = clsection_result[1]
         exit_check_fucntion(exit_code, output, "infer")
@@ -544,7 +569,7 @@ class TestOcrModel:
                 --use_gpu=True'
             % (self.model)
         )
-        clsection_result = subprocess.getstatusoutput(cmd)
+        clsection_result = run_cmd(cmd, "%s_ocr_cls_predict" % self.model)
         exit_code = clsection_result[0]
         output = clsection_result[1]
         exit_check_fucntion(exit_code, output, "predict")
@@ -568,7 +593,7 @@ class TestDetectionDygraphModel:
                 --gpus=0,1,2,3 --log_dir=log_%s tools/train.py -c %s -o TrainReader.batch_size=1 epoch=3"
             % (self.model, self.yaml)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_detection_dygraph_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         log_dir = "PaddleDetection/log_" + self.model
@@ -595,7 +620,7 @@ class TestDetectionStaticModel:
                 -o TrainReader.batch_size=1  -o max_iters=10"
             % (self.model, self.yaml)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_detection_static_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         log_dir = "PaddleDetection/static/log_" + self.model
@@ -632,7 +657,7 @@ class TestSegModel:
             % (self.yaml, self.model, self.yaml, self.model)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_seg_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         log_dir = "PaddleSeg/log_" + self.model
@@ -649,7 +674,7 @@ class TestSegModel:
                 python -m paddle.distributed.launch val.py --config %s --model_path=%s.pdparams"
             % (self.model, self.model, self.yaml, self.model)
         )
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_seg_eval" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "eval")
@@ -675,7 +700,7 @@ class TestGanModel:
             % (self.yaml, self.yaml)
         )
         print(cmd)
-        gan_result = subprocess.getstatusoutput(cmd)
+        gan_result = run_cmd(cmd, "%s_gan_train" % self.model)
         exit_code = gan_result[0]
         output = gan_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -685,7 +710,7 @@ class TestGanModel:
         function
         """
         print(cmd)
-        repo_result = subprocess.getstatusoutput(cmd)
+        repo_result = run_cmd(cmd, "%s_gan_eval" % self.model)
         exit_code = repo_result[0]
         output = repo_result[1]
         exit_check_fucntion(exit_code, output, "eval")
@@ -704,7 +729,7 @@ class TestNlpModel:
         function
         """
         print(cmd)
-        repo_result = subprocess.getstatusoutput(cmd)
+        repo_result = run_cmd(cmd, "%s_nlp_train" % self.directory)
         exit_code = repo_result[0]
         output = repo_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -731,7 +756,7 @@ class TestParakeetModel:
             % (self.model, self.model, self.model, self.model)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_parakeet_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -756,7 +781,7 @@ class TestRecModel:
             % (self.directory)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_rec_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -781,7 +806,7 @@ class TestVideoModel:
             % (self.yaml)
         )
         print(cmd)
-        detection_result = subprocess.getstatusoutput(cmd)
+        detection_result = run_cmd(cmd, "%s_video_train" % self.model)
         exit_code = detection_result[0]
         output = detection_result[1]
         exit_check_fucntion(exit_code, output, "train")
@@ -791,7 +816,7 @@ class TestVideoModel:
         function
         """
         print(cmd)
-        repo_result = subprocess.getstatusoutput(cmd)
+        repo_result = run_cmd(cmd, "%s_video_eval" % self.model)
         exit_code = repo_result[0]
         output = repo_result[1]
         exit_check_fucntion(exit_code, output, "train")
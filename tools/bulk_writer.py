@@ -0,0 +1,91 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+# @author Zeref996
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+db批量写入: 参数化executemany, 每个job一次事务提交
+PaddleLT_new与api_benchmark_new的db.DB共用, 通过sys.path引入
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriter(object):
+    """
+    批量写入器, db需提供insert_many/ping以及db连接(commit/rollback), 见db.db.DB
+    """
+
+    def __init__(self, db, batch_size=None, retry=3):
+        """
+        init
+        :param db: DB对象
+        :param batch_size: 累积多少行执行一次executemany, 默认读取PLT_DB_BATCH_SIZE
+        :param retry: 提交失败时回滚重连后重试的次数
+        """
+        self.db = db
+        self.batch_size = int(batch_size or os.environ.get("PLT_DB_BATCH_SIZE", "500"))
+        self.retry = retry
+        # 当前事务中的全部行, 提交失败时整体重放
+        self._rows = []
+        self._flushed = 0
+
+    def add(self, table, row):
+        """
+        添加一行(值为None的字段不写入), 满batch_size时写入(不提交)
+        """
+        row = {k: v for k, v in row.items() if v is not None}
+        self._rows.append((table, row))
+        if len(self._rows) - self._flushed >= self.batch_size:
+            try:
+                self.flush()
+            except Exception as e:
+                # 中途写入失败时回滚, 提交时整体重放
+                logger.warning("db bulk write failed, rollback and retry on commit: %s", e)
+                self._rollback()
+
+    def _rollback(self):
+        """
+        回滚当前事务并重连
+        """
+        try:
+            self.db.db.rollback()
+        except Exception:
+            pass
+        self.db.ping()
+        self._flushed = 0
+
+    def flush(self):
+        """
+        写入尚未写入的行, 表名与字段相同的行合并为一次executemany
+        """
+        groups = {}
+        for table, row in self._rows[self._flushed :]:
+            groups.setdefault((table, tuple(row.keys())), []).append(row)
+        for (table, _), rows in groups.items():
+            self.db.insert_many(table=table, rows=rows)
+        self._flushed = len(self._rows)
+
+    def commit(self):
+        """
+        提交当前事务, 失败时回滚重连后重放全部行
+        """
+        for i in range(self.retry):
+            try:
+                self.flush()
+                self.db.db.commit()
+                self._rows = []
+                self._flushed = 0
+                return
+            except Exception as e:
+                logger.warning("db commit failed, retry %d/%d: %s", i + 1, self.retry, e, exc_info=True)
+                self._rollback()
+        raise Exception("db bulk write failed after {} retries, {} rows dropped".format(self.retry, len(self._rows)))
+
+    def close(self):
+        """
+        提交剩余的行
+        """
+        self.commit()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+日志指标解析与曲线对比
+
+各测试框架(StrategyTest、Modulus 等)共用:
+    MetricExtractor: 正则只编译一次, 按块流式读取日志, 一次读取提取多个 KPI 到 numpy 数组
+    compare_curves/assert_curve_close: 向量化的 loss 曲线对比(逐 step 绝对/相对误差、滑动窗口均值、发散 step 定位),
+        用于 paddle vs torch、DP vs 混合并行等曲线对齐
+"""
+import re
+
+import numpy as np
+
+# 浮点数, 支持科学计数法
+UNSIGNED_NUMBER = r"(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+NUMBER = r"[-+]?" + UNSIGNED_NUMBER
+CHUNK_SIZE = 1 << 20
+
+
+def kpi_pattern(name, number=NUMBER, first_per_line=False):
+    """
+    KPI 名称对应的正则: 名称后紧跟数值, 如 "Loss 0.123"
+    Args:
+        number(str): 数值的正则, NUMBER 或 UNSIGNED_NUMBER
+        first_per_line(bool): 每行只取第一个匹配, 默认取所有匹配
+    """
+    pattern = r"%s\s*(%s)" % (re.escape(name), number)
+    if first_per_line:
+        # 块在换行处截断, 行首锚定在块内同样有效
+        pattern = r"(?m)^.*?" + pattern
+    return pattern
+
+
+class MetricExtractor(object):
+    """
+    多 KPI 单次扫描提取器
+    """
+
+    def __init__(self, patterns, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            patterns(dict|list|str): {kpi: 正则}, 正则须恰好有一个捕获组(数值);
+                                     list/str 为 KPI 名称, 按 kpi_pattern 生成正则
+            chunk_size(int): 每次读取的字符数, 匹配不跨行
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not isinstance(patterns, dict):
+            patterns = {name: kpi_pattern(name) for name in patterns}
+        self.names = list(patterns)
+        self.chunk_size = chunk_size
+        # 每个 KPI 各自编译一次, 对同一段文本分别扫描, 不同 KPI 的匹配可以重叠
+        self.regexes = {}
+        for name, pattern in patterns.items():
+            regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+            if regex.groups != 1:
+                raise ValueError(f"pattern of {name} must have exactly one group, got {regex.groups}: {regex.pattern}")
+            self.regexes[name] = regex
+
+    def _scan(self, text, values):
+        for name, regex in self.regexes.items():
+            values[name].extend(regex.findall(text))
+
+    def _to_arrays(self, values):
+        return {name: np.asarray(values[name], dtype=np.float64) for name in self.names}
+
+    def extract_text(self, text):
+        """
+        Returns:
+            {kpi: np.ndarray}, 按出现顺序
+        """
+        values = {name: [] for name in self.names}
+        self._scan(text, values)
+        return self._to_arrays(values)
+
+    def extract(self, path):
+        """
+        按块读取日志文件, 块在最后一个换行处截断, 剩余部分拼到下一块
+        Returns:
+            {kpi: np.ndarray}, 按出现顺序
+        """
+        values = {name: [] for name in self.names}
+        tail = ""
+        with open(path, "r", errors="replace") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                chunk = tail + chunk
+                end = chunk.rfind("\n") + 1
+                if end == 0:
+                    tail = chunk
+                    continue
+                self._scan(chunk[:end], values)
+                tail = chunk[end:]
+        if tail:
+            self._scan(tail, values)
+        return self._to_arrays(values)
+
+
+def extract(path, patterns, chunk_size=CHUNK_SIZE):
+    """
+    单个日志文件提取, 见 MetricExtractor
+    """
+    return MetricExtractor(patterns, chunk_size).extract(path)
+
+
+def window_mean(values, window):
+    """
+    滑动窗口均值(valid), 长度为 len(values) - window + 1
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window <= 1 or len(values) < window:
+        return values
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def first_run(mask, patience=1):
+    """
+    mask 中第一个连续 patience 个 True 的起始位置, 没有则为 -1
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if patience <= 1:
+        hits = np.flatnonzero(mask)
+    else:
+        runs = np.convolve(mask.astype(np.int64), np.ones(patience, dtype=np.int64), mode="valid")
+        hits = np.flatnonzero(runs == patience)
+    return int(hits[0]) if len(hits) else -1
+
+
+def compare_curves(actual, expect, atol=0.0, rtol=0.0, window=1, patience=1):
+    """
+    对比两条曲线, 按较短一条对齐
+    Args:
+        actual, expect(array like): 曲线, 如 paddle/torch、混合并行/DP 的 loss
+        atol, rtol(float): 逐 step 判定 |actual - expect| <= atol + rtol * |expect|, 均为 0 即要求完全一致
+        window(int): >1 时先对两条曲线做滑动窗口均值再判定, 平滑单 step 抖动
+        patience(int): 连续 patience 个 step 超差才认为发散
+    Returns:
+        dict: steps/length_match/max_abs/max_rel/mean_abs/bad_steps/diverge_step/passed,
+              diverge_step 为原曲线上的 step 序号(窗口起点), -1 表示未发散
+    """
+    actual = np.asarray(actual, dtype=np.float64).reshape(-1)
+    expect = np.asarray(expect, dtype=np.float64).reshape(-1)
+    steps = min(len(actual), len(expect))
+    a = window_mean(actual[:steps], window)
+    b = window_mean(expect[:steps], window)
+    abs_diff = np.abs(a - b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_diff = np.where(b != 0, abs_diff / np.abs(b), np.where(abs_diff == 0, 0.0, np.inf))
+    bad = ~np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+    res = {
+        "steps": steps,
+        "length_match": len(actual) == len(expect),
+        "max_abs": float(np.nanmax(abs_diff)) if len(abs_diff) else 0.0,
+        "max_rel": float(np.nanmax(rel_diff)) if len(rel_diff) else 0.0,
+        "mean_abs": float(np.nanmean(abs_diff)) if len(abs_diff) else 0.0,
+        "bad_steps": int(bad.sum()),
+        "diverge_step": first_run(bad, patience),
+    }
+    res["passed"] = res["diverge_step"] == -1
+    return res
+
+
+def assert_curve_close(actual, expect, atol=0.0, rtol=0.0, window=1, patience=1, strict_length=True, name="curve"):
+    """
+    compare_curves 不通过时抛 AssertionError, strict_length 时长度不一致也不通过
+    Returns:
+        compare_curves 的结果
+    """
+    a = np.asarray(actual, dtype=np.float64).reshape(-1)
+    b = np.asarray(expect, dtype=np.float64).reshape(-1)
+    res = compare_curves(a, b, atol, rtol, window, patience)
+    if strict_length and not res["length_match"]:
+        raise AssertionError(f"{name}: length mismatch, actual {len(a)} vs expect {len(b)}")
+    if not res["passed"]:
+        step = res["diverge_step"]
+        raise AssertionError(
+            f"{name}: diverge at step {step} (actual {float(a[step])!r} vs expect {float(b[step])!r}), "
+            f"{res['bad_steps']}/{res['steps']} steps out of atol={atol} rtol={rtol} window={window}, "
+            f"max_abs={res['max_abs']:.6g} max_rel={res['max_rel']:.6g}"
+        )
+    return res
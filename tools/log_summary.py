@@ -0,0 +1,86 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+# encoding=utf-8 vi:ts=4:sw=4:expandtab:ft=python
+"""
+日志中tensor/array的摘要: 默认仅输出shape/dtype/统计值/校验和, 全量内容需设置LOG_VERBOSE=True
+
+e2e与api等测试框架共用, 通过sys.path引入:
+    logger.info("inputs: %s", LogSummary(inputs))
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+# 元素数不超过该值的数组直接输出全部内容
+SMALL_SIZE = 16
+
+
+def _is_verbose():
+    """
+    是否输出全量内容
+    """
+    return os.environ.get("LOG_VERBOSE", "False") == "True"
+
+
+def _to_numpy(value):
+    """
+    paddle/torch tensor转换为numpy, 其余类型返回None
+    """
+    if isinstance(value, np.ndarray):
+        return value
+    if type(value).__module__.split(".")[0] in ("paddle", "torch") and hasattr(value, "numpy"):
+        if hasattr(value, "detach"):
+            value = value.detach()
+        if hasattr(value, "cpu"):
+            value = value.cpu()
+        return np.asarray(value.numpy())
+    return None
+
+
+def array_summary(array):
+    """
+    单个数组的摘要字符串
+    """
+    if array.size <= SMALL_SIZE:
+        return "array(shape={}, dtype={}, value={})".format(list(array.shape), array.dtype, array.tolist())
+    res = "array(shape={}, dtype={}".format(list(array.shape), array.dtype)
+    if np.issubdtype(array.dtype, np.number) and not np.issubdtype(array.dtype, np.complexfloating):
+        res += ", min={:.6g}, max={:.6g}, mean={:.6g}".format(
+            np.nanmin(array), np.nanmax(array), np.nanmean(array, dtype=np.float64)
+        )
+    res += ", crc32={:08x})".format(zlib.crc32(np.ascontiguousarray(array).tobytes()))
+    return res
+
+
+def summarize(value):
+    """
+    嵌套结构的摘要字符串, 数组/tensor替换为摘要
+    """
+    array = _to_numpy(value)
+    if array is not None:
+        return array_summary(array)
+    if isinstance(value, dict):
+        return "{" + ", ".join("{!r}: {}".format(k, summarize(v)) for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        items = ", ".join(summarize(v) for v in value)
+        return "[" + items + "]" if isinstance(value, list) else "(" + items + ")"
+    return repr(value)
+
+
+class LogSummary(object):
+    """
+    惰性日志参数, 仅在日志实际输出时才格式化:
+    logger.info("inputs: %s", LogSummary(inputs))
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        if _is_verbose():
+            return str(self.value)
+        return summarize(self.value)
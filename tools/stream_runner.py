@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+流式执行命令
+
+替代 subprocess.getstatusoutput: 输出逐行处理, 写入按大小轮转的日志文件, 增量匹配失败标记与指标,
+内存中只保留最后 tail_lines 行用于报告, 支持整条命令超时与无输出超时.
+长时间训练的输出不再整体驻留内存.
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import subprocess
+import collections
+import logging.handlers
+
+# 单行最大读取字节数, 进度条等不换行的输出按此截断
+LINE_LIMIT = 1 << 16
+
+
+class CommandResult(collections.namedtuple("CommandResult", ["exit_code", "output"])):
+    """
+    与 getstatusoutput 的返回兼容, result[0] 为退出码, result[1] 为输出的最后 tail_lines 行
+    附加属性:
+        markers(dict): 出现过的标记 -> 第一次出现的行
+        metrics(dict): 指标名 -> 第一次提取到的值
+        lines(int): 总行数
+        log_file(str): 完整输出所在的日志文件, 可能为 None
+        timeout(str): None / "timeout"(整条命令超时) / "idle"(无输出超时)
+    """
+
+    def found(self, marker):
+        """
+        marker 是否出现过
+        """
+        return marker in self.markers
+
+
+class RotatingLog(object):
+    """
+    按大小轮转的输出日志, log_file.1 ... log_file.<backup_count> 为更早的输出
+    """
+
+    def __init__(self, log_file, max_bytes=100 << 20, backup_count=3):
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        self.handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, line):
+        """
+        写一行
+        """
+        self.handler.emit(logging.makeLogRecord({"msg": line}))
+
+    def close(self):
+        """
+        关闭文件
+        """
+        self.handler.close()
+
+
+def _kill(proc):
+    """
+    结束命令及其子进程(shell 启动的 launch、训练进程等)
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def run_command(
+    cmd,
+    log_file=None,
+    markers=(),
+    metrics=None,
+    tail_lines=2000,
+    timeout=None,
+    idle_timeout=None,
+    echo=False,
+    max_bytes=100 << 20,
+    backup_count=3,
+):
+    """
+    执行 shell 命令, 流式处理输出
+    Args:
+        cmd(str): shell 命令
+        log_file(str): 完整输出写入的日志文件, None 表示不落盘
+        markers(list): 需要检测的标记, 如 "Error"、"ABORT!!!"
+        metrics(dict): 指标名 -> 函数(line), 返回 None 表示该行不含指标, 每个指标取第一次提取到的值
+        tail_lines(int): 内存中保留的输出行数
+        timeout(float): 整条命令的超时秒数, None 表示不限制
+        idle_timeout(float): 连续无输出的超时秒数, 用于发现卡死的训练, None 表示不限制
+        echo(bool): 同时打印到 stdout
+        max_bytes(int): 日志文件轮转大小
+        backup_count(int): 保留的轮转文件个数
+    Returns:
+        CommandResult
+    """
+    metrics = metrics or {}
+    found_markers = {}
+    found_metrics = {}
+    tail = collections.deque(maxlen=tail_lines)
+    count = 0
+    log = RotatingLog(log_file, max_bytes, backup_count) if log_file else None
+    if log is not None:
+        log.write("==== %s" % cmd)
+
+    proc = subprocess.Popen(
+        cmd,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=os.name == "posix",
+    )
+    start = time.time()
+    last_output = [start]
+    timed_out = []
+    done = threading.Event()
+
+    def watchdog():
+        while not done.wait(1):
+            now = time.time()
+            if timeout is not None and now - start > timeout:
+                timed_out.append("timeout")
+            elif idle_timeout is not None and now - last_output[0] > idle_timeout:
+                timed_out.append("idle")
+            else:
+                continue
+            _kill(proc)
+            return
+
+    watcher = None
+    if timeout is not None or idle_timeout is not None:
+        watcher = threading.Thread(target=watchdog, name="command-watchdog")
+        watcher.daemon = True
+        watcher.start()
+
+    try:
+        while True:
+            raw = proc.stdout.readline(LINE_LIMIT)
+            if not raw:
+                break
+            last_output[0] = time.time()
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            count += 1
+            tail.append(line)
+            if log is not None:
+                log.write(line)
+            if echo:
+                print(line)
+            for marker in markers:
+                if marker not in found_markers and marker in line:
+                    found_markers[marker] = line
+            for name, extract in metrics.items():
+                if name not in found_metrics:
+                    value = extract(line)
+                    if value is not None:
+                        found_metrics[name] = value
+        exit_code = proc.wait()
+    except BaseException:
+        _kill(proc)
+        proc.wait()
+        if log is not None:
+            log.close()
+        raise
+    finally:
+        done.set()
+        if watcher is not None:
+            watcher.join()
+        proc.stdout.close()
+
+    timeout_kind = timed_out[0] if timed_out else None
+    if timeout_kind is not None:
+        limit = timeout if timeout_kind == "timeout" else idle_timeout
+        line = "command killed by %s after %.0fs (limit %ss)" % (timeout_kind, time.time() - start, limit)
+        tail.append(line)
+        if log is not None:
+            log.write(line)
+        sys.stderr.write(line + "\n")
+        if exit_code == 0:
+            exit_code = 1
+    if log is not None:
+        log.close()
+
+    lines = list(tail)
+    if count > len(lines):
+        lines.insert(0, "... %d lines omitted, full log: %s" % (count - len(lines), log_file))
+    result = CommandResult(exit_code, "\n".join(lines))
+    result.markers = found_markers
+    result.metrics = found_metrics
+    result.lines = count
+    result.log_file = log_file
+    result.timeout = timeout_kind
+    return result
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+log_metric 测试: MetricExtractor 按块读取时的边界, 曲线对比
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_metric import MetricExtractor, assert_curve_close, compare_curves, extract  # noqa: E402
+from log_metric import UNSIGNED_NUMBER, kpi_pattern  # noqa: E402
+
+LOG = (
+    "step 1 Loss 1.5 ips 100.25\n"
+    "step 2 Loss 1.25e-1 ips 101\n"
+    "a very long line without kpi " + "x" * 50 + "\n"
+    "\n"
+    "step 3 Loss -.5 ips 99.5 Loss 7\n"
+    "step 4 Loss 0.0625 ips 98"
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 16, 1 << 20])
+def test_extract_chunk_boundaries(tmp_path, chunk_size):
+    """
+    任意块大小下与整体扫描结果一致: 数值跨块、行长于块、末行无换行
+    """
+    path = tmp_path / "train.log"
+    path.write_text(LOG)
+    res = extract(str(path), ["Loss", "ips"], chunk_size=chunk_size)
+    expect = MetricExtractor(["Loss", "ips"]).extract_text(LOG)
+    np.testing.assert_array_equal(res["Loss"], [1.5, 0.125, -0.5, 7.0, 0.0625])
+    np.testing.assert_array_equal(res["ips"], [100.25, 101.0, 99.5, 98.0])
+    for name in ("Loss", "ips"):
+        np.testing.assert_array_equal(res[name], expect[name])
+
+
+def test_extract_patterns(tmp_path):
+    """
+    自定义正则, 没有匹配时为空数组, 捕获组不为 1 个时报错
+    """
+    path = tmp_path / "train.log"
+    path.write_text("epoch: 1, acc=0.5\nepoch: 2, acc=0.75\n")
+    res = MetricExtractor({"acc": r"acc=([\d.]+)", "top5": r"top5=([\d.]+)"}, chunk_size=4).extract(str(path))
+    np.testing.assert_array_equal(res["acc"], [0.5, 0.75])
+    assert res["top5"].shape == (0,)
+    assert MetricExtractor("epoch:").extract_text("epoch: 3")["epoch:"].tolist() == [3.0]
+    with pytest.raises(ValueError):
+        MetricExtractor({"acc": r"acc=[\d.]+"})
+    with pytest.raises(ValueError):
+        MetricExtractor({"acc": r"(acc)=([\d.]+)"})
+
+
+def test_extract_overlapping_patterns(tmp_path):
+    """
+    不同 KPI 的匹配重叠或起点相同时互不影响
+    """
+    patterns = {"step": r"step (\d+)", "loss": r"step \d+ loss ([\d.]+)", "lr": r"lr ([\d.e-]+)"}
+    path = tmp_path / "train.log"
+    path.write_text("step 1 loss 0.5 lr 1e-3\nstep 2 loss 0.25\n")
+    for chunk_size in (5, 1 << 20):
+        res = MetricExtractor(patterns, chunk_size=chunk_size).extract(str(path))
+        np.testing.assert_array_equal(res["step"], [1.0, 2.0])
+        np.testing.assert_array_equal(res["loss"], [0.5, 0.25])
+        np.testing.assert_array_equal(res["lr"], [1e-3])
+
+
+def test_kpi_pattern_first_per_line(tmp_path):
+    """
+    first_per_line 时每行只取第一个匹配, UNSIGNED_NUMBER 不接受带符号的数值
+    """
+    path = tmp_path / "train.log"
+    path.write_text("Loss -1 Loss 0.5 Loss 0.25\nLoss 2\nval Loss 3e-2 Loss 4\n")
+    res = extract(str(path), {"Loss": kpi_pattern("Loss")}, chunk_size=8)
+    np.testing.assert_array_equal(res["Loss"], [-1.0, 0.5, 0.25, 2.0, 0.03, 4.0])
+    pattern = kpi_pattern("Loss", number=UNSIGNED_NUMBER, first_per_line=True)
+    for chunk_size in (8, 1 << 20):
+        res = extract(str(path), {"Loss": pattern}, chunk_size=chunk_size)
+        np.testing.assert_array_equal(res["Loss"], [0.5, 2.0, 0.03])
+
+
+def test_compare_curves():
+    """
+    窗口均值平滑单 step 抖动, patience 定位连续发散的起点
+    """
+    expect = np.ones(10)
+    actual = expect.copy()
+    actual[3] = 1.5
+    assert compare_curves(actual, expect, atol=0.1)["diverge_step"] == 3
+    assert compare_curves(actual, expect, atol=0.1, patience=2)["passed"]
+    assert compare_curves(actual, expect, atol=0.2, window=4)["passed"]
+    actual[6:] = 2.0
+    res = compare_curves(actual, expect, atol=0.1, patience=2)
+    assert res["diverge_step"] == 6 and res["bad_steps"] == 5 and res["max_abs"] == 1.0
+    with pytest.raises(AssertionError, match="diverge at step 6"):
+        assert_curve_close(actual, expect, atol=0.1, patience=2)
+    with pytest.raises(AssertionError, match="length mismatch"):
+        assert_curve_close(expect[:5], expect)
+    assert assert_curve_close(expect[:5], expect, strict_length=False)["steps"] == 5
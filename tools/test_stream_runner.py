@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+stream_runner 测试: 整条命令超时、无输出超时、输出截断与日志轮转
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stream_runner import run_command  # noqa: E402
+
+
+def test_run_command_output():
+    """
+    与 getstatusoutput 兼容, 增量匹配标记与指标
+    """
+    result = run_command(
+        "echo 'Loss 0.5'; echo 'ABORT!!! here'; echo 'Loss 0.25'; exit 3",
+        markers=["ABORT!!!", "Error"],
+        metrics={"loss": lambda line: float(line.split()[1]) if line.startswith("Loss") else None},
+        timeout=30,
+    )
+    exit_code, output = result
+    assert exit_code == 3
+    assert output == "Loss 0.5\nABORT!!! here\nLoss 0.25"
+    assert result.found("ABORT!!!") and not result.found("Error")
+    assert result.markers["ABORT!!!"] == "ABORT!!! here"
+    assert result.metrics == {"loss": 0.5}
+    assert result.lines == 3 and result.timeout is None
+
+
+def test_run_command_timeout():
+    """
+    整条命令超时时结束整个进程组, 包括后台子进程
+    """
+    start = time.time()
+    result = run_command("(sleep 60; echo late) & while true; do echo tick; sleep 0.2; done", timeout=1)
+    assert time.time() - start < 30
+    assert result.timeout == "timeout"
+    assert result.exit_code != 0
+    assert "late" not in result.output
+    assert result.output.splitlines()[-1].startswith("command killed by timeout")
+
+
+def test_run_command_idle_timeout():
+    """
+    连续无输出超时, 有输出时不触发
+    """
+    start = time.time()
+    result = run_command("echo started; sleep 60", idle_timeout=1, timeout=120)
+    assert time.time() - start < 30
+    assert result.timeout == "idle"
+    lines = result.output.splitlines()
+    assert len(lines) == 2 and lines[0] == "started"
+    assert lines[1].startswith("command killed by idle")
+
+    result = run_command("for i in 1 2 3; do echo $i; sleep 0.5; done", idle_timeout=3)
+    assert result.timeout is None and result.exit_code == 0
+
+
+def test_run_command_tail_and_log(tmp_path):
+    """
+    内存只保留最后 tail_lines 行, 完整输出写入轮转日志
+    """
+    log_file = str(tmp_path / "logs" / "case.log")
+    result = run_command("seq 1 1000", log_file=log_file, tail_lines=3, max_bytes=1024, backup_count=50)
+    lines = result.output.splitlines()
+    assert lines[0] == "... 997 lines omitted, full log: %s" % log_file
+    assert lines[1:] == ["998", "999", "1000"]
+    assert result.log_file == log_file and result.lines == 1000
+    rotated = sorted(
+        (f for f in os.listdir(str(tmp_path / "logs")) if f != "case.log"), key=lambda f: -int(f.split(".")[-1])
+    )
+    assert rotated
+    logged = []
+    for name in rotated + ["case.log"]:
+        with open(str(tmp_path / "logs" / name)) as f:
+            logged.extend(f.read().splitlines())
+    assert logged[0] == "==== seq 1 1000"
+    assert logged[1:] == [str(i) for i in range(1, 1001)]